@@ -0,0 +1,46 @@
+# Benchmark "sshm export" outputs on large configurations
+#
+# Usage: python -m benchmarks.bench_export [HOSTS]
+import io
+import os
+import sys
+import time
+
+from benchmarks.fleet import generate_config_lines
+from sshtmux.sshm import SSH_Config
+from sshtmux.sshm.ssh_export import EXPORT_FORMATS, export_config
+
+
+class FirstWriteTimer(io.StringIO):
+    first_write = 0.0
+
+    def write(self, s):
+        if not self.first_write:
+            self.first_write = time.perf_counter()
+        return len(s)
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lines = generate_config_lines(hosts)
+
+    start = time.perf_counter()
+    config = SSH_Config(lines).parse()
+    print(f"parse          {hosts:>7} hosts  {time.perf_counter() - start:8.3f}s")
+
+    for fmt in EXPORT_FORMATS:
+        with open(os.devnull, "w") as out:
+            start = time.perf_counter()
+            count = export_config(config, out, fmt=fmt)
+            elapsed = time.perf_counter() - start
+        print(f"export {fmt:<7} {count:>7} hosts  {elapsed:8.3f}s")
+
+    # Time to first exported host, as seen by pipeline consumers
+    out = FirstWriteTimer()
+    start = time.perf_counter()
+    export_config(config, out, fmt="ndjson")
+    print(f"export first row               {out.first_write - start:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
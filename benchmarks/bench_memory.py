@@ -0,0 +1,36 @@
+# Benchmark memory used by parsed SSH configuration, per host (tracemalloc)
+#
+# Usage: python -m benchmarks.bench_memory [HOSTS]
+import gc
+import sys
+import time
+import tracemalloc
+
+from sshtmux.sshm import SSH_Config
+
+from .fleet import generate_config_lines
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    lines = generate_config_lines(hosts=hosts, groups=100)
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    config = SSH_Config(lines).parse()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    parsed = sum(len(group.hosts) for group in config.groups)
+    print(f"parse           {parsed:>7} hosts  {elapsed:8.3f}s")
+    print(
+        f"retained        {retained / 1024 / 1024:8.1f} MiB  {retained / parsed:8.0f} B/host"
+    )
+    print(f"peak            {peak / 1024 / 1024:8.1f} MiB  {peak / parsed:8.0f} B/host")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Benchmark SSH parameters validation, per host model vs memoised batch validation
+#
+# Usage: python -m benchmarks.bench_validation [HOSTS]
+import os
+import sys
+import time
+
+from sshtmux.sshm.ssh_parameters import SSHParams, SSHParamsValidator
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    params_list = [
+        {
+            "Hostname": f"10.0.{i // 256 % 256}.{i % 256}",
+            "Port": "22",
+            "User": "admin",
+            "IdentityFile": os.devnull,
+            "ServerAliveInterval": "30",
+            "Ciphers": "aes128-ctr,aes256-ctr",
+        }
+        for i in range(hosts)
+    ]
+
+    start = time.perf_counter()
+    for params in params_list:
+        SSHParams(**params).model_dump(exclude_none=True)
+    print(f"model per host  {hosts:>7} hosts  {time.perf_counter() - start:8.3f}s")
+
+    validator = SSHParamsValidator()
+    start = time.perf_counter()
+    results = validator.validate_many(params_list)
+    elapsed = time.perf_counter() - start
+    assert not any(errors for _, errors in results)
+    print(f"batch memoised  {hosts:>7} hosts  {elapsed:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Helpers for generating synthetic SSH configurations used by benchmarks
+from typing import List
+
+
+def generate_config_lines(
+    hosts: int = 20000, groups: int = 50, with_patterns: bool = True
+) -> List[str]:
+    """
+    Generate SSH config lines with given number of hosts split across groups.
+    Each group gets its own "<group>-*" pattern, and hosts share common values
+    (user, port, identity file) as typical fleet configurations do.
+    """
+    lines: List[str] = ["#<<<<< SSH Config file managed by SSHTmux >>>>>\n", "\n"]
+    hosts_per_group = max(1, hosts // groups)
+
+    for g in range(groups):
+        group = f"grp{g:03d}"
+        lines += [
+            f"#{'-' * 79}\n",
+            f"#@group: {group}\n",
+            f"#@desc: Benchmark group {g}\n",
+            f"#{'-' * 79}\n",
+        ]
+        for h in range(hosts_per_group):
+            index = g * hosts_per_group + h
+            lines += [
+                f"#@host: Benchmark host {index}\n",
+                f"Host {group}-host{h:05d}\n",
+                f"    Hostname 10.{g % 256}.{h // 256 % 256}.{h % 256}\n",
+                "    Port 22\n",
+                "    User admin\n",
+                "    IdentityFile ~/.ssh/id_ed25519\n",
+                "\n",
+            ]
+        if with_patterns:
+            lines += [
+                f"Host {group}-*\n",
+                "    ServerAliveInterval 30\n",
+                f"    ProxyJump bastion{g % 4}\n",
+                "\n",
+            ]
+    return lines
@@ -1,3 +1,5 @@
+import shlex
+import sys
 from pathlib import Path
 from pprint import pprint
 from typing import Tuple
@@ -55,6 +57,18 @@ def init_toml_config():
             toml.dump(toml_settings, file)
 
 
+def _keybinding_command(args) -> str:
+    """
+    Quote command for keybindings of init_tmux. It is run by shell of
+    "split-window", inside single quotes of shell of "run-shell", which is inside
+    double quotes of Tmux config (and its formats are expanded)
+    """
+    command = shlex.join(args).replace("'", "'\\''")
+    for char in ["\\", '"', "$"]:
+        command = command.replace(char, "\\" + char)
+    return command.replace("#", "##")
+
+
 def init_tmux():
     if Path(settings.tmux.TMUX_CONFIG_FILE).exists():
         return
@@ -84,10 +98,10 @@ def init_tmux():
     set-option -g set-clipboard on
 
     # SSHTMUX Key Binds
-    bind-key S run-shell "tmux split-window -h -c '#{pane_current_path}' 'sshm snippets run -s '#{session_name}' -w '#{window_index}' -p '#{pane_index}' '"
-    bind-key I run-shell "tmux split-window -h -c '#{pane_current_path}' 'sshm identity run '#{session_name}' '#{window_index}' '#{pane_index}' '"
-    bind-key F run-shell "tmux split-window -v -c '#{pane_current_path}' 'sshm host run '#{session_name}' '#{window_index}' '#{pane_index}' __SFTP_CLI__ '"
-    bind-key M run-shell "tmux split-window -v -c '#{pane_current_path}' 'sshm host run '#{session_name}' '#{window_index}' '#{pane_index}' __MULTICOMMNAD_CLI__ '"
+    bind-key S run-shell "tmux split-window -h -c '#{pane_current_path}' '__SSHM_CLIENT__ snippets run -s '#{session_name}' -w '#{window_index}' -p '#{pane_index}' '"
+    bind-key I run-shell "tmux split-window -h -c '#{pane_current_path}' '__SSHM_CLIENT__ identity run '#{session_name}' '#{window_index}' '#{pane_index}' '"
+    bind-key F run-shell "tmux split-window -v -c '#{pane_current_path}' '__SSHM_CLIENT__ host run '#{session_name}' '#{window_index}' '#{pane_index}' __SFTP_CLI__ '"
+    bind-key M run-shell "tmux split-window -v -c '#{pane_current_path}' '__SSHM_CLIENT__ host run '#{session_name}' '#{window_index}' '#{pane_index}' __MULTICOMMNAD_CLI__ '"
 
     # Key Binds useful
     bind-key -n M-s choose-session
@@ -145,8 +159,18 @@ def init_tmux():
     set -g pane-border-style fg=colour235
     """
 
+    # Keybindings use client of "sshm daemon", which runs "sshm" itself when daemon is not running
+    sshm_client = _keybinding_command(
+        [
+            sys.executable,
+            str(Path(__file__).parent / "client.py"),
+            "--socket",
+            settings.sshtmux.SSHTMUX_DAEMON_SOCKET,
+        ]
+    )
     tmux_config = (
-        tmux_config.replace("__SFTP_CLI__", SFTP_CLI)
+        tmux_config.replace("__SSHM_CLIENT__", sshm_client)
+        .replace("__SFTP_CLI__", SFTP_CLI)
         .replace("__MULTICOMMNAD_CLI__", MULTICOMMNAD_CLI)
         .replace("__DEFAULT_GROUP_NAME__", SSH_Config.DEFAULT_GROUP_NAME)
         .replace("__FAST_CONNECTIONS_NAME__", FAST_CONNECTIONS_GROUP_NAME)
@@ -0,0 +1,82 @@
+"""
+Tiny client for "sshm daemon"
+
+This file must only use standard library, as it is executed directly by path
+(not as part of sshtmux package), so starting it stays cheap. Command line
+arguments are forwarded to daemon together with terminal file descriptors,
+so command is executed by already warmed up daemon. When daemon is not running,
+client falls back to running "sshm" command directly.
+
+Usage: python client.py [--socket PATH] <sshm arguments>
+"""
+
+import json
+import os
+import signal
+import socket
+import sys
+
+DEFAULT_SOCKET = os.path.join("~", ".config", "sshtmux", "daemon.sock")
+FALLBACK_COMMAND = "sshm"
+
+
+def _fallback(argv):
+    try:
+        os.execvp(FALLBACK_COMMAND, [FALLBACK_COMMAND] + argv)
+    except OSError as e:
+        sys.stderr.write(f"Cannot run '{FALLBACK_COMMAND}': {e}\n")
+        sys.exit(127)
+
+
+def _read_line(conn):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(64)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode().strip()
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    socket_path = os.environ.get("SSHTMUX_DAEMON_SOCKET", DEFAULT_SOCKET)
+    if argv[:1] == ["--socket"] and len(argv) >= 2:
+        socket_path = argv[1]
+        argv = argv[2:]
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(os.path.expanduser(socket_path))
+    except OSError:
+        conn.close()
+        _fallback(argv)
+
+    request = {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    message = json.dumps(request).encode() + b"\n"
+    try:
+        socket.send_fds(conn, [message], [0, 1, 2])
+        pid = _read_line(conn)
+    except OSError:
+        pid = ""
+    if not pid:
+        # Daemon did not take request (it is stopping, or refused to fork)
+        conn.close()
+        _fallback(argv)
+
+    # Command runs in process forked by daemon, forward interrupts to it
+    if pid.isdigit():
+
+        def forward(signum, _):
+            os.kill(int(pid), signum)
+
+        signal.signal(signal.SIGINT, forward)
+        signal.signal(signal.SIGTERM, forward)
+
+    code = _read_line(conn)
+    conn.close()
+    return int(code) if code.lstrip("-").isdigit() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+import click
+
+from sshtmux.core.config import settings
+from sshtmux.exceptions import DaemonException
+from sshtmux.services.daemon import SSHMDaemon
+
+# ------------------------------------------------------------------------------
+# COMMAND: daemon
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Run resident daemon serving sshm commands"
+LONG_HELP = """
+Run long-lived daemon that serves sshm commands on Unix socket (runs in foreground)
+
+Daemon keeps SSH config parsed (it is parsed again only when config files change), and
+all modules loaded, so commands started from Tmux keybindings respond almost instantly.
+Commands are forwarded to daemon by small client (sshtmux/client.py), which falls back to
+running "sshm" directly when daemon is not running.
+
+\b
+Start it from Tmux, for example:
+tmux run-shell -b "sshm daemon"
+"""
+
+# Parameters help:
+SOCKET_HELP = "Path of Unix socket (default: SSHTMUX_DAEMON_SOCKET setting)"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="daemon", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("--socket", "socket_path", help=SOCKET_HELP)
+@click.pass_context
+def daemon(ctx, socket_path):
+    socket_path = socket_path or settings.sshtmux.SSHTMUX_DAEMON_SOCKET
+    server = SSHMDaemon(socket_path, ctx.find_root().command)
+    try:
+        server.serve_forever()
+    except DaemonException as e:
+        click.echo(str(e), err=True)
+        ctx.exit(1)
+    except KeyboardInterrupt:
+        pass
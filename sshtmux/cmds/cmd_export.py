@@ -0,0 +1,78 @@
+import click
+
+from sshtmux.sshm import SSH_Config
+from sshtmux.sshm.ssh_export import (
+    EXPORT_FIELDS,
+    EXPORT_FORMATS,
+    export_config,
+    parse_fields,
+)
+
+# ------------------------------------------------------------------------------
+# COMMAND: export
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Export configuration (JSON/NDJSON/CSV)"
+LONG_HELP = f"""
+Export parsed SSH configuration in machine-readable format
+
+Hosts, patterns and matches are written directly from the parsed model, one by one,
+so exporting very large configurations keeps memory usage low.
+
+\b
+ndjson -> one JSON document per host (default)
+json   -> single JSON document with config options, groups and their hosts
+csv    -> one row per host, nested values are written as JSON strings
+
+Exported fields can be selected with FIELDS as comma separated list of:
+{", ".join(EXPORT_FIELDS)}
+Additionally "param:<keyword>" will export single parameter value (inherited values included).
+
+Exported hosts can be limited with filters, to only export hosts that match NAME regex or GROUP regex.
+"""
+
+# Parameters help:
+FORMAT_HELP = "Output format: ndjson, json or csv (default: ndjson)"
+FIELDS_HELP = (
+    "Comma separated list of fields to export (example: name,group,param:hostname)"
+)
+GROUP_HELP = "Filter for host groups (regex)"
+NAME_HELP = "Filter for host names (regex)"
+OUTPUT_HELP = "Write output to file instead of STDOUT"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="export", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    type=click.Choice(EXPORT_FORMATS),
+    default="ndjson",
+    help=FORMAT_HELP,
+)
+@click.option("--fields", help=FIELDS_HELP)
+@click.option("-g", "--group", "group_filter", help=GROUP_HELP)
+@click.option("-n", "--name", "name_filter", help=NAME_HELP)
+@click.option("-o", "--output", type=click.File("w"), default="-", help=OUTPUT_HELP)
+@click.pass_context
+def export(ctx, fmt, fields, group_filter, name_filter, output):
+    config: SSH_Config = ctx.obj
+
+    try:
+        selected_fields = parse_fields(fields, fmt)
+    except ValueError as e:
+        click.echo(str(e), err=True)
+        ctx.exit(1)
+
+    try:
+        export_config(
+            config,
+            output,
+            fmt=fmt,
+            fields=selected_fields,
+            group_filter=group_filter,
+            name_filter=name_filter,
+        )
+    except BrokenPipeError:
+        # Output consumer (like "head") closed the pipe, nothing more to export
+        ctx.exit(0)
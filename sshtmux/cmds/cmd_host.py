@@ -1,8 +1,10 @@
 import click
 
 from .host import (
+    host_connect,
     host_create,
     host_delete,
+    host_exec,
     host_list,
     host_rename,
     host_run,
@@ -28,3 +30,5 @@ ssh_host.add_command(host_set.cmd)
 ssh_host.add_command(host_show.cmd)
 ssh_host.add_command(host_rename.cmd)
 ssh_host.add_command(host_run.cmd)
+ssh_host.add_command(host_exec.cmd)
+ssh_host.add_command(host_connect.cmd)
@@ -0,0 +1,122 @@
+import click
+
+from sshtmux.sshm import SSH_Config
+from sshtmux.sshm.ssh_import import (
+    IMPORT_FORMATS,
+    ImportPlan,
+    apply_import,
+    detect_format,
+    load_records,
+    plan_import,
+)
+
+# ------------------------------------------------------------------------------
+# COMMAND: import
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Import hosts in bulk (JSON/NDJSON/CSV)"
+LONG_HELP = """
+Import host definitions in bulk from FILE (use '-' for STDIN)
+
+All hosts are validated first, then compared with current configuration, and all changes
+(create/update/delete) are written to SSH config file at once. If any host definition is
+not valid, nothing is written.
+
+\b
+ndjson -> one JSON document per host: {"name": ..., "group": ..., "info": [...], "params": {...}}
+json   -> list of such documents, or a document written by "sshm export -f json"
+csv    -> columns "name", "group", "info", any other column is used as SSH parameter
+
+Host names are used exactly as given (group name is not prefixed). Missing groups are created.
+Files written by "sshm export" can be imported, "match" and "global_pattern" hosts are skipped.
+Parameters which are not part of import are not changed on existing hosts.
+
+With --delete, hosts which are not part of import are deleted, but only from groups that are
+present in the import file. Patterns are never deleted by import.
+"""
+
+# Parameters help:
+FORMAT_HELP = (
+    "Input format: ndjson, json or csv (default: detected from file extension)"
+)
+DRY_RUN_HELP = "Only show changes that would be applied, do not write anything"
+DELETE_HELP = (
+    "Delete hosts missing in import (only in groups that are present in import)"
+)
+YES_HELP = "Skip confirmation and assume 'yes'. Be careful!"
+# ------------------------------------------------------------------------------
+
+
+def _print_plan(plan: ImportPlan) -> None:
+    for record in plan.creates:
+        click.echo(f"+ {record.name} ({record.group})")
+        for keyword, value in record.params.items():
+            click.echo(f"      {keyword} {value}")
+
+    for change in plan.updates:
+        click.echo(f"~ {change.record.name} ({change.group.name})")
+        if change.move:
+            click.echo(f"      group: {change.group.name} -> {change.record.group}")
+        if change.info:
+            click.echo(f"      info: {change.host.info} -> {change.record.info}")
+        for keyword, (old, new) in change.params.items():
+            click.echo(f"      {keyword}: {old if old is not None else '-'} -> {new}")
+
+    for host, group in plan.deletes:
+        click.echo(f"- {host.name} ({group.name})")
+
+
+def _print_summary(plan: ImportPlan) -> None:
+    click.echo(
+        f"Create: {len(plan.creates)}, Update: {len(plan.updates)}, "
+        f"Delete: {len(plan.deletes)}, Unchanged: {plan.unchanged}"
+    )
+
+
+@click.command(name="import", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option(
+    "-f", "--format", "fmt", type=click.Choice(IMPORT_FORMATS), help=FORMAT_HELP
+)
+@click.option("--dry-run", is_flag=True, help=DRY_RUN_HELP)
+@click.option("--delete", "delete_missing", is_flag=True, help=DELETE_HELP)
+@click.option("--yes", is_flag=True, help=YES_HELP)
+@click.argument("file", type=click.File("r"))
+@click.pass_context
+def import_cmd(ctx, fmt, dry_run, delete_missing, yes, file):
+    config: SSH_Config = ctx.obj
+
+    if not fmt:
+        fmt = detect_format(file.name)
+        if not fmt:
+            click.echo(
+                f"Cannot detect format of '{file.name}', use --format option!", err=True
+            )
+            ctx.exit(1)
+
+    try:
+        records, errors = load_records(config, file, fmt)
+    except ValueError as e:
+        click.echo(f"Cannot read '{file.name}': {e}", err=True)
+        ctx.exit(1)
+
+    plan = plan_import(config, records, delete_missing=delete_missing)
+    errors += plan.errors
+    if errors:
+        click.echo(
+            "Cannot import hosts, following definitions are not valid:", err=True
+        )
+        for name, message in errors:
+            click.echo(f"{name}: {message}", err=True)
+        ctx.exit(1)
+
+    _print_plan(plan)
+    _print_summary(plan)
+
+    if dry_run or not plan.has_changes:
+        return
+
+    if plan.deletes and not yes:
+        if not click.confirm("Are you sure?"):
+            ctx.exit(1)
+
+    apply_import(config, plan)
+    config.generate_ssh_config().write_out()
@@ -0,0 +1,16 @@
+import click
+
+from .logs import logs_list, logs_search
+
+
+# ------------------------------------------------------------------------------
+# Logs Commands
+# ------------------------------------------------------------------------------
+@click.group(name="logs", help="Search logged output of Tmux connections")
+def logs():
+    pass
+
+
+# // Linking other sub-commands
+logs.add_command(logs_search.cmd)
+logs.add_command(logs_list.cmd)
@@ -0,0 +1,16 @@
+import click
+
+from .scrollback import scrollback_archive, scrollback_show
+
+
+# ------------------------------------------------------------------------------
+# Scrollback Commands
+# ------------------------------------------------------------------------------
+@click.group(name="scrollback", help="Archive and restore scrollback of Tmux panes")
+def scrollback():
+    pass
+
+
+# // Linking other sub-commands
+scrollback.add_command(scrollback_archive.cmd)
+scrollback.add_command(scrollback_show.cmd)
@@ -0,0 +1,69 @@
+import re
+import time
+
+import click
+
+from sshtmux.services.scrollback import ScrollbackSearch, list_panes
+from sshtmux.services.tmux import Tmux
+
+# ------------------------------------------------------------------------------
+# COMMAND: search
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Search scrollback of all Tmux panes"
+LONG_HELP = """
+Search scrollback of all panes of sshtmux Tmux server with regex
+
+Panes are captured in batches (many panes with single Tmux call) which run in
+parallel, and their output is matched line by line, so scrollback of all panes
+is not kept in memory. Matching lines are shown most recent first: panes of recently
+active windows first, newest lines first. Line number tells how many lines are below
+matching line in pane.
+
+\b
+Example: (sshm search -i "out of memory" --host r:^web-)
+"""
+
+# Parameters help:
+SESSION_HELP = "Search only panes of this session (can be used many times)"
+HOST_HELP = "Search only panes of this host (can be used many times, r: for regex)"
+IGNORE_CASE_HELP = "Case insensitive search"
+FIXED_HELP = "Search PATTERN as plain text, not regex"
+LIMIT_HELP = "Show only this number of most recent matching lines"
+WORKERS_HELP = "Number of Tmux calls at once (default: SSH_FANOUT_WORKERS)"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="search", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("-s", "--session", "sessions", multiple=True, help=SESSION_HELP)
+@click.option("--host", "hosts", multiple=True, help=HOST_HELP)
+@click.option("-i", "--ignore-case", is_flag=True, help=IGNORE_CASE_HELP)
+@click.option("-F", "--fixed-strings", is_flag=True, help=FIXED_HELP)
+@click.option("-l", "--limit", type=int, help=LIMIT_HELP)
+@click.option("-w", "--workers", type=int, help=WORKERS_HELP)
+@click.argument("pattern")
+@click.pass_context
+def search(ctx, pattern, sessions, hosts, ignore_case, fixed_strings, limit, workers):
+    start_time = time.perf_counter()
+    if fixed_strings:
+        pattern = re.escape(pattern)
+    try:
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    except re.error as e:
+        click.echo(f"Invalid pattern: {e}", err=True)
+        ctx.exit(1)
+
+    tmux = Tmux()
+    panes = list_panes(tmux, list(sessions), list(hosts))
+    hits = ScrollbackSearch(tmux, workers=workers).search(regex, panes)
+    for hit in hits[:limit] if limit else hits:
+        host = f" {hit.pane.host}" if hit.pane.host else ""
+        click.echo(f"{hit.pane.target}{host} -{hit.line}: {hit.text}")
+
+    if not ctx.obj.stdout:
+        elapsed = time.perf_counter() - start_time
+        click.echo(
+            f"Found {len(hits)} line(s) in {len(panes)} pane(s) in {elapsed:.3f}s",
+            err=True,
+        )
+    if not hits:
+        ctx.exit(1)
@@ -0,0 +1,17 @@
+import click
+
+from .session import session_list, session_restore, session_save
+
+
+# ------------------------------------------------------------------------------
+# Session Commands
+# ------------------------------------------------------------------------------
+@click.group(name="session", help="Save and restore Tmux sessions layout")
+def session():
+    pass
+
+
+# // Linking other sub-commands
+session.add_command(session_save.cmd)
+session.add_command(session_restore.cmd)
+session.add_command(session_list.cmd)
@@ -0,0 +1,53 @@
+import logging
+
+import click
+
+from sshtmux.exceptions import TMUXException
+from sshtmux.services.supervisor import Supervisor
+from sshtmux.services.tmux import Tmux
+
+# ------------------------------------------------------------------------------
+# COMMAND: supervisor
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Reconnect dropped SSH connections in Tmux"
+LONG_HELP = """
+Run supervisor that reconnects SSH/SFTP panes whose connection dropped (runs in
+foreground, until Tmux server has no sessions)
+
+Supervisor attaches to Tmux as control mode client and is notified when command of
+any sshm pane changes, so panes are not polled. Dropped connections (like "Broken pipe"
+or "closed by remote host", not closed by user) are started again with the same
+connection type and identity. Attempts use jittered exponential backoff, and hosts
+failing TMUX_RECONNECT_BREAKER_FAILURES times in row are not retried for
+TMUX_RECONNECT_BREAKER_COOLDOWN seconds.
+
+\b
+Start it from Tmux, for example:
+tmux run-shell -b "sshm supervisor"
+"""
+
+# Parameters help:
+ATTEMPTS_HELP = "Attempts per pane, 0 for unlimited (default: TMUX_RECONNECT_ATTEMPTS)"
+VERBOSE_HELP = "Log reconnections to stderr"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="supervisor", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("-n", "--attempts", type=int, help=ATTEMPTS_HELP)
+@click.option("-v", "--verbose", is_flag=True, help=VERBOSE_HELP)
+@click.pass_context
+def supervisor(ctx, attempts, verbose):
+    if verbose:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    supervisor = Supervisor(Tmux(), max_attempts=attempts)
+    try:
+        lock = supervisor.lock()
+    except TMUXException as e:
+        click.echo(str(e), err=True)
+        ctx.exit(1)
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        supervisor.stop()
+    finally:
+        lock.close()
@@ -0,0 +1,54 @@
+import click
+
+from sshtmux.sshm import SSH_Config
+from sshtmux.sshm.ssh_topology import TOPOLOGY_FORMATS, export_topology
+
+# ------------------------------------------------------------------------------
+# COMMAND: topology
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Show ProxyJump topology (DOT/JSON)"
+LONG_HELP = """
+Show ProxyJump connections between hosts as graph
+
+Connection paths of all hosts are computed at once, from effective configuration
+(ProxyJump inherited from patterns and matches included). Multi-hop values and
+"user@host:port" forms are supported, and cycles are reported.
+
+\b
+dot  -> Graphviz digraph, edges go from jump host to reached host (default)
+json -> nodes (with full connection path), edges and cycles
+
+Graph can be limited with NAME regex, hosts on paths of matching hosts are kept.
+"""
+
+# Parameters help:
+FORMAT_HELP = "Output format: dot or json (default: dot)"
+NAME_HELP = "Filter for host names (regex)"
+OUTPUT_HELP = "Write output to file instead of STDOUT"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="topology", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    type=click.Choice(TOPOLOGY_FORMATS),
+    default="dot",
+    help=FORMAT_HELP,
+)
+@click.option("-n", "--name", "name_filter", help=NAME_HELP)
+@click.option("-o", "--output", type=click.File("w"), default="-", help=OUTPUT_HELP)
+@click.pass_context
+def topology(ctx, fmt, name_filter, output):
+    config: SSH_Config = ctx.obj
+
+    try:
+        graph = export_topology(config, output, fmt=fmt, name_filter=name_filter)
+    except BrokenPipeError:
+        ctx.exit(0)
+
+    for cycle in graph.cycles:
+        click.echo(f"ProxyJump cycle found: {' -> '.join(cycle + cycle[:1])}", err=True)
+    if graph.cycles:
+        ctx.exit(1)
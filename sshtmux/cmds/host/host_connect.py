@@ -0,0 +1,117 @@
+import time
+
+import click
+
+from sshtmux.core.config import settings
+from sshtmux.services.fanout import FanoutResult, FanoutScheduler
+from sshtmux.services.tmux import ConnectionType, Tmux
+from sshtmux.sshm import (
+    SSH_Config,
+    complete_identities,
+    complete_ssh_host_names,
+    expand_names,
+)
+
+# ------------------------------------------------------------------------------
+# COMMAND: host connect
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Open Tmux connections to many hosts"
+LONG_HELP = """
+Open Tmux windows with SSH connections to many hosts at once
+
+Command accepts single or multiple host names, and "r:" prefixed regex names
+(same as "host set"). Windows are created in sessions named by host groups (or in
+single SESSION), and connections are started in parallel. Hosts are grouped by ProxyJump
+bastions they are reached through, and each bastion gets limited number of simultaneous
+handshakes, while one multiplexed master connection per bastion is reused.
+
+\b
+Example: (sshm host connect r:^db- -i dba)
+"""
+
+IDENTITY_HELP = "Identity used for password authentication"
+SFTP_HELP = "Open SFTP instead of SSH connections"
+SESSION_HELP = "Open all windows in this Tmux session, instead of sessions per group"
+ATTACH_HELP = "Attach to Tmux when connections are opened"
+WORKERS_HELP = "Number of connections started at once (default: SSH_FANOUT_WORKERS)"
+BASTION_LIMIT_HELP = (
+    "Handshakes at once per bastion (default: SSH_FANOUT_BASTION_LIMIT)"
+)
+NO_MULTIPLEX_HELP = "Do not open shared master connections to bastions"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="connect", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option(
+    "-i", "--identity", help=IDENTITY_HELP, shell_complete=complete_identities
+)
+@click.option("--sftp", is_flag=True, help=SFTP_HELP)
+@click.option("-s", "--session", help=SESSION_HELP)
+@click.option("-a", "--attach", is_flag=True, help=ATTACH_HELP)
+@click.option("-w", "--workers", type=int, help=WORKERS_HELP)
+@click.option("-b", "--bastion-limit", type=int, help=BASTION_LIMIT_HELP)
+@click.option("--no-multiplex", is_flag=True, help=NO_MULTIPLEX_HELP)
+@click.argument(
+    "names", nargs=-1, required=True, shell_complete=complete_ssh_host_names
+)
+@click.pass_context
+def cmd(
+    ctx, names, identity, sftp, session, attach, workers, bastion_limit, no_multiplex
+):
+    config: SSH_Config = ctx.obj
+    start_time = time.perf_counter()
+
+    host_index = config.get_host_index()
+    hosts = []
+    for name in sorted(expand_names(names, list(host_index))):
+        if name not in host_index or host_index[name][0].type != "normal":
+            click.echo(
+                f"Cannot connect to host '{name}' as it is not defined in configuration!"
+            )
+            continue
+        hosts.append(host_index[name][0])
+
+    if settings.ssh.SSH_CUSTOM_COMMAND:
+        type_connection = ConnectionType.custom
+    elif sftp:
+        type_connection = (
+            ConnectionType.sftp_identity if identity else ConnectionType.sftp_normal
+        )
+    else:
+        type_connection = ConnectionType.identity if identity else ConnectionType.normal
+
+    scheduler = FanoutScheduler(
+        config,
+        workers=workers,
+        bastion_limit=bastion_limit,
+        multiplex=False if no_multiplex else None,
+    )
+
+    def print_result(result: FanoutResult) -> None:
+        if result.ok:
+            click.echo(f"Connected to: {result.task.host.name}")
+        else:
+            click.echo(
+                f"Cannot connect to '{result.task.host.name}': {result.error}", err=True
+            )
+
+    tmux = Tmux()
+    results = tmux.create_windows(
+        type_connection,
+        hosts,
+        scheduler,
+        identity=identity,
+        overwritten_group=session,
+        on_result=print_result,
+    )
+    failed = [r for r in results if not r.ok]
+
+    if not config.stdout:
+        elapsed = time.perf_counter() - start_time
+        click.echo(
+            f"Opened {len(results) - len(failed)} connection(s) in {elapsed:.3f}s, {len(failed)} failed"
+        )
+    if attach:
+        tmux.attach()
+    if failed:
+        ctx.exit(1)
@@ -1,3 +1,5 @@
+import time
+
 import click
 
 from sshtmux.sshm import SSH_Config, complete_ssh_host_names, expand_names
@@ -19,6 +21,7 @@ If multiple regex matches are defined, results from all individual matches will
 Regex NAMES example command: (sshm host delete r:^test_ r:_test$)
 -> will delete all hosts which names start with "test_" or end with "_test"
 
+All selected hosts are removed in memory, and configuration file is written only once.
 Confirmation dialog will appear to confirm if deletion is ok to continue.
 """
 
@@ -35,8 +38,10 @@ YES_HELP = "Skip confirmation and assume 'yes'. Be careful!"
 @click.pass_context
 def cmd(ctx, names, yes):
     config: SSH_Config = ctx.obj
+    start_time = time.perf_counter()
 
-    selected_hosts_list = expand_names(names, config.get_all_host_names())
+    host_index = config.get_host_index()
+    selected_hosts_list = expand_names(names, list(host_index))
     selected_hosts_list.sort()
     selected_hosts_list = [n.strip() for n in selected_hosts_list]
 
@@ -48,24 +53,23 @@ def cmd(ctx, names, yes):
         if not click.confirm("Are you sure?"):
             ctx.exit(1)
 
-    # When deleting multiple hosts, iterate over all of them
+    # When deleting multiple hosts, collect all of them and remove them at once
+    selected_hosts = []
     for name in selected_hosts_list:
-        if not config.check_host_by_name(name, False):
+        if name not in host_index:
             click.echo(
                 f"Cannot delete host '{name}' as it is not defined in configuration!"
             )
             continue
 
-        found_host, found_group = config.get_host_by_name(name)
-
-        if found_host.type == "normal":
-            found_group.hosts.remove(found_host)
-        elif found_host.type == "match" or found_host.type == "global_match":
-            found_group.matches.remove(found_host)
-        else:
-            found_group.patterns.remove(found_host)
+        selected_hosts.append(host_index[name])
 
         if not config.stdout:
             click.echo(f"Deleted host: {name}")
 
+    config.remove_hosts(selected_hosts)
     config.generate_ssh_config().write_out()
+
+    if not config.stdout:
+        elapsed = time.perf_counter() - start_time
+        click.echo(f"Deleted {len(selected_hosts)} host(s) in {elapsed:.3f}s")
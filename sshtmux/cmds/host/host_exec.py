@@ -0,0 +1,95 @@
+import threading
+import time
+
+import click
+
+from sshtmux.services.fanout import FanoutResult, FanoutScheduler, run_command
+from sshtmux.sshm import SSH_Config, complete_ssh_host_names, expand_names
+
+# ------------------------------------------------------------------------------
+# COMMAND: host exec
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Run command on many hosts in parallel"
+LONG_HELP = """
+Run command on many hosts in parallel (non-interactive SSH)
+
+Command accepts single or multiple host names, and "r:" prefixed regex names
+(same as "host set"). Hosts are grouped by ProxyJump bastions they are reached through,
+and each bastion gets limited number of simultaneous connections. One multiplexed
+master connection is opened per bastion and reused by all hosts behind it.
+
+Output lines are prefixed with host name, and printed as hosts finish.
+
+\b
+Example: (sshm host exec r:^web- -c "uptime")
+"""
+
+COMMAND_HELP = "Command to run on hosts"
+WORKERS_HELP = "Number of hosts processed at once (default: SSH_FANOUT_WORKERS)"
+BASTION_LIMIT_HELP = (
+    "Connections at once per bastion (default: SSH_FANOUT_BASTION_LIMIT)"
+)
+NO_MULTIPLEX_HELP = "Do not open shared master connections to bastions"
+TIMEOUT_HELP = "Timeout of command on single host in seconds"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="exec", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("-c", "--command", required=True, help=COMMAND_HELP)
+@click.option("-w", "--workers", type=int, help=WORKERS_HELP)
+@click.option("-b", "--bastion-limit", type=int, help=BASTION_LIMIT_HELP)
+@click.option("--no-multiplex", is_flag=True, help=NO_MULTIPLEX_HELP)
+@click.option("-t", "--timeout", type=float, help=TIMEOUT_HELP)
+@click.argument(
+    "names", nargs=-1, required=True, shell_complete=complete_ssh_host_names
+)
+@click.pass_context
+def cmd(ctx, names, command, workers, bastion_limit, no_multiplex, timeout):
+    config: SSH_Config = ctx.obj
+    start_time = time.perf_counter()
+
+    host_index = config.get_host_index()
+    hosts = []
+    for name in sorted(expand_names(names, list(host_index))):
+        if name not in host_index or host_index[name][0].type != "normal":
+            click.echo(
+                f"Cannot run on host '{name}' as it is not defined in configuration!"
+            )
+            continue
+        hosts.append(host_index[name][0])
+
+    scheduler = FanoutScheduler(
+        config,
+        workers=workers,
+        bastion_limit=bastion_limit,
+        multiplex=False if no_multiplex else None,
+    )
+    output_lock = threading.Lock()
+
+    def print_result(result: FanoutResult) -> None:
+        name = result.task.host.name
+        with output_lock:
+            if not result.ok:
+                click.echo(f"{name}: ERROR {result.error}", err=True)
+                return
+            process = result.value
+            for line in process.stdout.splitlines():
+                click.echo(f"{name}: {line}")
+            for line in process.stderr.splitlines():
+                click.echo(f"{name}: {line}", err=True)
+            if process.returncode != 0:
+                click.echo(f"{name}: exit code {process.returncode}", err=True)
+
+    results = scheduler.fanout(
+        hosts, lambda task: run_command(task, command, timeout), print_result
+    )
+    failed = [r for r in results if not r.ok or r.value.returncode != 0]
+
+    if not config.stdout:
+        elapsed = time.perf_counter() - start_time
+        click.echo(
+            f"Ran on {len(results)} host(s) in {elapsed:.3f}s, {len(failed)} failed",
+            err=True,
+        )
+    if failed:
+        ctx.exit(1)
@@ -1,4 +1,5 @@
-from typing import List
+import json
+from typing import Iterable, List
 
 import click
 from rich import box
@@ -6,6 +7,8 @@ from rich.console import Console
 from rich.table import Table
 
 from sshtmux.sshm import SSH_Config, SSH_Host
+from sshtmux.sshm.ssh_host import InheritedParams
+from sshtmux.sshm.ssh_keywords import keyword_id
 
 console = Console()
 
@@ -21,28 +24,112 @@ Will display also usually not visible "INHERITANCE" of parameters trough "PATTER
 which pattern parameter for given host would be applied (inherited).
 
 Normal output will try to show only most important information about listed hosts, while if requested,
-VERBOSE option will try to show ALL defined/inherited parameters for all listed hosts.
+VERBOSE option will try to show ALL defined/inherited parameters for all listed hosts (parameters
+inherited from "Match" blocks are shown only then, as evaluating them can run "Match exec" commands).
 Alternatively for details on only single host, use "sshm host show" command.
 
 Host list can be limited with filters, to only show specific hosts that match NAME regex or GROUP regex.
 When both NAME and GROUP regex are defined, output must satisfy both filters.
+
+For very large configurations, or when piping into other tools, use OUTPUT other than "table".
+Rows are then printed as soon as they are produced, without measuring the whole list first:
+
+\b
+chunked -> tables of CHUNK-SIZE rows each (verbose columns are computed per table)
+tsv     -> tab separated values with a header line
+ndjson  -> one JSON document per host
 """
 
 # Parameters help:
 GROUP_HELP = "Filter for host groups (regex)"
 NAME_HELP = "Filter for host names (regex)"
 VERBOSE_HELP = "Show verbose info (all parameters)"
+OUTPUT_HELP = "Output format: table, chunked, tsv or ndjson (default: table)"
+CHUNK_HELP = "Number of rows printed at once in streaming outputs (default: 500)"
 # ------------------------------------------------------------------------------
 
+OUTPUT_FORMATS = ["table", "chunked", "tsv", "ndjson"]
+
+# This lists define host properties and which parameters will be displayed
+HOST_PROPS = ["name", "group", "type"]
+HOST_PARAMS = ["hostname", "user"]
+
+
+def _table_cell(host: SSH_Host, param: str, matches: bool = True) -> str:
+    """
+    Render single table cell for host parameter, direct params have precedence
+    over inherited ones, which are marked with pattern they are inherited from.
+    Without "matches", only parameters inherited from patterns are shown, so
+    "Match" blocks are not evaluated
+    """
+    if param in host.params:
+        # Handle direct params, and handle if its a list or string
+        if isinstance(host.params[param], list):
+            return "\n".join(host.params[param])
+        return host.params[param]
+
+    # Handle inherited params (only valid for "normal" hosts)
+    inherited = host.inherited_params
+    if not matches and isinstance(inherited, InheritedParams):
+        inherited = inherited.patterns
+    for pattern, i_params in inherited:
+        if param in i_params:
+            if isinstance(i_params[param], list):
+                return "\n".join([f"{val}  ({pattern})" for val in i_params[param]])
+            return f"[yellow]{i_params[param]}  ({pattern})[/]"
+    return ""
+
+
+def _plain_value(host: SSH_Host, param: str) -> str:
+    """
+    Return host parameter value (direct or inherited) without any markup
+    """
+    value = host.params.get(param)
+    if value is None:
+        for _, i_params in host.inherited_params:
+            if param in i_params:
+                value = i_params[param]
+                break
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ",".join(value)
+    return value
+
+
+def _tsv_escape(value: str) -> str:
+    return value.replace("\t", " ").replace("\n", " ")
+
+
+def _collect_params(hosts: Iterable[SSH_Host]) -> List[str]:
+    params = list(HOST_PARAMS)
+    # Keywords are case-insensitive, so each one is shown in single column
+    seen = {keyword_id(param) for param in params}
+    for host in hosts:
+        for i_params in host.params:
+            if keyword_id(i_params) not in seen:
+                seen.add(keyword_id(i_params))
+                params.append(i_params)
+    return params
+
+
+def _render_table(
+    hosts: List[SSH_Host], params: List[str], matches: bool = True
+) -> Table:
+    header = HOST_PROPS + ([f"param:{p}" for p in params])
+    table = Table(*header, box=box.SQUARE, style="gray35")
+
+    for host in hosts:
+        row = [getattr(host, prop) for prop in HOST_PROPS] + [
+            _table_cell(host, table_param, matches) for table_param in params
+        ]
+        table.add_row(*row) if host.type == "normal" else table.add_row(
+            *row, style="cyan"
+        )
+    return table
 
-@click.command(name="list", short_help=SHORT_HELP, help=LONG_HELP)
-@click.option("-g", "--group", "group_filter", help=GROUP_HELP)
-@click.option("-n", "--name", "name_filter", help=NAME_HELP)
-@click.option("-v", "--verbose", is_flag=True, help=VERBOSE_HELP)
-@click.pass_context
-def cmd(ctx, group_filter, name_filter, verbose):
-    config: SSH_Config = ctx.obj
 
+def _print_table(config: SSH_Config, group_filter, name_filter, verbose, ctx):
     # Filter out groups and hosts if filters are defined via CLI
     filtered_groups = config.filter_config(group_filter, name_filter)
 
@@ -50,61 +137,106 @@ def cmd(ctx, group_filter, name_filter, verbose):
         click.echo("No host is matching any given filter!")
         ctx.exit(1)
 
-    # This lists define host properties and which parameters will be displayed
-    host_props = ["name", "group", "type"]
-    params = ["hostname", "user"]
+    hosts = [h for group in filtered_groups for h in group.iter_all_hosts()]
 
     # If output is verbose, we need to find all parameters, and add them to params list
-    if verbose:
-        flat_config: List[SSH_Host] = []
-        for group in filtered_groups:
-            for h in group.all_hosts:
-                flat_config.append(h)
-        for host in flat_config:
-            for i_params in host.params:
-                if i_params not in params:
-                    params.append(i_params)
-
-    header = host_props + ([f"param:{p}" for p in params])
-    table = Table(*header, box=box.SQUARE, style="gray35")
+    # ("Match" blocks are evaluated only then, they can run "Match exec" commands)
+    params = _collect_params(hosts) if verbose else HOST_PARAMS
+    console.print(_render_table(hosts, params, matches=verbose))
+
+
+def _stream_chunked(hosts: Iterable[SSH_Host], verbose: bool, chunk_size: int) -> int:
+    count = 0
+    chunk: List[SSH_Host] = []
+    for host in hosts:
+        chunk.append(host)
+        count += 1
+        if len(chunk) >= chunk_size:
+            params = _collect_params(chunk) if verbose else HOST_PARAMS
+            console.print(_render_table(chunk, params))
+            chunk = []
+    if chunk:
+        params = _collect_params(chunk) if verbose else HOST_PARAMS
+        console.print(_render_table(chunk, params))
+    return count
+
+
+def _stream_lines(
+    hosts: Iterable[SSH_Host], output: str, verbose: bool, chunk_size: int
+) -> int:
+    stdout = click.get_text_stream("stdout")
+    count = 0
+    lines: List[str] = []
+
+    if output == "tsv":
+        header = HOST_PROPS + HOST_PARAMS + (["params"] if verbose else [])
+        lines.append("\t".join(header))
+
+    for host in hosts:
+        count += 1
+        if output == "tsv":
+            row = [getattr(host, prop) for prop in HOST_PROPS] + [
+                _plain_value(host, p) for p in HOST_PARAMS
+            ]
+            if verbose:
+                row.append(
+                    ";".join(
+                        f"{k}={_plain_value(host, k)}" for k in host.get_all_params()
+                    )
+                )
+            lines.append("\t".join(_tsv_escape(c) for c in row))
+        else:
+            doc = {prop: getattr(host, prop) for prop in HOST_PROPS}
+            doc.update({p: _plain_value(host, p) for p in HOST_PARAMS})
+            if verbose:
+                doc["info"] = host.info
+                doc["params"] = host.params
+                # Match blocks are added to inherited params when they are read
+                doc["inherited_params"] = list(host.inherited_params)
+            lines.append(json.dumps(doc))
+
+        if len(lines) >= chunk_size:
+            stdout.write("\n".join(lines) + "\n")
+            stdout.flush()
+            lines = []
+
+    if lines:
+        stdout.write("\n".join(lines) + "\n")
+        stdout.flush()
+    return count
+
+
+@click.command(name="list", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("-g", "--group", "group_filter", help=GROUP_HELP)
+@click.option("-n", "--name", "name_filter", help=NAME_HELP)
+@click.option("-v", "--verbose", is_flag=True, help=VERBOSE_HELP)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="table",
+    help=OUTPUT_HELP,
+)
+@click.option("--chunk-size", type=click.IntRange(min=1), default=500, help=CHUNK_HELP)
+@click.pass_context
+def cmd(ctx, group_filter, name_filter, verbose, output, chunk_size):
+    config: SSH_Config = ctx.obj
 
-    # Start adding rows
-    for group in filtered_groups:
-        # Iterate trough hosts and patters
-        for host in group.all_hosts:
-            host_params = []
-            # Go trough list of all params we know are available across current host list
-            for table_param in params:
-                if table_param in host.params:
-                    # Handle direct params, and handle if its a list or string
-                    if isinstance(host.params[table_param], list):
-                        host_params.append("\n".join(host.params[table_param]))
-                    else:
-                        host_params.append(host.params[table_param])
-                else:
-                    # Handle inherited params (only valid for "normal" hosts)
-                    if host.inherited_params:
-                        for pattern, i_params in host.inherited_params:
-                            if table_param in i_params:
-                                if isinstance(i_params[table_param], list):
-                                    table_param = "\n".join(
-                                        [
-                                            f"{val}  ({pattern})"
-                                            for val in i_params[table_param]
-                                        ]
-                                    )
-                                    host_params.append(table_param)
-                                else:
-                                    host_params.append(
-                                        f"[yellow]{i_params[table_param]}  ({pattern})[/]"
-                                    )
-                            else:
-                                host_params.append("")
-                    else:
-                        host_params.append("")
-            row = [host.__dict__[prop] for prop in host_props] + host_params
-            table.add_row(*row) if host.type == "normal" else table.add_row(
-                *row, style="cyan"
-            )
-
-    console.print(table)
+    if output == "table":
+        _print_table(config, group_filter, name_filter, verbose, ctx)
+        return
+
+    # Streaming outputs, hosts are taken lazily from configuration one by one
+    hosts = (host for _, host in config.iter_hosts(group_filter, name_filter))
+    try:
+        if output == "chunked":
+            count = _stream_chunked(hosts, verbose, chunk_size)
+        else:
+            count = _stream_lines(hosts, output, verbose, chunk_size)
+    except BrokenPipeError:
+        # Output consumer (like "head") closed the pipe, nothing more to print
+        ctx.exit(0)
+
+    if not count:
+        click.echo("No host is matching any given filter!", err=True)
+        ctx.exit(1)
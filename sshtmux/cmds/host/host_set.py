@@ -1,22 +1,35 @@
+import time
+from typing import List, Tuple
+
 import click
 
 from sshtmux.sshm import (
     SSH_Config,
     SSH_Group,
+    SSH_Host,
     complete_params,
     complete_ssh_group_names,
     complete_ssh_host_names,
+    expand_names,
 )
 from sshtmux.sshm.sshutils import validate_ssh_params, validate_unique_param
 
 # ------------------------------------------------------------------------------
 # COMMAND: host set
 # ------------------------------------------------------------------------------
-SHORT_HELP = "Set/Change host configuration"
+SHORT_HELP = "Set/Change host(s) configuration"
 LONG_HELP = """
 Set/Change host definitions and parameters
 
+Command accepts single or multiple host names to change, all changes are applied in memory
+and configuration file is written only once.
 If autocompletion is enabled, command will also offer current configured hosts for TAB completion.
+Alternatively when "NAME" is specified with "r:" prefix, then part after ":" is used as regex match
+to find all hosts that match that pattern, and will expand target host list accordingly.
+
+\b
+Regex NAMES example command: (sshm host set r:^lab- -p User admin)
+-> will set "User admin" on all hosts which names start with "lab-"
 """
 
 INFO_HELP = "Set host info, can be set multiple times, or set to empty value to clear it (example: -i '')"
@@ -53,24 +66,36 @@ FORCE_HELP = "Allows during group host group change, to move host(s) to group th
     shell_complete=complete_ssh_group_names,
 )
 @click.option("-f", "--force", is_flag=True, help=FORCE_HELP)
-@click.argument("name", nargs=1, required=True, shell_complete=complete_ssh_host_names)
+@click.argument(
+    "names", nargs=-1, required=True, shell_complete=complete_ssh_host_names
+)
 @click.pass_context
-def cmd(ctx, name, info, parameter, remove_parameter, target_group_name, force):
+def cmd(ctx, names, info, parameter, remove_parameter, target_group_name, force):
     config: SSH_Config = ctx.obj
+    start_time = time.perf_counter()
 
-    if not config.check_host_by_name(name, False):
-        click.echo(
-            f"Cannot set anything on host '{name}' as it is not defined in configuration!"
-        )
-        ctx.exit(1)
+    host_index = config.get_host_index()
+    selected_hosts_list = expand_names(names, list(host_index))
+    selected_hosts_list.sort()
+
+    selected_hosts: List[Tuple[SSH_Host, SSH_Group]] = []
+    for name in selected_hosts_list:
+        if name not in host_index:
+            click.echo(
+                f"Cannot set anything on host '{name}' as it is not defined in configuration!"
+            )
+            ctx.exit(1)
+        selected_hosts.append(host_index[name])
 
-    found_host, found_group = config.get_host_by_name(name)
+    if not selected_hosts:
+        click.echo("No host is matching given names!")
+        ctx.exit(1)
 
     if target_group_name:
         target_group_exists = config.check_group_by_name(target_group_name)
         if not target_group_exists and not force:
             click.echo(
-                f"Cannot move host '{name}' to group '{target_group_name}' which does not exist!"
+                f"Cannot move host(s) to group '{target_group_name}' which does not exist!"
             )
             click.echo(
                 "Consider using --force to automatically create target group, or create it manually first."
@@ -82,27 +107,37 @@ def cmd(ctx, name, info, parameter, remove_parameter, target_group_name, force):
         else:
             target_group = config.get_group_by_name(target_group_name)
 
-        config.move_host_to_group(found_host, found_group, target_group)
+    # Parameters are the same for all hosts, so they are validated only once
+    valid_ssh_params = validate_ssh_params(parameter)
 
-    if info:
-        if len(info[0]) > 0:
-            found_host.info = found_host.info + list(info)
-        else:
-            found_host.info = []
+    for found_host, found_group in selected_hosts:
+        if target_group_name and found_group is not target_group:
+            config.move_host_to_group(found_host, found_group, target_group)
 
-    valid_ssh_params = validate_ssh_params(parameter)
-    validate_unique_param(found_host.params, valid_ssh_params)
+        if info:
+            if len(info[0]) > 0:
+                found_host.info = found_host.info + list(info)
+            else:
+                found_host.info = []
 
-    for param, value in valid_ssh_params.items():
-        found_host.params[param] = value
+        validate_unique_param(found_host.params, valid_ssh_params)
 
-    for param in remove_parameter:
-        try:
-            del found_host.params[param]
-        except KeyError:
-            click.echo(f"Parameter: {param} not found to be removed. Ignoring...")
+        for param, value in valid_ssh_params.items():
+            found_host.params[param] = value
 
-    if not config.stdout:
-        click.echo(f"Modified host: {name}")
+        for param in remove_parameter:
+            try:
+                del found_host.params[param]
+            except KeyError:
+                click.echo(
+                    f"Parameter: {param} not found to be removed on host '{found_host.name}'. Ignoring..."
+                )
+
+        if not config.stdout:
+            click.echo(f"Modified host: {found_host.name}")
 
     config.generate_ssh_config().write_out()
+
+    if not config.stdout:
+        elapsed = time.perf_counter() - start_time
+        click.echo(f"Modified {len(selected_hosts)} host(s) in {elapsed:.3f}s")
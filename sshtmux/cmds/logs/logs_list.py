@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from sshtmux import logwriter
+from sshtmux.services.pane_logs import host_names, host_segments
+
+HELP = "List hosts with logged output"
+
+
+def _size(value: int) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if value < 1024:
+            return f"{value:.0f}{unit}"
+        value /= 1024
+    return f"{value:.1f}TB"
+
+
+@click.command(name="list", short_help=HELP, help=HELP)
+def cmd():
+    console = Console()
+    table = Table(box=box.SQUARE, style="gray35")
+    table.add_column("Host")
+    table.add_column("Segments")
+    table.add_column("Size")
+    table.add_column("Output")
+    table.add_column("Last write")
+    for host in host_names():
+        segments = host_segments(host)
+        if not segments:
+            continue
+        stored = sum(segment.stat().st_size for segment in segments)
+        output = 0
+        for segment in segments:
+            _, meta = logwriter.TrigramIndex.load(logwriter.index_path(str(segment)))
+            output += meta["bytes"] if meta else 0
+        last = datetime.fromtimestamp(segments[-1].stat().st_mtime)
+        table.add_row(
+            host,
+            str(len(segments)),
+            _size(stored),
+            _size(output),
+            last.isoformat(sep=" ", timespec="seconds"),
+        )
+    console.print(table)
@@ -0,0 +1,69 @@
+import re
+import time
+
+import click
+
+from sshtmux.services.pane_logs import search_logs
+
+# ------------------------------------------------------------------------------
+# COMMAND: logs search
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Search logged output of connections"
+LONG_HELP = """
+Search output of logged connections (TMUX_PANE_LOGGING setting) with regex
+
+Logs are stored per host in compressed segments. Every segment has index of trigrams
+of words it contains, so only segments which can contain text required by PATTERN
+are decompressed. Hosts are selected by names or "r:" prefixed regex (same as
+"host set"), all hosts are searched by default.
+
+\b
+Example: (sshm logs search -i "connection (reset|refused)" --host r:^db-)
+"""
+
+HOST_HELP = "Search only logs of this host (can be used many times)"
+IGNORE_CASE_HELP = "Case insensitive search"
+LIMIT_HELP = "Stop after this number of matching lines"
+COUNT_HELP = "Only print number of matching lines per host"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="search", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("--host", "hosts", multiple=True, help=HOST_HELP)
+@click.option("-i", "--ignore-case", is_flag=True, help=IGNORE_CASE_HELP)
+@click.option("-l", "--limit", type=int, help=LIMIT_HELP)
+@click.option("-c", "--count", is_flag=True, help=COUNT_HELP)
+@click.argument("pattern")
+@click.pass_context
+def cmd(ctx, pattern, hosts, ignore_case, limit, count):
+    start_time = time.perf_counter()
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        click.echo(f"Invalid pattern: {e}", err=True)
+        ctx.exit(1)
+
+    stats = {}
+    counts = {}
+    found = 0
+    for hit in search_logs(pattern, list(hosts), ignore_case, stats):
+        found += 1
+        if count:
+            counts[hit.host] = counts.get(hit.host, 0) + 1
+        else:
+            segment = hit.segment.name.split(".log")[0]
+            click.echo(f"{hit.host} {segment}:{hit.line_number}: {hit.text}")
+        if limit and found >= limit:
+            break
+
+    for host, host_count in counts.items():
+        click.echo(f"{host}: {host_count}")
+    if not ctx.obj.stdout:
+        elapsed = time.perf_counter() - start_time
+        click.echo(
+            f"Found {found} line(s), searched {stats.get('searched', 0)} of "
+            f"{stats.get('segments', 0)} segment(s) in {elapsed:.3f}s",
+            err=True,
+        )
+    if not found:
+        ctx.exit(1)
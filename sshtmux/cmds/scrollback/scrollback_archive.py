@@ -0,0 +1,51 @@
+import time
+
+import click
+
+from sshtmux.services.scrollback import ScrollbackArchive, list_panes
+from sshtmux.services.tmux import Tmux
+
+# ------------------------------------------------------------------------------
+# COMMAND: scrollback archive
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Archive scrollback of idle panes"
+LONG_HELP = """
+Move scrollback of idle panes out of Tmux, to keep memory of Tmux server bounded
+
+History of panes whose window had no activity for TMUX_ARCHIVE_IDLE seconds (and
+has at least TMUX_ARCHIVE_MIN_LINES lines) is appended to compressed file in
+SSHTMUX_SCROLLBACK_PATH and cleared in Tmux. Visible part of pane is kept. Archived
+history is shown again with "sshm scrollback show".
+
+\b
+Run it periodically, for example from Tmux:
+tmux run-shell -b "sshm scrollback archive --watch 300"
+"""
+
+# Parameters help:
+IDLE_HELP = (
+    "Seconds without activity after which pane is archived (default: TMUX_ARCHIVE_IDLE)"
+)
+MIN_LINES_HELP = "Archive only panes with this number of history lines (default: TMUX_ARCHIVE_MIN_LINES)"
+WATCH_HELP = "Keep running and archive every SECONDS (until Tmux server has no panes)"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="archive", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("--idle", type=int, help=IDLE_HELP)
+@click.option("--min-lines", type=int, help=MIN_LINES_HELP)
+@click.option("--watch", type=int, metavar="SECONDS", help=WATCH_HELP)
+def cmd(idle, min_lines, watch):
+    tmux = Tmux()
+    archive = ScrollbackArchive(tmux, idle=idle, min_lines=min_lines)
+    try:
+        while True:
+            archived = archive.run()
+            lines = sum(pane.history for pane in archived)
+            if archived or not watch:
+                click.echo(f"Archived {lines} line(s) of {len(archived)} pane(s)")
+            if not watch or not list_panes(tmux):
+                return
+            time.sleep(watch)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,53 @@
+import shlex
+import sys
+
+import click
+
+from sshtmux.services.scrollback import find_pane, pane_history
+from sshtmux.services.tmux import Tmux
+
+# ------------------------------------------------------------------------------
+# COMMAND: scrollback show
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Show whole history of pane (archived included)"
+LONG_HELP = """
+Show whole history of pane, archived lines first, then lines still in Tmux
+
+PANE is pane id ("%3") or "session:window.pane".
+
+\b
+Example: (sshm scrollback show web:2.1 --window)
+"""
+
+# Parameters help:
+WINDOW_HELP = "Open history in new Tmux window (in pager) instead of printing it"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="show", short_help=SHORT_HELP, help=LONG_HELP)
+@click.argument("pane")
+@click.option("-w", "--window", is_flag=True, help=WINDOW_HELP)
+@click.pass_context
+def cmd(ctx, pane, window):
+    tmux = Tmux()
+    found = find_pane(tmux, pane)
+    if not found:
+        click.echo(f"Pane not found: {pane}", err=True)
+        ctx.exit(1)
+
+    if window:
+        show = [sys.executable, "-m", "sshtmux", "scrollback", "show", found.pane_id]
+        tmux.server.cmd(
+            "new-window",
+            "-t",
+            f"={found.session}:",
+            "-n",
+            f"{found.window_name}-history",
+            f"{shlex.join(show)} | less +G",
+        )
+        return
+    try:
+        for line in pane_history(tmux, found):
+            click.echo(line)
+    except BrokenPipeError:
+        ctx.exit(0)
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from sshtmux.core.config import settings
+from sshtmux.exceptions import TMUXException
+from sshtmux.services.sessions import load_layout
+
+HELP = "List saved Tmux sessions layouts"
+
+
+@click.command(name="list", short_help=HELP, help=HELP)
+def cmd():
+    console = Console()
+    table = Table(box=box.SQUARE, style="gray35")
+    table.add_column("Snapshot")
+    table.add_column("Saved at")
+    table.add_column("Sessions")
+    table.add_column("Windows")
+    sessions_path = Path(settings.sshtmux.SSHTMUX_SESSIONS_PATH).expanduser()
+    for path in sorted(sessions_path.glob("*.json")):
+        try:
+            layout = load_layout(path)
+        except TMUXException:
+            continue
+        table.add_row(
+            path.stem,
+            layout.saved_at,
+            ", ".join(layout.sessions),
+            str(len(layout.windows)),
+        )
+    console.print(table)
@@ -0,0 +1,86 @@
+import time
+
+import click
+
+from sshtmux.exceptions import TMUXException
+from sshtmux.services.fanout import FanoutResult, FanoutScheduler
+from sshtmux.services.sessions import (
+    DEFAULT_SNAPSHOT,
+    load_layout,
+    restore_layout,
+    snapshot_file,
+)
+from sshtmux.services.tmux import Tmux
+from sshtmux.sshm import SSH_Config
+
+# ------------------------------------------------------------------------------
+# COMMAND: session restore
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Restore saved Tmux sessions layout"
+LONG_HELP = """
+Restore Tmux sessions layout saved with "sshm session save"
+
+Missing sessions and windows are created with one Tmux call per session (windows that
+already exist, by session and window name, are kept), then connections of created windows
+are started in parallel, same as "sshm host connect" (bastion limits and multiplexing).
+
+\b
+Example: (sshm session restore work --attach)
+"""
+
+ATTACH_HELP = "Attach to Tmux when sessions are restored"
+WORKERS_HELP = "Number of connections started at once (default: SSH_FANOUT_WORKERS)"
+BASTION_LIMIT_HELP = (
+    "Handshakes at once per bastion (default: SSH_FANOUT_BASTION_LIMIT)"
+)
+NO_MULTIPLEX_HELP = "Do not open shared master connections to bastions"
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="restore", short_help=SHORT_HELP, help=LONG_HELP)
+@click.option("-a", "--attach", is_flag=True, help=ATTACH_HELP)
+@click.option("-w", "--workers", type=int, help=WORKERS_HELP)
+@click.option("-b", "--bastion-limit", type=int, help=BASTION_LIMIT_HELP)
+@click.option("--no-multiplex", is_flag=True, help=NO_MULTIPLEX_HELP)
+@click.argument("name", default=DEFAULT_SNAPSHOT)
+@click.pass_context
+def cmd(ctx, name, attach, workers, bastion_limit, no_multiplex):
+    config: SSH_Config = ctx.obj
+    start_time = time.perf_counter()
+
+    try:
+        layout = load_layout(snapshot_file(name))
+    except TMUXException as e:
+        click.echo(str(e), err=True)
+        ctx.exit(1)
+
+    scheduler = FanoutScheduler(
+        config,
+        workers=workers,
+        bastion_limit=bastion_limit,
+        multiplex=False if no_multiplex else None,
+    )
+
+    def print_result(result: FanoutResult) -> None:
+        window, _ = result.task.context
+        if result.ok:
+            click.echo(f"Connected to: {result.task.host.name} ({window.session})")
+        else:
+            click.echo(
+                f"Cannot connect to '{result.task.host.name}': {result.error}", err=True
+            )
+
+    tmux = Tmux()
+    created, results = restore_layout(tmux, config, layout, scheduler, print_result)
+    failed = [r for r in results if not r.ok]
+
+    if not config.stdout:
+        elapsed = time.perf_counter() - start_time
+        click.echo(
+            f"Restored {created} window(s) and {len(results) - len(failed)} "
+            f"connection(s) in {elapsed:.3f}s, {len(failed)} failed"
+        )
+    if attach:
+        tmux.attach()
+    if failed:
+        ctx.exit(1)
@@ -0,0 +1,42 @@
+import click
+
+from sshtmux.services.sessions import (
+    DEFAULT_SNAPSHOT,
+    capture_layout,
+    save_layout,
+    snapshot_file,
+)
+from sshtmux.services.tmux import Tmux
+
+# ------------------------------------------------------------------------------
+# COMMAND: session save
+# ------------------------------------------------------------------------------
+SHORT_HELP = "Save Tmux sessions layout"
+LONG_HELP = """
+Save layout of all Tmux sessions (windows, their hosts, connection types and identities)
+
+Snapshot is saved as NAME in SSHTMUX_SESSIONS_PATH (or to given file path), and can be
+restored with "sshm session restore". Passwords are never saved, only identity names.
+
+\b
+Example: (sshm session save work)
+"""
+# ------------------------------------------------------------------------------
+
+
+@click.command(name="save", short_help=SHORT_HELP, help=LONG_HELP)
+@click.argument("name", default=DEFAULT_SNAPSHOT)
+@click.pass_context
+def cmd(ctx, name):
+    layout = capture_layout(Tmux())
+    if not layout.windows:
+        click.echo("There are no Tmux sessions to save!", err=True)
+        ctx.exit(1)
+
+    path = snapshot_file(name)
+    save_layout(layout, path)
+    hosts = [window for window in layout.windows if window.host]
+    click.echo(
+        f"Saved {len(layout.sessions)} session(s), {len(layout.windows)} window(s) "
+        f"({len(hosts)} connection(s)) to: {path}"
+    )
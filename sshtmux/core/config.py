@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Literal
+from typing import List, Literal
 
 import click
 from pydantic import BaseModel
@@ -8,6 +8,7 @@ from pydantic_settings import BaseSettings
 USER_DIR = Path.home()
 SSHTMUX_BASEDIR = USER_DIR / ".config" / "sshtmux"
 T_Host_Style = Literal["panels", "card", "simple", "table", "table2", "json"]
+T_Log_Compression = Literal["gzip", "zstd"]
 FAST_CONNECTIONS_GROUP_NAME = "fast-connections"
 FAST_SESSIONS_NAME = "fast-session"
 SFTP_CLI = "sftp"
@@ -31,7 +32,12 @@ class SSHTMUX(Base):
     SSHTMUX_IDENTITY_KEY_FILE: str | None = str(SSHTMUX_BASEDIR / "identity.key")
     SSHTMUX_IDENTITY_PASSWORDS_FILE: str | None = str(SSHTMUX_BASEDIR / "identity.json")
     SSHTMUX_SNIPPETS_PATH: str | None = str(SSHTMUX_BASEDIR / "snippets")
+    SSHTMUX_SESSIONS_PATH: str | None = str(SSHTMUX_BASEDIR / "sessions")
+    SSHTMUX_LOGS_PATH: str | None = str(SSHTMUX_BASEDIR / "logs")
+    SSHTMUX_SCROLLBACK_PATH: str | None = str(SSHTMUX_BASEDIR / "scrollback")
     SSHTMUX_HOST_STYLE: T_Host_Style = "panels"
+    SSHTMUX_DAEMON_SOCKET: str = str(SSHTMUX_BASEDIR / "daemon.sock")
+    SSHTMUX_BREAKER_FILE: str = str(SSHTMUX_BASEDIR / "breaker.json")
 
 
 class TMUX(Base):
@@ -39,6 +45,30 @@ class TMUX(Base):
     TMUX_SOCKET_NAME: str | None = f"sshtmux_{USER_DIR.name}"
     TMUX_SOCKET_PATH: str | None = None
     TMUX_TIMEOUT_COMMANDS: int = 10
+    TMUX_RECONNECT_BACKOFF: float = 1.0
+    TMUX_RECONNECT_BACKOFF_MAX: float = 60.0
+    TMUX_RECONNECT_ATTEMPTS: int = 20
+    TMUX_RECONNECT_BREAKER_FAILURES: int = 5
+    TMUX_RECONNECT_BREAKER_COOLDOWN: int = 300
+    TMUX_PANE_LOGGING: bool = False
+    TMUX_LOG_SEGMENT_SIZE: int = 8 * 1024 * 1024
+    TMUX_LOG_COMPRESSION: T_Log_Compression = "gzip"
+    TMUX_ARCHIVE_IDLE: int = 3600
+    TMUX_ARCHIVE_MIN_LINES: int = 1000
+
+
+class SSHHandshakeStage(BaseModel):
+    """
+    Prompt of SSH handshake, answered with response. Stage replaces default stage
+    with the same name (hostkey, otp, password, shell), other stages are checked
+    before default ones. Stage without response ends handshake
+    """
+
+    name: str
+    pattern: str = ""
+    response: str | None = None
+    timeout: float | None = None
+    hosts: List[str] = []
 
 
 class SSH(Base):
@@ -51,6 +81,17 @@ class SSH(Base):
     )
     SSH_VALIDATE_SSHCONFIG: str | bool = True
     SSH_CUSTOM_COMMAND: str | bool = False
+    SSH_MATCH_EXEC: bool = False
+    SSH_FANOUT_WORKERS: int = 32
+    SSH_FANOUT_BASTION_LIMIT: int = 8
+    SSH_FANOUT_MULTIPLEX: bool = True
+    SSH_FANOUT_CONTROL_PERSIST: int = 60
+    SSH_HANDSHAKE: List[SSHHandshakeStage] = []
+    SSH_RETRY_ATTEMPTS: int = 3
+    SSH_RETRY_BACKOFF: float = 1.0
+    SSH_RETRY_BACKOFF_MAX: float = 10.0
+    SSH_RETRY_BREAKER_FAILURES: int = 3
+    SSH_RETRY_BREAKER_COOLDOWN: int = 120
 
 
 class ConfigModel(BaseModel):
@@ -4,4 +4,10 @@ class TMUXException(Exception): ...
 class SSHException(Exception): ...
 
 
+class SSHUnreachableException(SSHException): ...
+
+
 class IdentityException(Exception): ...
+
+
+class DaemonException(Exception): ...
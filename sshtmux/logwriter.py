@@ -0,0 +1,306 @@
+"""
+Pane output writer, started by Tmux "pipe-pane" for every logged pane
+
+This file must only use standard library (zstandard is optional), as it is executed
+directly by path (not as part of sshtmux package), once for every pane, so it stays
+cheap to start and small in memory. Output (without terminal escape sequences) is
+written into compressed segments, rotated by size. When segment is closed, index
+of trigrams of its words is written next to it, so "sshm logs search" decompresses
+only segments which can contain searched text.
+
+Usage: python logwriter.py --dir DIR --pane PANE [--segment-size BYTES]
+                           [--compression gzip|zstd] [--flush SECONDS]
+"""
+
+import argparse
+import json
+import os
+import re
+import select
+import signal
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+SEGMENT_RE = re.compile(r"^(?P<name>.+)\.log(?P<suffix>\.gz|\.zst)$")
+
+INDEX_VERSION = 1
+# Trigrams of lowercase words (ASCII letters, digits and "_"), as bitmap
+TRIGRAM_CHARS = b"abcdefghijklmnopqrstuvwxyz0123456789_"
+TRIGRAM_CODES = {char: code for code, char in enumerate(TRIGRAM_CHARS)}
+TRIGRAM_COUNT = len(TRIGRAM_CHARS) ** 3
+WORD_RE = re.compile(rb"[a-z0-9_]{3,}")
+ANSI_RE = re.compile(
+    rb"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])"
+)
+MAX_PENDING = 64 * 1024
+
+
+def index_path(segment_path: str) -> str:
+    directory, name = os.path.split(segment_path)
+    return os.path.join(directory, name.split(".log")[0] + ".idx")
+
+
+def trigrams(text: bytes) -> set:
+    """
+    Trigrams of all words in (lowercase) text
+    """
+    return {
+        word[i : i + 3]
+        for word in set(WORD_RE.findall(text))
+        for i in range(len(word) - 2)
+    }
+
+
+def trigram_code(trigram: bytes) -> int:
+    size = len(TRIGRAM_CHARS)
+    return (
+        TRIGRAM_CODES[trigram[0]] * size * size
+        + TRIGRAM_CODES[trigram[1]] * size
+        + TRIGRAM_CODES[trigram[2]]
+    )
+
+
+class TrigramIndex:
+    """
+    Set of trigrams present in segment, exact (all possible trigrams fit in ~6KB)
+    """
+
+    def __init__(self, bits=None):
+        self.bits = bits if bits is not None else bytearray(TRIGRAM_COUNT // 8 + 1)
+
+    def add(self, trigram: bytes) -> None:
+        code = trigram_code(trigram)
+        self.bits[code >> 3] |= 1 << (code & 7)
+
+    def __contains__(self, trigram: bytes) -> bool:
+        code = trigram_code(trigram)
+        return bool(self.bits[code >> 3] & (1 << (code & 7)))
+
+    def dump(self, path: str, meta: dict) -> None:
+        header = dict(meta, version=INDEX_VERSION)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(json.dumps(header).encode() + b"\n")
+            out.write(zlib.compress(bytes(self.bits)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Return (index, metadata), or (None, None) when index is missing or not compatible
+        """
+        try:
+            with open(path, "rb") as fh:
+                header = json.loads(fh.readline())
+                if header.get("version") != INDEX_VERSION:
+                    return None, None
+                return cls(bytearray(zlib.decompress(fh.read()))), header
+        except (OSError, ValueError, zlib.error):
+            return None, None
+
+
+class _GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _decompressor(suffix: str):
+    if suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError("Module 'zstandard' is needed to read .zst segments")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+
+def read_segment(path: str, chunk_size: int = 256 * 1024):
+    """
+    Yield lines (bytes, without line ending) of segment. Segment which is still
+    written (or was not closed properly) is read up to its last flushed block
+    """
+    match = SEGMENT_RE.match(os.path.basename(path))
+    decompressor = _decompressor(match.group("suffix") if match else ".gz")
+    pending = b""
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            try:
+                data = decompressor.decompress(chunk)
+            except Exception:
+                # Truncated or damaged tail, keep what was read
+                break
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            yield from lines
+    if pending:
+        yield pending
+
+
+class Segment:
+    """Single compressed segment of pane output"""
+
+    def __init__(self, directory: str, pane: str, compression: str):
+        if compression == "zstd" and zstandard is None:
+            compression = "gzip"
+        # Names are ordered by start time (also segments rotated in the same second)
+        name = "{}-{}-{}".format(
+            datetime.now().strftime("%Y%m%dT%H%M%S.%f"),
+            pane.lstrip("%"),
+            uuid.uuid4().hex[:6],
+        )
+        self.path = os.path.join(directory, name + ".log" + SUFFIXES[compression])
+        self.file = open(self.path, "ab")
+        self.compressor = (
+            _ZstdCompressor() if compression == "zstd" else _GzipCompressor()
+        )
+        self.index = TrigramIndex()
+        self.size = 0
+        self.lines = 0
+        self.started = time.time()
+        self._pending = b""
+
+    def _tokenize(self, data: bytes) -> None:
+        # Only complete lines are tokenized, so words are not split between writes
+        data = self._pending + data
+        end = data.rfind(b"\n") + 1
+        if not end and len(data) > MAX_PENDING:
+            end = len(data)
+        self._pending = data[end:]
+        for trigram in trigrams(data[:end].lower()):
+            self.index.add(trigram)
+
+    def write(self, data: bytes) -> None:
+        self.file.write(self.compressor.compress(data))
+        self.size += len(data)
+        self.lines += data.count(b"\n")
+        self._tokenize(data)
+
+    def flush(self) -> None:
+        self.file.write(self.compressor.flush())
+        self.file.flush()
+
+    def close(self) -> None:
+        self._tokenize(b"\n")
+        self.file.write(self.compressor.finish())
+        self.file.close()
+        self.index.dump(
+            index_path(self.path),
+            {
+                "bytes": self.size,
+                "lines": self.lines,
+                "started": self.started,
+                "ended": time.time(),
+            },
+        )
+
+
+def clean_output(data: bytes, carry: bytes = b""):
+    """
+    Remove terminal escape sequences and carriage returns. Returns cleaned data
+    and incomplete escape sequence at its end (to be prepended to next data)
+    """
+    data = carry + data
+    carry = b""
+    start = data.rfind(b"\x1b")
+    if start != -1 and len(data) - start < 256 and not ANSI_RE.match(data, start):
+        data, carry = data[:start], data[start:]
+    return ANSI_RE.sub(b"", data).replace(b"\r", b""), carry
+
+
+def run(
+    fd: int,
+    directory: str,
+    pane: str,
+    segment_size: int,
+    compression: str,
+    flush_interval: float,
+) -> None:
+    os.makedirs(directory, exist_ok=True)
+    segment = None
+    carry = b""
+    try:
+        while True:
+            ready, _, _ = select.select([fd], [], [], flush_interval)
+            if not ready:
+                # Output is flushed when pane is quiet, so it can be searched
+                if segment:
+                    segment.flush()
+                continue
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            data, carry = clean_output(data, carry)
+            if not data:
+                continue
+            if segment is None:
+                segment = Segment(directory, pane, compression)
+            segment.write(data)
+            if segment.size >= segment_size:
+                segment.close()
+                segment = None
+    finally:
+        if segment:
+            segment.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Write pane output to compressed segments"
+    )
+    parser.add_argument("--dir", required=True)
+    parser.add_argument("--pane", default="")
+    parser.add_argument("--segment-size", type=int, default=8 * 1024 * 1024)
+    parser.add_argument("--compression", choices=list(SUFFIXES), default="gzip")
+    parser.add_argument("--flush", type=float, default=2.0)
+    args = parser.parse_args(argv)
+    # Segment is closed (and indexed) also when writer is terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGHUP, lambda *_: sys.exit(0))
+    try:
+        run(
+            sys.stdin.fileno(),
+            args.dir,
+            args.pane,
+            args.segment_size,
+            args.compression,
+            args.flush,
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,20 @@
 import click
 
-from .cmds import cmd_group, cmd_host, cmd_identity, cmd_snippets
+from .cmds import (
+    cmd_daemon,
+    cmd_export,
+    cmd_group,
+    cmd_host,
+    cmd_identity,
+    cmd_import,
+    cmd_logs,
+    cmd_scrollback,
+    cmd_search,
+    cmd_session,
+    cmd_snippets,
+    cmd_supervisor,
+    cmd_topology,
+)
 from .cmds.cmd_group import group_list
 from .cmds.cmd_host import host_list
 from .main_tui import SSHTui
@@ -31,6 +45,10 @@ STDOUT_HELP = "Send changed SSH config to STDOUT instead to original file, can b
 @click.version_option(VERSION, message="SSHTMUX (sshm) - Version: %(version)s")
 @click.pass_context
 def cli(ctx: click.core.Context, stdout: bool):
+    if isinstance(ctx.obj, SSH_Config):
+        # Configuration already parsed (command is served by "sshm daemon")
+        ctx.obj.stdout = stdout
+        return
     ctx.obj = SSH_Config(stdout=stdout).read().parse()
 
 
@@ -51,6 +69,15 @@ cli.add_command(cmd_host.ssh_host)
 cli.add_command(cmd_group.ssh_group)
 cli.add_command(cmd_identity.generate)
 cli.add_command(cmd_snippets.generate)
+cli.add_command(cmd_export.export)
+cli.add_command(cmd_import.import_cmd)
+cli.add_command(cmd_topology.topology)
+cli.add_command(cmd_session.session)
+cli.add_command(cmd_logs.logs)
+cli.add_command(cmd_search.search)
+cli.add_command(cmd_scrollback.scrollback)
+cli.add_command(cmd_daemon.daemon)
+cli.add_command(cmd_supervisor.supervisor)
 cli.add_command(tui_cmd)
 
 # Top level aliases (groups --> group list, hosts --> host list, etc..)
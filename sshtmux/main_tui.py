@@ -1,10 +1,13 @@
-from copy import deepcopy
-from typing import ClassVar
+import logging
+import os
+from copy import copy
+from typing import ClassVar, List
 
 from rich import box
 from rich.panel import Panel
 from rich.rule import Rule
 from rich.table import Table
+from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding, BindingType
 from textual.containers import Container, VerticalScroll
@@ -26,11 +29,23 @@ from sshtmux.core.config import (
     settings,
 )
 from sshtmux.exceptions import IdentityException, SSHException, TMUXException
+from sshtmux.services.config_watcher import ConfigWatcher
 from sshtmux.services.identities import PasswordManager
 from sshtmux.services.tmux import ConnectionProtocol, ConnectionType, Tmux
 from sshtmux.sshm import SSH_Config, SSH_Group, SSH_Host
 
 
+class _WarningsHandler(logging.Handler):
+    """Collects warnings logged while SSH config is parsed"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
 class SSHGroupDataInfo(Static):
     """Widget for SSH Group data"""
 
@@ -211,29 +226,39 @@ class SSHTui(App):
     }
     """
 
+    # Number of groups added to connections tree at once, while configuration is loading
+    TREE_BATCH_SIZE = 20
+
     def __init__(self, sshmconf=None):
-        self.tmux = Tmux()
-        self.password_manager = PasswordManager()
-        self.identities = self.password_manager.get_identities()
+        # Tmux server, identities and SSH configuration are loaded lazily or in
+        # background workers, so interface is painted before any of them is ready
+        self._tmux = None
+        self.identities: List[str] = []
+        self.identities_loaded = False
         self.attach_connection = False
         self.connections_tree = None
         self.overwritten_group = None
-        if isinstance(sshmconf, SSH_Config):
-            self.sshmconf = sshmconf
-        else:
-            self.sshmconf = SSH_Config().read().parse()
+        self.current_node = None
+        self.sshmconf = sshmconf if isinstance(sshmconf, SSH_Config) else None
+        self.sshmconf_loaded = False
+        self.config_watcher = None
 
         super().__init__()
 
+    @property
+    def tmux(self) -> Tmux:
+        if self._tmux is None:
+            self._tmux = Tmux()
+        return self._tmux
+
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
         with Container():
             self.connections_tree = Tree(
-                f"SSH Configuration ({len(self.sshmconf.groups)} groups)",
+                "SSH Configuration (loading...)",
                 id="sshtree",
                 data=None,
             )
-            self._generate_tree()
 
             yield self.connections_tree
             yield SSHDataView()
@@ -252,7 +277,7 @@ class SSHTui(App):
         self.input_fast_connections.display = False
         self.type_password = "Type Password"
         self.select_identity = CustomOptionList(
-            self.type_password, Separator(), *self.identities, id="select_identity"
+            self.type_password, Separator(), id="select_identity"
         )
         self.select_identity.display = False
         yield self.input_groups_search
@@ -289,6 +314,166 @@ class SSHTui(App):
     def on_mount(self, _) -> None:
         self.ENABLE_COMMAND_PALETTE = False
         self.connections_tree.focus()
+        self._load_identities()
+        self._load_config()
+
+    @work(thread=True, group="startup")
+    def _load_identities(self) -> None:
+        try:
+            identities = PasswordManager().get_identities()
+        except IdentityException as e:
+            self.call_from_thread(
+                self.notify, str(e), title="Identity", severity="error"
+            )
+            identities = []
+        self.call_from_thread(self._identities_loaded, identities)
+
+    def _identities_loaded(self, identities: List[str]) -> None:
+        self.identities = identities
+        self.identities_loaded = True
+        self.select_identity.add_options(identities)
+
+    @work(thread=True, group="startup")
+    def _load_config(self) -> None:
+        if self.sshmconf is None:
+            self.sshmconf = SSH_Config().read().parse()
+
+        # Stream groups into the tree in batches, so first groups are shown
+        # and usable before whole tree is built
+        groups = list(self.sshmconf.groups_sorted)
+        for index in range(0, len(groups), self.TREE_BATCH_SIZE):
+            batch = groups[index : index + self.TREE_BATCH_SIZE]
+            self.call_from_thread(self._add_groups_to_tree, batch)
+        self.call_from_thread(self._config_loaded)
+
+    def _config_loaded(self) -> None:
+        self.sshmconf_loaded = True
+        self._update_tree_label()
+
+        # Keep tree in sync with changes made from other terminals. Included files
+        # are not watched, tree shows only hosts of main config file
+        self.config_watcher = ConfigWatcher(
+            self.sshmconf.ssh_config_file,
+            self._config_file_changed,
+            follow_includes=False,
+        )
+        self.config_watcher.start()
+
+    def on_unmount(self) -> None:
+        if self.config_watcher:
+            self.config_watcher.stop()
+
+    def _update_tree_label(self) -> None:
+        self.connections_tree.root.set_label(
+            f"SSH Configuration ({len(self.sshmconf.groups)} groups)"
+        )
+
+    def _config_file_changed(self, changed: List[str]) -> None:
+        """
+        Called from watcher thread, config is parsed there and only patching of
+        the tree is done in UI thread. Invalid config keeps previous one loaded
+        """
+        config_file = os.path.abspath(self.sshmconf.ssh_config_file)
+        if config_file not in changed:
+            return
+
+        # Parser logs reason before it exits, so it is shown in notification
+        errors = _WarningsHandler()
+        logging.getLogger().addHandler(errors)
+        try:
+            sshmconf = SSH_Config()
+            sshmconf.ssh_config_file = self.sshmconf.ssh_config_file
+            sshmconf.read().parse()
+        except (Exception, SystemExit) as e:
+            message = "\n".join(errors.messages) or str(e) or type(e).__name__
+            self.call_from_thread(
+                self.notify,
+                f"Config not reloaded: {message}",
+                title="SSH Config",
+                severity="error",
+            )
+            return
+        finally:
+            logging.getLogger().removeHandler(errors)
+        self.call_from_thread(self._reload_config, sshmconf)
+
+    def _reload_config(self, sshmconf: SSH_Config) -> None:
+        self.sshmconf = sshmconf
+        self._update_tree_label()
+
+        filter_groups = self.input_groups_search.value
+        filter_hosts = self.input_hosts_search.value
+        if filter_groups or filter_hosts:
+            self.connections_tree.clear()
+            self._generate_tree(
+                filter_groups=filter_groups or None, filter_hosts=filter_hosts or None
+            )
+            return
+
+        self._patch_tree(sshmconf.groups_sorted)
+
+    def _patch_tree(self, groups: List[SSH_Group]) -> None:
+        """
+        Update tree in place with new groups, only nodes of changed groups are rebuilt,
+        so expansion of groups and cursor position are kept
+        """
+        tree = self.connections_tree
+        cursor = tree.cursor_node
+        cursor_key = self._tree_node_key(cursor) if cursor else None
+
+        group_names = {group.name for group in groups}
+        for node in list(tree.root.children):
+            if node.data.name not in group_names:
+                node.remove()
+
+        nodes = {node.data.name: node for node in tree.root.children}
+        for index, group in enumerate(groups):
+            node = nodes.get(group.name)
+            if node is None:
+                node = tree.root.add(
+                    f":file_folder: {group.name}", data=group, before=index
+                )
+                for host in group.iter_all_hosts():
+                    node.add_leaf(host.name, data=host)
+                continue
+
+            if node.data == group:
+                # Unchanged group, only point nodes to newly parsed objects
+                node.data = group
+                for leaf, host in zip(node.children, group.iter_all_hosts()):
+                    leaf.data = host
+                continue
+
+            node.data = group
+            node.remove_children()
+            for host in group.iter_all_hosts():
+                node.add_leaf(host.name, data=host)
+
+        tree.root.expand()
+        if cursor_key:
+            self._restore_tree_cursor(cursor_key)
+
+    def _tree_node_key(self, node) -> tuple:
+        if isinstance(node.data, SSH_Host) and node.parent:
+            return (node.parent.data.name, node.data.name)
+        if isinstance(node.data, SSH_Group):
+            return (node.data.name, None)
+        return (None, None)
+
+    def _restore_tree_cursor(self, key: tuple) -> None:
+        group_name, host_name = key
+        for node in self.connections_tree.root.children:
+            if node.data.name != group_name:
+                continue
+            target = node
+            for leaf in node.children:
+                if leaf.data.name == host_name:
+                    target = leaf
+                    break
+            self.connections_tree.move_cursor(target)
+            self.current_node = target.data
+            self.query_one(SSHDataView).update(self.current_node)
+            return
 
     def on_tree_node_highlighted(self, event):
         self.current_node = event.node.data
@@ -354,7 +539,7 @@ class SSHTui(App):
             self.notify("No Tmux session available", severity="warning")
 
     def action_connect_ssh(self, attach=True):
-        if not self._is_sshhost():
+        if not self._is_sshhost() or not self._is_identities_loaded():
             return
 
         self.connection = ConnectionProtocol.ssh
@@ -372,7 +557,7 @@ class SSHTui(App):
     def action_connect_sftp(self) -> None:
         self.connection = ConnectionProtocol.sftp
         self.atatch_connection = True
-        if not self._is_sshhost():
+        if not self._is_sshhost() or not self._is_identities_loaded():
             return
         if not self.identities:
             self._start_connection(ConnectionType.sftp_normal, None)
@@ -394,6 +579,8 @@ class SSHTui(App):
             self._search_input_changed(event)
 
     def _search_input_changed(self, event: Input.Changed):
+        if not self.sshmconf_loaded:
+            return
         filter = event.value
         self.connections_tree.clear()
         if event.input.id == "search_groups_input":
@@ -432,14 +619,14 @@ class SSHTui(App):
     def _generate_tree(
         self, *, filter_hosts: str | None = None, filter_groups: str | None = None
     ):
-        self.connections_tree.root.expand()
-
-        groups = deepcopy(self.sshmconf.groups_sorted)
+        groups = self.sshmconf.groups_sorted
         if filter_hosts:
             groups_filtered = []
             for group in groups:
                 hosts = [h for h in group.hosts if h.deep_filter(filter_hosts)]
                 if len(hosts) > 0:
+                    # Shallow copy, so filtered hosts do not change configuration
+                    group = copy(group)
                     group.hosts = hosts
                     groups_filtered.append(group)
             groups = groups_filtered
@@ -447,13 +634,23 @@ class SSHTui(App):
         elif filter_groups:
             groups = [g for g in groups if g.deep_filter(filter_groups)]
 
+        self._add_groups_to_tree(groups)
+
+    def _add_groups_to_tree(self, groups: List[SSH_Group]) -> None:
+        self.connections_tree.root.expand()
         for group in groups:
             g = self.connections_tree.root.add(
                 f":file_folder: {group.name}", data=group, expand=False
             )
-            for host in group.all_hosts:
+            for host in group.iter_all_hosts():
                 g.add_leaf(host.name, data=host)
 
+    def _is_identities_loaded(self):
+        if not self.identities_loaded:
+            self.notify("Identities are still loading...", severity="warning")
+            return False
+        return True
+
     def _is_sshhost(self):
         if not (
             isinstance(self.current_node, SSH_Host)
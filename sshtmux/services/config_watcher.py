@@ -0,0 +1,210 @@
+import ctypes
+import ctypes.util
+import glob
+import logging
+import os
+import re
+import select
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# inotify(7) flags, used when watcher runs on Linux
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+INOTIFY_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+
+INCLUDE_RE = re.compile(r"^\s*include\s+(.+)$", re.IGNORECASE)
+
+FileSignature = Optional[Tuple[int, int, int]]
+
+
+def find_config_files(config_file: str) -> List[str]:
+    """
+    Return SSH config file and all files it includes (recursively), with "Include"
+    paths resolved same way as OpenSSH does (relative to ~/.ssh, globs expanded)
+    """
+    ssh_dir = os.path.expanduser("~/.ssh")
+    files: List[str] = []
+    pending = [os.path.abspath(config_file)]
+
+    while pending:
+        path = pending.pop(0)
+        if path in files:
+            continue
+        files.append(path)
+        try:
+            with open(path, "r") as fh:
+                lines = fh.readlines()
+        except OSError:
+            continue
+
+        for line in lines:
+            match = INCLUDE_RE.match(line)
+            if not match:
+                continue
+            for pattern in match.group(1).split():
+                pattern = os.path.expanduser(pattern.strip('"'))
+                if not os.path.isabs(pattern):
+                    pattern = os.path.join(ssh_dir, pattern)
+                pending.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+
+def file_signature(path: str) -> FileSignature:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class _Inotify:
+    """
+    Minimal inotify binding (via ctypes), only used to wake up watcher thread
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched: Set[str] = set()
+
+    def watch(self, path: str) -> None:
+        if path in self.watched:
+            return
+        if self._add_watch(self.fd, path.encode(), INOTIFY_MASK) >= 0:
+            self.watched.add(path)
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # Events are not inspected, files are compared by signature afterwards
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Watches SSH config file, and all included files (unless follow_includes is
+    off), and calls callback with list of changed files. Uses inotify on Linux
+    (directories are watched, so atomic replacing of files is detected), and polling
+    on other systems
+    """
+
+    def __init__(
+        self,
+        config_file: str,
+        callback: Callable[[List[str]], None],
+        poll_interval: float = 1.0,
+        debounce: float = 0.05,
+        use_inotify: bool = True,
+        follow_includes: bool = True,
+    ):
+        super().__init__(name="sshtmux-config-watcher", daemon=True)
+        self.config_file = config_file
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.follow_includes = follow_includes
+        self._stop_event = threading.Event()
+        self._inotify: Optional[_Inotify] = None
+        self._signatures: Dict[str, FileSignature] = {}
+        self._refresh_files()
+
+    @property
+    def files(self) -> List[str]:
+        return list(self._signatures)
+
+    def _refresh_files(self) -> None:
+        if self.follow_includes:
+            files = find_config_files(self.config_file)
+        else:
+            files = [os.path.abspath(self.config_file)]
+        self._signatures = {
+            path: self._signatures.get(path, file_signature(path)) for path in files
+        }
+        if self._inotify:
+            for path in files:
+                self._inotify.watch(os.path.dirname(path) or ".")
+                # Symlinked file is replaced in directory of its target
+                self._inotify.watch(os.path.dirname(os.path.realpath(path)))
+
+    def check(self) -> List[str]:
+        """
+        Compare watched files with their last known signature, and return changed ones
+        """
+        changed = []
+        for path, signature in self._signatures.items():
+            current = file_signature(path)
+            if current != signature:
+                self._signatures[path] = current
+                changed.append(path)
+        if changed:
+            # Include directives could be changed too
+            self._refresh_files()
+        return changed
+
+    def _wait(self) -> None:
+        if self._inotify:
+            if self._inotify.wait(self.poll_interval):
+                # Wait a bit, so burst of events from single write is handled at once
+                self._stop_event.wait(self.debounce)
+                self._inotify.wait(0)
+            return
+        self._stop_event.wait(self.poll_interval)
+
+    def run(self) -> None:
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                self._refresh_files()
+            except (OSError, AttributeError) as e:
+                logging.debug(f"inotify not available, using polling: {e}")
+                self._inotify = None
+
+        try:
+            while not self._stop_event.is_set():
+                self._wait()
+                if self._stop_event.is_set():
+                    break
+                changed = self.check()
+                if changed:
+                    try:
+                        self.callback(changed)
+                    except (Exception, SystemExit) as e:
+                        # Parser exits on invalid config, watcher keeps running
+                        logging.warning(f"Config reload failed: {e!r}")
+        finally:
+            if self._inotify:
+                self._inotify.close()
+                self._inotify = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
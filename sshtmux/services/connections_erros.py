@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 CONNECTIONS_ERRORS = [
     "failed",
     "denied",
@@ -76,3 +78,41 @@ CONNECTIONS_ERRORS = [
     "Timeout error during key exchange",
     "Socket timeout",
 ]
+
+# Errors telling host (or its network) cannot be reached now, connection is retried
+UNREACHABLE_ERRORS = [
+    "Connection timed out",
+    "Operation timed out",
+    "Connection refused",
+    "No route to host",
+    "Network is unreachable",
+    "Host is down",
+    "Host is unreachable",
+    "Connection reset by peer",
+    "Connection closed by",
+    "Could not resolve hostname",
+    "Temporary failure in name resolution",
+    "kex_exchange_identification",
+    "ssh_exchange_identification",
+]
+
+_ERRORS = [error.lower() for error in CONNECTIONS_ERRORS]
+_UNREACHABLE = [error.lower() for error in UNREACHABLE_ERRORS]
+
+
+def find_connection_error(lines: List[str]) -> Optional[str]:
+    """
+    First line of SSH output telling connection failed
+    """
+    for text in lines:
+        if text.startswith("ssh:") or text.startswith("ssh_exchange_identification:"):
+            return text
+        lower = text.lower()
+        if any(error in lower for error in _ERRORS):
+            return text
+    return None
+
+
+def is_unreachable(error: str) -> bool:
+    lower = error.lower()
+    return any(text in lower for text in _UNREACHABLE)
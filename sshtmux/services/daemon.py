@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import selectors
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import click
+
+from sshtmux.exceptions import DaemonException
+from sshtmux.services.config_watcher import ConfigWatcher
+from sshtmux.services.mirror import ATTACH_RETRY, TmuxMirror
+from sshtmux.services.tmux import Tmux
+from sshtmux.sshm import SSH_Config
+
+# Environment variables passed from client, needed for terminal handling
+CLIENT_ENV = ["TERM", "COLUMNS", "LINES", "TMUX", "TMUX_PANE", "LANG", "LC_ALL"]
+MAX_REQUEST_SIZE = 1024 * 1024
+# Seconds forked process waits for request, before it gives up on client
+REQUEST_TIMEOUT = 5
+
+
+class SSHMDaemon:
+    """
+    Long-lived process serving "sshm" commands on Unix socket
+
+    Daemon keeps all modules imported, SSH configuration parsed (reparsed only
+    when config files change) and mirror of Tmux sessions, windows and panes (kept
+    current by Tmux notifications). For every connection, daemon forks, and child
+    process reads request and runs command with terminal of the client, so
+    interactive commands (prompts, menus) work same as when run directly, and
+    slow client never blocks other ones.
+
+    Daemon runs no threads (forked process would get copies of locks held by
+    them), Tmux notifications are read by the same loop which accepts clients
+    """
+
+    def __init__(self, socket_path: str, cli: click.Group):
+        self.socket_path = os.path.expanduser(socket_path)
+        self.cli = cli
+        self.sshmconf = None
+        self.watcher = None
+        self.tmux = None
+        self.mirror = None
+        self.mirror_fd = None
+        self.listener = None
+
+    def _check_running(self) -> None:
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            # Stale socket left by daemon that was not stopped properly
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise DaemonException(f"Daemon is already running on {self.socket_path}")
+
+    def load(self) -> None:
+        """
+        Load everything which is shared by all requests
+        """
+        if self.watcher is None:
+            self.watcher = ConfigWatcher(
+                SSH_Config().ssh_config_file,
+                lambda _: None,
+                use_inotify=False,
+            )
+            self.sshmconf = SSH_Config().read().parse()
+        elif self.watcher.check():
+            logging.info("SSH config changed, reloading...")
+            try:
+                self.sshmconf = SSH_Config().read().parse()
+            except (Exception, SystemExit) as e:
+                # Parser exits on invalid config, last valid one is served
+                logging.warning(f"SSH config not reloaded: {e!r}")
+
+        if self.tmux is None:
+            self.tmux = Tmux()
+            self.mirror = TmuxMirror(self.tmux).share()
+
+    def _listen(self) -> None:
+        self._check_running()
+        Path(self.socket_path).parent.mkdir(parents=True, exist_ok=True)
+        old_umask = os.umask(0o177)
+        try:
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.listener.listen(16)
+
+    def close(self) -> None:
+        if self.mirror:
+            self.mirror_fd = None
+            self.mirror.stop()
+            self.mirror = None
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def serve_forever(self) -> None:
+        self._listen()
+        self.load()
+        # Children are never waited for, let kernel reap them
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        selector = selectors.DefaultSelector()
+        selector.register(self.listener, selectors.EVENT_READ)
+        attach_at = 0.0
+        try:
+            while True:
+                if self.mirror and self.mirror_fd is None:
+                    if time.monotonic() >= attach_at:
+                        self.mirror_fd = self.mirror.attach()
+                        attach_at = time.monotonic() + ATTACH_RETRY
+                    if self.mirror_fd is not None:
+                        selector.register(self.mirror_fd, selectors.EVENT_READ)
+                timeout = (
+                    ATTACH_RETRY if self.mirror and self.mirror_fd is None else None
+                )
+                # Notifications are handled first, so forked child gets mirror
+                # which includes changes made before client connected
+                events = sorted(
+                    selector.select(timeout),
+                    key=lambda event: event[0].fileobj is self.listener,
+                )
+                for key, _ in events:
+                    if key.fileobj is self.listener:
+                        self._accept()
+                    elif not self.mirror.read_events():
+                        selector.unregister(self.mirror_fd)
+                        self.mirror_fd = None
+        finally:
+            selector.close()
+            self.close()
+
+    def _accept(self) -> None:
+        conn, _ = self.listener.accept()
+        try:
+            self.load()
+            if self.mirror:
+                # Child gets complete mirror, and does not have to query Tmux
+                self.mirror.load()
+            threads = [
+                t.name
+                for t in threading.enumerate()
+                if t is not threading.current_thread()
+            ]
+            if threads:
+                # Client runs command itself when daemon does not answer
+                raise DaemonException(f"Cannot fork with threads running: {threads}")
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                self._run_child(conn)
+        except Exception as e:
+            logging.warning(f"Request failed: {e}")
+        finally:
+            conn.close()
+
+    def _read_request(self, conn: socket.socket):
+        """
+        Request and terminal descriptors of client, None when connection only
+        probes whether daemon is running
+        """
+        conn.settimeout(REQUEST_TIMEOUT)
+        message, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST_SIZE, 3)
+        if not message:
+            return None, fds
+        if len(fds) != 3:
+            raise DaemonException("Client did not send terminal descriptors")
+        while not message.endswith(b"\n"):
+            chunk = conn.recv(MAX_REQUEST_SIZE)
+            if not chunk:
+                break
+            message += chunk
+        conn.settimeout(None)
+        return json.loads(message), fds
+
+    def _run_child(self, conn: socket.socket) -> None:
+        """
+        Runs in forked process, never returns
+        """
+        code = 1
+        self.listener.close()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            request, fds = self._read_request(conn)
+            if request is None:
+                os._exit(0)
+        except Exception as e:
+            logging.warning(f"Request failed: {e}")
+            os._exit(1)
+
+        try:
+            # Client forwards interrupts to this process
+            conn.sendall(f"{os.getpid()}\n".encode())
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            for fd in fds:
+                os.close(fd)
+            # Standard streams are recreated, as client terminal differs from daemon ones
+            sys.stdin = open(0, "r", closefd=False)
+            sys.stdout = open(1, "w", closefd=False)
+            sys.stderr = open(2, "w", closefd=False)
+            env = request.get("env", {})
+            for key in CLIENT_ENV:
+                if key in env:
+                    os.environ[key] = env[key]
+                else:
+                    os.environ.pop(key, None)
+            os.chdir(request.get("cwd") or "/")
+
+            self.cli.main(
+                args=request.get("argv", []), prog_name="sshm", obj=self.sshmconf
+            )
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                click.echo(e.code, err=True)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                conn.sendall(f"{code}\n".encode())
+            finally:
+                os._exit(code)
@@ -0,0 +1,313 @@
+import hashlib
+import logging
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sshtmux.core.config import SSHTMUX_BASEDIR, settings
+from sshtmux.exceptions import SSHException
+from sshtmux.sshm import SSH_Config, SSH_Host, SSH_Topology
+from sshtmux.sshm.ssh_topology import JumpHop
+
+CONTROL_DIR = SSHTMUX_BASEDIR / "control"
+
+JumpChain = Tuple[JumpHop, ...]
+
+
+@dataclass
+class FanoutTask:
+    """Single host of fan-out, with jump chain it is reached through"""
+
+    host: SSH_Host
+    chain: JumpChain = ()
+    ssh_options: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # Any caller data (like target window), tasks are not matched by host only,
+    # as the same host can be in many tasks
+    context: Any = None
+
+    @property
+    def bastions(self) -> List[str]:
+        return sorted({hop.name for hop in self.chain})
+
+    def ssh_options_string(self) -> str:
+        """SSH options quoted for shell (for commands typed in Tmux panes)"""
+        return " ".join(shlex.quote(option) for option in self.ssh_options)
+
+
+@dataclass
+class FanoutResult:
+    """Result of fan-out task, "error" is set when task raised exception"""
+
+    task: FanoutTask
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def control_path(chain: JumpChain) -> Path:
+    """
+    Socket path of multiplexed master for jump chain (hashed, so long chains
+    do not exceed socket path length limit)
+    """
+    key = ",".join(str(hop) for hop in chain)
+    return CONTROL_DIR / hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def master_command(chain: JumpChain, socket_path: Path, persist: int) -> List[str]:
+    """
+    SSH command which starts master connection to last bastion of jump chain,
+    bastion itself is reached through rest of the chain
+    """
+    bastion = chain[-1]
+    proxyjump = ",".join(str(hop) for hop in chain[:-1]) or "none"
+    cmd = [
+        "ssh",
+        "-o", "BatchMode=yes",
+        "-o", "ControlMaster=yes",
+        "-o", f"ControlPath={socket_path}",
+        "-o", f"ControlPersist={persist}",
+        "-o", f"ProxyJump={proxyjump}",
+    ]  # fmt: skip
+    if bastion.user:
+        cmd += ["-l", bastion.user]
+    if bastion.port:
+        cmd += ["-p", bastion.port]
+    return cmd + ["-f", "-N", bastion.name]
+
+
+def master_alive(chain: JumpChain, socket_path: Path) -> bool:
+    if not socket_path.exists():
+        return False
+    try:
+        result = subprocess.run(
+            ["ssh", "-o", f"ControlPath={socket_path}", "-O", "check", chain[-1].name],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+def proxy_options(chain: JumpChain, socket_path: Path) -> List[str]:
+    """
+    SSH options for target host, so it is reached through master connection
+    of its last bastion instead of new ProxyJump connections
+    """
+    proxy = f"ssh -o ControlPath={socket_path} -W [%h]:%p {chain[-1].name}"
+    return ["-o", "ProxyJump=none", "-o", f"ProxyCommand={proxy}"]
+
+
+class FanoutScheduler:
+    """
+    Runs operations (connections, commands) on many hosts in parallel
+
+    Hosts are grouped by jump chain (resolved same as for "host show --graph", from
+    ProxyJump topology), and each bastion has limit of concurrent tasks going through
+    it, so bastions do not get more simultaneous handshakes than they accept
+    (MaxStartups). Tasks are started interleaved between jump chains, so workers are
+    not all waiting for the same bastion.
+
+    With multiplexing, one master connection is opened per bastion (on first task
+    going through it), and tasks reach their hosts through it, so bastion handshake
+    is done only once. When master cannot be started (for example bastion needs
+    password), tasks fall back to normal ProxyJump connections
+    """
+
+    def __init__(
+        self,
+        config: SSH_Config,
+        workers: Optional[int] = None,
+        bastion_limit: Optional[int] = None,
+        multiplex: Optional[bool] = None,
+        topology: Optional[SSH_Topology] = None,
+    ):
+        self.config = config
+        self.workers = workers or settings.ssh.SSH_FANOUT_WORKERS
+        self.bastion_limit = bastion_limit or settings.ssh.SSH_FANOUT_BASTION_LIMIT
+        self.multiplex = (
+            settings.ssh.SSH_FANOUT_MULTIPLEX if multiplex is None else multiplex
+        )
+        self.topology = topology or SSH_Topology(config)
+        self._lock = threading.Lock()
+        self._limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._masters: Dict[JumpChain, Optional[Path]] = {}
+        self._master_locks: Dict[JumpChain, threading.Lock] = {}
+
+    def plan(
+        self, hosts: Iterable[SSH_Host], contexts: Optional[Iterable[Any]] = None
+    ) -> Dict[JumpChain, List[FanoutTask]]:
+        """
+        Group hosts by jump chain they are reached through, hosts which cannot
+        be traced (ProxyJump cycle) get task with error, that is never run.
+        Optional contexts (same order as hosts) are attached to tasks
+        """
+        hosts = list(hosts)
+        contexts = list(contexts) if contexts is not None else [None] * len(hosts)
+        self.topology.build(host.name for host in hosts)
+        groups: Dict[JumpChain, List[FanoutTask]] = {}
+        for host, context in zip(hosts, contexts):
+            try:
+                chain = self.topology.path(host.name)[:-1]
+                task = FanoutTask(host=host, chain=chain, context=context)
+            except SSHException as e:
+                chain = ()
+                task = FanoutTask(host=host, error=str(e), context=context)
+            groups.setdefault(chain, []).append(task)
+        return groups
+
+    def order(self, groups: Dict[JumpChain, List[FanoutTask]]) -> List[FanoutTask]:
+        """
+        Interleave tasks of all jump chains (round-robin)
+        """
+        ordered = zip_longest(*groups.values())
+        return [task for tasks in ordered for task in tasks if task is not None]
+
+    def _limit(self, bastion: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if bastion not in self._limits:
+                self._limits[bastion] = threading.BoundedSemaphore(self.bastion_limit)
+            return self._limits[bastion]
+
+    def _master(self, chain: JumpChain) -> Optional[Path]:
+        """
+        Return socket of master connection for jump chain, master is started
+        only once (other tasks of the same chain wait for it)
+        """
+        with self._lock:
+            lock = self._master_locks.setdefault(chain, threading.Lock())
+        with lock:
+            if chain in self._masters:
+                return self._masters[chain]
+
+            socket_path = control_path(chain)
+            socket_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+            if master_alive(chain, socket_path):
+                # Master left from previous fan-out (still within ControlPersist)
+                self._masters[chain] = socket_path
+                return socket_path
+
+            persist = settings.ssh.SSH_FANOUT_CONTROL_PERSIST
+            try:
+                result = subprocess.run(
+                    master_command(chain, socket_path, persist),
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    timeout=settings.tmux.TMUX_TIMEOUT_COMMANDS,
+                )
+                started = result.returncode == 0
+                if not started:
+                    logging.debug(
+                        f"Master for '{chain[-1]}' failed: {result.stderr.decode()}"
+                    )
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logging.debug(f"Master for '{chain[-1]}' failed: {e}")
+                started = False
+
+            self._masters[chain] = socket_path if started else None
+            return self._masters[chain]
+
+    def _prepare(self, task: FanoutTask) -> None:
+        if self.multiplex and task.chain:
+            socket_path = self._master(task.chain)
+            if socket_path:
+                task.ssh_options = proxy_options(task.chain, socket_path)
+
+    def _run_task(
+        self, task: FanoutTask, func: Callable[[FanoutTask], Any]
+    ) -> FanoutResult:
+        if task.error:
+            return FanoutResult(task=task, error=task.error)
+
+        # Semaphores are always acquired in the same (sorted) order, so tasks with
+        # overlapping jump chains cannot block each other
+        limits = [self._limit(bastion) for bastion in task.bastions]
+        for limit in limits:
+            limit.acquire()
+        start = time.perf_counter()
+        try:
+            self._prepare(task)
+            result = FanoutResult(task=task, value=func(task))
+        except Exception as e:
+            result = FanoutResult(task=task, error=str(e) or e.__class__.__name__)
+        finally:
+            for limit in reversed(limits):
+                limit.release()
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def run(
+        self,
+        tasks: List[FanoutTask],
+        func: Callable[[FanoutTask], Any],
+        on_result: Optional[Callable[[FanoutResult], None]] = None,
+    ) -> List[FanoutResult]:
+        """
+        Run function for all tasks, results are returned in order of tasks.
+        Optional callback is called (from worker thread) as each task finishes
+        """
+
+        def run_one(task: FanoutTask) -> FanoutResult:
+            result = self._run_task(task, func)
+            if on_result:
+                on_result(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(run_one, tasks))
+
+    def fanout(
+        self,
+        hosts: Iterable[SSH_Host],
+        func: Callable[[FanoutTask], Any],
+        on_result: Optional[Callable[[FanoutResult], None]] = None,
+    ) -> List[FanoutResult]:
+        """
+        Plan, order and run function for all hosts
+        """
+        return self.run(self.order(self.plan(hosts)), func, on_result)
+
+
+def ssh_command(task: FanoutTask, command: str) -> List[str]:
+    """
+    Build non-interactive SSH command (from SSH_COMMAND setting) to run command on host
+    """
+    template = shlex.split(settings.ssh.SSH_COMMAND)
+    cmd: List[str] = []
+    for part in template:
+        if part == "${hostname}":
+            cmd += ["-o", "BatchMode=yes"] + task.ssh_options + [task.host.name]
+        else:
+            cmd.append(part.replace("${hostname}", task.host.name))
+    return cmd + [command]
+
+
+def run_command(task: FanoutTask, command: str, timeout: Optional[float] = None):
+    """
+    Run command on host of task, returns completed process (output is captured)
+    """
+    try:
+        return subprocess.run(
+            ssh_command(task, command),
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise SSHException(f"Command timed out after {timeout}s")
+    except OSError as e:
+        raise SSHException(str(e))
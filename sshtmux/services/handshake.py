@@ -0,0 +1,285 @@
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Optional, Pattern, Tuple
+
+from libtmux import Pane
+
+from sshtmux.core.config import SSHHandshakeStage, settings
+from sshtmux.exceptions import (
+    IdentityException,
+    SSHException,
+    SSHUnreachableException,
+)
+from sshtmux.services.connections_erros import find_connection_error, is_unreachable
+from sshtmux.services.identities import totp
+from sshtmux.sshm import SSH_Host, expand_names
+
+# Seconds between reads of pane (prompt is answered at most this long after it shows)
+POLL_INTERVAL = 0.05
+# Seconds interrupted connection command has to get back to local shell
+INTERRUPT_TIMEOUT = 2
+# Placeholders of responses: ${password} is password of connection identity,
+# ${identity:NAME} password of other identity, ${totp:NAME} one-time code of TOTP
+# secret saved as identity
+RESPONSE_RE = re.compile(r"\$\{(password|identity|totp)(?::([^}]+))?\}")
+# Prompts of default stages
+HOSTKEY_RE = re.compile(r"\(yes/no(/\[fingerprint\])?\)\?\s*$")
+OTP_RE = re.compile(
+    r"(verification code|one-time password|passcode|otp|token)[^:]*:\s*$", re.I
+)
+PASSWORD_RE = re.compile(r"password[^:]*:\s*$", re.I)
+SHELL_RE = re.compile(r"[$#%>❯]\s*$")
+
+
+@dataclass(frozen=True)
+class HandshakeStage:
+    """Prompt (matched on last line of output), and response typed to it"""
+
+    name: str
+    pattern: Pattern
+    response: Optional[str] = None
+    timeout: Optional[float] = None
+
+    @property
+    def final(self) -> bool:
+        # Prompt without response ends handshake (shell, or prompt left to user)
+        return self.response is None
+
+
+def default_stages(identity: bool) -> List[HandshakeStage]:
+    return [
+        HandshakeStage("hostkey", HOSTKEY_RE, "yes"),
+        HandshakeStage("otp", OTP_RE),
+        HandshakeStage("password", PASSWORD_RE, "${password}" if identity else None),
+        HandshakeStage("shell", SHELL_RE),
+    ]
+
+
+@lru_cache(maxsize=None)
+def _compile(pattern: str) -> Pattern:
+    return re.compile(pattern)
+
+
+def handshake_stages(host: SSH_Host, identity: bool) -> List[HandshakeStage]:
+    """
+    Stages of host handshake: stages configured for host (SSH_HANDSHAKE) replace
+    default ones of the same name, or are checked first
+    """
+    stages = default_stages(identity)
+    defaults = {stage.name: stage for stage in stages}
+    extra: List[HandshakeStage] = []
+    for config in settings.ssh.SSH_HANDSHAKE:
+        if config.hosts and host.name not in expand_names(config.hosts, [host.name]):
+            continue
+        stage = _config_stage(config, defaults.get(config.name))
+        if config.name in defaults:
+            stages[stages.index(defaults[config.name])] = stage
+            defaults[config.name] = stage
+        else:
+            extra.append(stage)
+    return extra + stages
+
+
+def _config_stage(
+    config: SSHHandshakeStage, default: Optional[HandshakeStage]
+) -> HandshakeStage:
+    if config.pattern:
+        pattern = _compile(config.pattern)
+    elif default:
+        pattern = default.pattern
+    else:
+        raise SSHException(f"Handshake stage '{config.name}' has no pattern")
+    return HandshakeStage(config.name, pattern, config.response, config.timeout)
+
+
+def jump_hosts(host: SSH_Host) -> List[str]:
+    for keyword, value in host.get_all_params().items():
+        if keyword.lower() == "proxyjump" and value.lower() != "none":
+            return value.split(",")
+    return []
+
+
+def read_screen(pane: Pane) -> Tuple[int, List[str]]:
+    """
+    Visible lines of pane, and number of lines above them (so lines are counted
+    from start of history), with single Tmux call
+    """
+    result = pane.server.cmd(
+        "display-message", "-p", "-t", pane.pane_id, "#{history_size}", ";",
+        "capture-pane", "-p", "-t", pane.pane_id,
+    )  # fmt: skip
+    if result.stderr or not result.stdout:
+        raise SSHException("\n".join(result.stderr) or "Pane was closed")
+    return int(result.stdout[0]), result.stdout[1:]
+
+
+def typed_line(lines: List[str], command: str) -> Optional[int]:
+    """
+    Index of last line with typed command (its last row, when command is wrapped)
+    """
+    tail = command.strip()[-20:]
+    for index in range(len(lines) - 1, -1, -1):
+        line = lines[index].rstrip()
+        if line and (line.endswith(tail) or tail.endswith(line)):
+            return index
+    return None
+
+
+class Handshake:
+    """
+    Expect-like state machine of SSH login in pane
+
+    After connection command, last line of new output is matched with stage
+    prompts (in order). Prompt with response is answered as soon as it shows, and
+    next prompt has stage timeout to show. Prompt without response (shell, or
+    prompt left to user) ends handshake. Output telling connection failed, or prompt
+    shown again after it was answered (like rejected password), fails at once.
+    Handshake can be run again in the same pane (retry), it starts after last run
+    """
+
+    def __init__(
+        self,
+        host: SSH_Host,
+        stages: List[HandshakeStage],
+        secret: Callable[[Optional[str]], str],
+        timeout: float,
+        clock=time.monotonic,
+    ):
+        self.host = host
+        # Every jump host can ask the same prompt once
+        self.hops = 1 + len(jump_hosts(host))
+        self.stages = stages
+        # Password of identity (None is identity of connection)
+        self.secret = secret
+        self.timeout = timeout
+        self.clock = clock
+        self.answered: List[Tuple[int, str]] = []
+        # Line with typed command, and local shell prompt before it
+        self.start: Optional[int] = None
+        self.local_prompt = ""
+
+    def match(self, prompt: str) -> Optional[HandshakeStage]:
+        for stage in self.stages:
+            if stage.pattern.search(prompt):
+                return stage
+        return None
+
+    def response(self, stage: HandshakeStage) -> str:
+        def expand(match: re.Match) -> str:
+            kind, name = match.groups()
+            if kind == "password":
+                return self.secret(None)
+            if not name:
+                raise IdentityException(f"Identity not set in '{match.group()}'")
+            if kind == "totp":
+                return totp(self.secret(name), clock=time.time)
+            return self.secret(name)
+
+        return RESPONSE_RE.sub(expand, stage.response)
+
+    def step(
+        self, offset: int, lines: List[str], start: int
+    ) -> Tuple[Optional[HandshakeStage], Optional[Tuple[int, str]]]:
+        """
+        Check output lines (numbered from offset) after line start. Returns matched
+        stage and its prompt (with its line), when prompt was not answered yet
+        """
+        new = [
+            (offset + index, line)
+            for index, line in enumerate(lines)
+            if offset + index > start
+        ]
+        prompts = [(number, line) for number, line in new if line.strip()]
+        last = self.answered[-1][0] if self.answered else start
+        stage, prompt = None, None
+        if prompts and prompts[-1][0] > last:
+            prompt = prompts[-1]
+            stage = self.match(prompt[1])
+        error = find_connection_error([line for _, line in new])
+        # Connection command exited, back in local shell
+        exited = prompt and self.local_prompt and prompt[1].strip() == self.local_prompt
+        # Shell prompt ends handshake, even when banner above it has error words
+        if stage and stage.final and not (error and exited):
+            return stage, prompt
+        if error:
+            message = f"{self.host}\n\nConnection Error!\n\n{error}"
+            if is_unreachable(error):
+                raise SSHUnreachableException(message)
+            raise SSHException(message)
+        if stage and [text for _, text in self.answered].count(prompt[1]) >= self.hops:
+            raise SSHException(
+                f"{self.host}\n\nConnection Error!\n\n"
+                f"Prompt '{prompt[1].strip()}' repeated after it was answered"
+            )
+        return stage, prompt
+
+    def run(self, pane: Pane, command: str) -> str:
+        """
+        Type command and answer its prompts, returns name of stage ending handshake
+        """
+        previous, self.start = self.start, None
+        self.answered = []
+        pane.send_keys(command)
+        deadline = self.clock() + self.timeout
+        while True:
+            offset, lines = read_screen(pane)
+            if self.start is None:
+                # Output of command starts after line with typed command
+                typed = typed_line(lines, command)
+                if typed is not None and (
+                    previous is None or offset + typed > previous
+                ):
+                    self.start = offset + typed
+                    line, typed_command = lines[typed].rstrip(), command.strip()
+                    if line.endswith(typed_command):
+                        self.local_prompt = line[: -len(typed_command)].strip()
+            if self.start is not None:
+                stage, prompt = self.step(offset, lines, self.start)
+                if stage and stage.final:
+                    return stage.name
+                if stage:
+                    pane.send_keys(self.response(stage), enter=False, literal=True)
+                    pane.enter()
+                    self.answered.append(prompt)
+                    deadline = self.clock() + (stage.timeout or self.timeout)
+            if self.clock() > deadline:
+                return self._timeout(offset, lines)
+            time.sleep(POLL_INTERVAL)
+
+    def interrupt(self, pane: Pane, timeout: float = INTERRUPT_TIMEOUT) -> None:
+        """
+        Stop connection command before it is typed again (retry). Pane must get
+        back to local shell prompt, so command is never typed into remote shell
+        """
+        pane.send_keys("C-c", enter=False)
+        deadline = self.clock() + timeout
+        while True:
+            _, lines = read_screen(pane)
+            prompts = [line.strip() for line in lines if line.strip()]
+            if self.local_prompt and prompts and prompts[-1] == self.local_prompt:
+                return
+            if self.clock() > deadline:
+                raise SSHException(
+                    f"{self.host}\n\nConnection Error!\n\n"
+                    "Connection command was not stopped, it is not typed again"
+                )
+            time.sleep(POLL_INTERVAL)
+
+    def _timeout(self, offset: int, lines: List[str]) -> str:
+        # Login answered, and followed by output not recognized as shell prompt
+        if self.answered and offset + len(lines) - 1 > self.answered[-1][0]:
+            return "shell"
+        output = "\n".join(line for line in lines[-2:] if line.strip())
+        message = f"{self.host}\n\n Timeout reached! \n\n {output}"
+        new = [
+            line
+            for index, line in enumerate(lines)
+            if self.start is not None and offset + index > self.start
+        ]
+        if not self.answered and not any(line.strip() for line in new):
+            # Host did not even ask for login, nothing was shown after command
+            raise SSHUnreachableException(message)
+        # Output not recognized (like unknown shell prompt), host is reachable
+        raise SSHException(message)
@@ -1,5 +1,10 @@
+import base64
+import hashlib
+import hmac
 import json
 import os
+import struct
+import time
 
 from cryptography.fernet import Fernet, InvalidToken
 from rich.console import Console
@@ -8,6 +13,24 @@ from rich.prompt import Prompt
 from sshtmux.core.config import settings
 from sshtmux.exceptions import IdentityException
 
+# Seconds each TOTP code is valid, and its length (RFC 6238 defaults)
+TOTP_STEP = 30
+TOTP_DIGITS = 6
+
+
+def totp(secret: str, clock=time.time) -> str:
+    """
+    Time-based one-time password from base32 secret (as shown by authenticator
+    enrollment), for OTP prompts answered from identity store
+    """
+    secret = secret.replace(" ", "").upper()
+    key = base64.b32decode(secret + "=" * (-len(secret) % 8))
+    counter = struct.pack(">Q", int(clock() // TOTP_STEP))
+    digest = hmac.new(key, counter, hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    code = struct.unpack(">I", digest[offset : offset + 4])[0] & 0x7FFFFFFF
+    return str(code % 10**TOTP_DIGITS).zfill(TOTP_DIGITS)
+
 
 class KeyManager:
     def __init__(self):
@@ -0,0 +1,269 @@
+import codecs
+import logging
+import os
+import subprocess
+import threading
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from sshtmux.services.registry import (
+    PANE_FORMAT,
+    WINDOW_OPTIONS,
+    HostRegistry,
+    PaneHost,
+    parse_pane,
+)
+from sshtmux.services.tmux import Tmux
+
+SUBSCRIPTION = "sshm-mirror"
+# Notifications of control mode telling sessions, windows or panes changed
+STRUCTURE_EVENTS = {
+    "%sessions-changed",
+    "%session-renamed",
+    "%window-add",
+    "%window-close",
+    "%window-renamed",
+    "%unlinked-window-add",
+    "%unlinked-window-close",
+    "%unlinked-window-renamed",
+    "%layout-change",
+}
+# Panes (with position and host tags) of all sessions. Tmux has no notification of
+# changed options, nor of panes of other sessions, so value of this format is
+# subscribed (Tmux checks it every second, and notifies only when it changes)
+STATE_FORMAT = (
+    "#{S:#{W:#{P:#{pane_id}=#{session_name}:#{window_index}.#{pane_index}="
+    + "=".join(f"#{{{option}}}" for option in WINDOW_OPTIONS.values())
+    + " }}}"
+)
+# Seconds to wait for more notifications before reloading (new windows come in bursts)
+RELOAD_DELAY = 0.1
+# Seconds between attempts to attach when Tmux server has no sessions
+ATTACH_RETRY = 5
+
+
+class TmuxMirror(HostRegistry):
+    """
+    In-process mirror of sessions, windows and panes of sshtmux Tmux server
+
+    Mirror is attached as Tmux control mode client. Any notification of changed
+    structure (or host tags) marks mirror as stale, and it is reloaded with single
+    Tmux call in background, once burst of notifications ends. Lookups (by target,
+    session or host) are served from indexes, Tmux is queried only when mirror is
+    stale or not attached.
+
+    Started mirror becomes shared registry of all Tmux instances in process (like
+    in "sshm daemon", where request processes forked from daemon use its mirror).
+    Process which forks can not run threads, so it shares mirror without starting
+    it, attaches it itself and feeds control mode output from its own event loop
+    (see attach and read_events)
+    """
+
+    def __init__(self, tmux: Tmux):
+        super().__init__(tmux.server)
+        self.tmux = tmux
+        self.live = False
+        self.reloads = 0
+        self._stale = True
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._targets: Dict[Tuple[str, int, int], str] = {}
+        self._sessions: Dict[str, List[str]] = {}
+        self._hosts: Dict[str, List[str]] = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._buffer = ""
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # Threads are not copied to child, lock could be held by reload in progress
+        if self._lock.locked():
+            self._stale = True
+        self._lock = threading.Lock()
+
+    def share(self) -> "TmuxMirror":
+        HostRegistry.shared = self
+        return self
+
+    def start(self) -> "TmuxMirror":
+        self.share()
+        threading.Thread(target=self._run, daemon=True).start()
+        threading.Thread(target=self._reloader, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._changed.set()
+        if self._process:
+            self._process.terminate()
+        if HostRegistry.shared is self:
+            HostRegistry.shared = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            result = self.server.cmd("list-sessions", "-F", "#{session_id}")
+            if result.stderr or not result.stdout:
+                self._stop.wait(ATTACH_RETRY)
+                continue
+            try:
+                self._attach(result.stdout[0])
+            except Exception:
+                logging.exception("Tmux mirror failed")
+                self._stop.wait(ATTACH_RETRY)
+
+    def _spawn(self, session_id: str) -> None:
+        options = ["-f", "no-output,ignore-size", "-t", session_id]
+        self._process = subprocess.Popen(
+            self.tmux.command() + ["-C", "attach"] + options,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._process.stdin.write(
+            f"refresh-client -B '{SUBSCRIPTION}::{STATE_FORMAT}'\n"
+        )
+        self._process.stdin.flush()
+        self.live = True
+        # Anything could change while mirror was not attached
+        self.invalidate()
+
+    def _detach(self) -> None:
+        self.live = False
+        self._process.stdin.close()
+        self._process.wait()
+        self._process = None
+
+    def _attach(self, session_id: str) -> None:
+        try:
+            self._spawn(session_id)
+            for line in self._process.stdout:
+                if line.startswith("%exit"):
+                    break
+                self.handle_event(line.rstrip("\n"))
+        finally:
+            if self._process:
+                self._detach()
+
+    def attach(self) -> Optional[int]:
+        """
+        Attach without threads, returns descriptor of control mode output (caller
+        waits until it is readable and calls read_events), or None when Tmux has
+        no session to attach to
+        """
+        result = self.server.cmd("list-sessions", "-F", "#{session_id}")
+        if result.stderr or not result.stdout:
+            return None
+        self._decoder.reset()
+        self._buffer = ""
+        self._spawn(result.stdout[0])
+        return self._process.stdout.fileno()
+
+    def read_events(self) -> bool:
+        """
+        Handle control mode output ready on attached descriptor, returns whether
+        mirror is still attached
+        """
+        data = os.read(self._process.stdout.fileno(), 64 * 1024)
+        lines = (self._buffer + self._decoder.decode(data)).split("\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            if line.startswith("%exit"):
+                data = b""
+                break
+            self.handle_event(line)
+        if not data:
+            self._detach()
+            return False
+        return True
+
+    def _reloader(self) -> None:
+        while not self._stop.is_set():
+            self._changed.wait()
+            # Notifications are coalesced, mirror is reloaded once after burst
+            if self._stop.wait(RELOAD_DELAY):
+                return
+            self._changed.clear()
+            if self._stale:
+                self._reload()
+
+    def handle_event(self, line: str) -> bool:
+        """
+        Handle single line of control mode output, returns whether mirror is stale
+        """
+        name = line.split(" ", 1)[0]
+        if name == "%subscription-changed":
+            if line.split(" ", 2)[1] != SUBSCRIPTION:
+                return False
+        elif name not in STRUCTURE_EVENTS:
+            return False
+        self.invalidate()
+        return True
+
+    def invalidate(self) -> None:
+        self._stale = True
+        self._changed.set()
+
+    def _reload(self) -> None:
+        """
+        Read all panes with single Tmux call, and swap indexes at once (so readers,
+        and processes forked meanwhile, always see complete mirror)
+        """
+        with self._lock:
+            # Changes notified during reload make mirror stale again
+            self._stale = False
+            result = self.server.cmd("list-panes", "-a", "-F", PANE_FORMAT)
+            self.reloads += 1
+            panes: Dict[str, PaneHost] = {}
+            targets: Dict[Tuple[str, int, int], str] = {}
+            sessions: Dict[str, List[str]] = {}
+            hosts: Dict[str, List[str]] = {}
+            # No server running means there are no panes
+            for line in [] if result.stderr else result.stdout:
+                pane = parse_pane(line)
+                panes[pane.pane_id] = pane
+                targets[(pane.session, pane.window_index, pane.pane_index)] = (
+                    pane.pane_id
+                )
+                sessions.setdefault(pane.session, []).append(pane.pane_id)
+                if pane.host:
+                    hosts.setdefault(pane.host, []).append(pane.pane_id)
+            self._panes, self._targets = panes, targets
+            self._sessions, self._hosts = sessions, hosts
+
+    def load(self, session: Optional[str] = None) -> "TmuxMirror":
+        """
+        Make mirror current (it always has panes of all sessions)
+        """
+        self._current()
+        return self
+
+    def _current(self) -> Dict[str, PaneHost]:
+        if self._stale or not self.live:
+            self._reload()
+        return self._panes
+
+    def lookup(
+        self, session: str, window_index: Union[int, str], pane_index: Union[int, str]
+    ) -> Optional[PaneHost]:
+        panes = self._current()
+        try:
+            key = (session, int(window_index), int(pane_index))
+        except ValueError:
+            return None
+        return panes.get(self._targets.get(key, ""))
+
+    def sessions(self) -> Set[str]:
+        self._current()
+        return set(self._sessions)
+
+    def panes(self, session: Optional[str] = None) -> List[PaneHost]:
+        panes = self._current()
+        if session is None:
+            return list(panes.values())
+        return [panes[pane_id] for pane_id in self._sessions.get(session, [])]
+
+    def host_panes(self, host: str) -> List[PaneHost]:
+        panes = self._current()
+        return [panes[pane_id] for pane_id in self._hosts.get(host, [])]
@@ -0,0 +1,171 @@
+import re
+import shlex
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from sshtmux import logwriter
+from sshtmux.core.config import settings
+from sshtmux.sshm import expand_names
+
+try:
+    # Python 3.11+
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+HOST_DIR_RE = re.compile(r"[^A-Za-z0-9._@-]")
+# Repeats whose content must be present at least once
+REPEATS = {
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    getattr(sre_constants, "POSSESSIVE_REPEAT", sre_constants.MAX_REPEAT),
+}
+
+
+@dataclass
+class LogHit:
+    """Line matching search, in segment of host logs"""
+
+    host: str
+    segment: Path
+    line_number: int
+    text: str
+
+
+def logs_path() -> Path:
+    return Path(settings.sshtmux.SSHTMUX_LOGS_PATH).expanduser()
+
+
+def host_dir(host_name: str) -> Path:
+    """
+    Directory of host logs (name is made safe for file system)
+    """
+    return logs_path() / HOST_DIR_RE.sub("_", host_name).lstrip(".")
+
+
+def writer_command(host_name: str) -> str:
+    """
+    Shell command started by "pipe-pane" (pane id is expanded by Tmux)
+    """
+    args = [
+        sys.executable,
+        logwriter.__file__,
+        "--dir", str(host_dir(host_name)),
+        "--segment-size", str(settings.tmux.TMUX_LOG_SEGMENT_SIZE),
+        "--compression", settings.tmux.TMUX_LOG_COMPRESSION,
+    ]  # fmt: skip
+    return "exec " + " ".join(shlex.quote(arg) for arg in args) + " --pane '#{pane_id}'"
+
+
+def pipe_pane_command(target: str, host_name: str) -> List[str]:
+    """
+    Tmux command which starts logging of pane (only if it is not logged already)
+    """
+    return ["pipe-pane", "-o", "-t", target, writer_command(host_name)]
+
+
+def _literal_runs(pattern: List[Tuple]) -> List[str]:
+    """
+    Literal text which must be part of every match of (parsed) regex
+    """
+    runs: List[str] = []
+    current: List[str] = []
+    for op, value in pattern:
+        if op == sre_constants.LITERAL:
+            current.append(chr(value))
+            continue
+        if current:
+            runs.append("".join(current))
+            current = []
+        if op == sre_constants.SUBPATTERN:
+            runs.extend(_literal_runs(value[-1]))
+        elif op in REPEATS and value[0] >= 1:
+            runs.extend(_literal_runs(value[2]))
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+def required_trigrams(regex: "re.Pattern") -> Set[bytes]:
+    """
+    Trigrams which every segment with match of regex must have. Only parts of
+    regex that are always matched are used (not alternatives nor optional parts)
+    """
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return set()
+    result: Set[bytes] = set()
+    for run in _literal_runs(list(parsed)):
+        # Index is built from ASCII lowercase text
+        result |= logwriter.trigrams(run.encode().lower())
+    if regex.flags & re.IGNORECASE and not regex.flags & re.ASCII:
+        # "k" and "s" also match non-ASCII letters (Kelvin sign, long s)
+        result = {t for t in result if b"k" not in t and b"s" not in t}
+    return result
+
+
+def host_names() -> List[str]:
+    path = logs_path()
+    if not path.is_dir():
+        return []
+    return sorted(entry.name for entry in path.iterdir() if entry.is_dir())
+
+
+def host_segments(host: str) -> List[Path]:
+    directory = logs_path() / host
+    return sorted(
+        path for path in directory.iterdir() if logwriter.SEGMENT_RE.match(path.name)
+    )
+
+
+def candidate_segments(host: str, trigrams: Set[bytes]) -> Iterator[Path]:
+    """
+    Segments of host which can contain all trigrams. Segments without index
+    (still written) are always candidates
+    """
+    for segment in host_segments(host):
+        if trigrams:
+            index, _ = logwriter.TrigramIndex.load(logwriter.index_path(str(segment)))
+            if index is not None and not all(t in index for t in trigrams):
+                continue
+        yield segment
+
+
+def search_logs(
+    pattern: str,
+    hosts: Optional[List[str]] = None,
+    ignore_case: bool = False,
+    stats: Optional[dict] = None,
+) -> Iterator[LogHit]:
+    """
+    Yield lines of host logs matching regex, in order they were written. Only
+    segments whose index has all required trigrams are decompressed, and they are
+    read line by line. Hosts can be names or "r:" regex (as in "host set")
+    """
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    trigrams = required_trigrams(regex)
+    names = host_names()
+    if hosts:
+        hosts = [h if h.startswith("r:") else host_dir(h).name for h in hosts]
+        selected = sorted(expand_names(hosts, names))
+    else:
+        selected = names
+    if stats is None:
+        stats = {}
+    stats.update(segments=0, searched=0)
+
+    for host in selected:
+        if host not in names:
+            continue
+        stats["segments"] += len(host_segments(host))
+        for segment in candidate_segments(host, trigrams):
+            stats["searched"] += 1
+            for number, line in enumerate(logwriter.read_segment(str(segment)), 1):
+                text = line.decode("utf-8", "replace")
+                if regex.search(text):
+                    yield LogHit(host, segment, number, text)
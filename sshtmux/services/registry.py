@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Union
+
+from libtmux import Server
+
+from sshtmux.sshm import SSH_Host
+
+# Tmux user options with connection opened in window (so sessions layout can be
+# saved and restored), set on window and on pane running the connection
+WINDOW_OPTIONS = {
+    "host": "@sshm-host",
+    "group": "@sshm-group",
+    "connection": "@sshm-connection",
+    "identity": "@sshm-identity",
+}
+
+# Fields of pane, tab separated, followed by values of WINDOW_OPTIONS. Options are
+# looked up by Tmux in pane first, then in its window (so split panes have host
+# of their window)
+PANE_FIELDS = ["pane_id", "session_name", "window_index", "pane_index", "window_name"]
+PANE_FORMAT = "\t".join(
+    f"#{{{name}}}" for name in PANE_FIELDS + list(WINDOW_OPTIONS.values())
+)
+
+
+@dataclass
+class PaneHost:
+    """Pane, with host tags of connection opened in it (empty when not tagged)"""
+
+    pane_id: str
+    session: str
+    window_index: int
+    pane_index: int
+    window_name: str
+    host: str = ""
+    group: str = ""
+    connection: str = ""
+    identity: str = ""
+
+    @property
+    def ssh_host(self) -> SSH_Host:
+        return SSH_Host(name=self.host, group=self.group or self.session)
+
+
+def parse_pane(line: str) -> PaneHost:
+    values = line.split("\t")
+    pane_id, session, window, pane, name = values[: len(PANE_FIELDS)]
+    options = dict(zip(WINDOW_OPTIONS, values[len(PANE_FIELDS) :]))
+    return PaneHost(
+        pane_id=pane_id,
+        session=session,
+        window_index=int(window),
+        pane_index=int(pane),
+        window_name=name,
+        **options,
+    )
+
+
+class HostRegistry:
+    """
+    In-memory mirror of host tags of panes
+
+    Connections are tagged with Tmux user options (WINDOW_OPTIONS) when started, so
+    host of pane is read from Tmux with single query, instead of being guessed from
+    window name (which can be renamed) and scanning session windows and panes
+    """
+
+    # Registry shared by all Tmux instances of process (kept current by Tmux events,
+    # see TmuxMirror), when not set every Tmux instance queries Tmux itself
+    shared: Optional["HostRegistry"] = None
+
+    def __init__(self, server: Server):
+        self.server = server
+        self._panes: Dict[str, PaneHost] = {}
+
+    def load(self, session: Optional[str] = None) -> "HostRegistry":
+        """
+        Read all panes (or panes of session) with single Tmux call
+        """
+        args = ["-s", "-t", f"={session}"] if session else ["-a"]
+        result = self.server.cmd("list-panes", *args, "-F", PANE_FORMAT)
+        if session:
+            self._panes = {k: v for k, v in self._panes.items() if v.session != session}
+        else:
+            self._panes = {}
+        if result.stderr:
+            # No server (or session) means there are no panes
+            return self
+        for line in result.stdout:
+            pane = parse_pane(line)
+            self._panes[pane.pane_id] = pane
+        return self
+
+    def lookup(
+        self, session: str, window_index: Union[int, str], pane_index: Union[int, str]
+    ) -> Optional[PaneHost]:
+        """
+        Read single pane with single Tmux call, None when it does not exist
+        """
+        result = self.server.cmd(
+            "list-panes",
+            "-t",
+            f"={session}:{window_index}",
+            "-f",
+            f"#{{==:#{{pane_index}},{pane_index}}}",
+            "-F",
+            PANE_FORMAT,
+        )
+        if result.stderr or not result.stdout:
+            return None
+        pane = parse_pane(result.stdout[0])
+        self._panes[pane.pane_id] = pane
+        return pane
+
+    def invalidate(self) -> None:
+        """
+        Called when Tmux was changed by this process (nothing is cached here)
+        """
+
+    def sessions(self) -> Set[str]:
+        result = self.server.cmd("list-sessions", "-F", "#{session_name}")
+        if result.stderr:
+            # No server running means there are no sessions
+            return set()
+        return set(result.stdout)
+
+    def get(self, pane_id: str) -> Optional[PaneHost]:
+        return self._panes.get(pane_id)
+
+    def panes(self, session: Optional[str] = None) -> List[PaneHost]:
+        return [
+            pane
+            for pane in self._panes.values()
+            if session is None or pane.session == session
+        ]
+
+    def host_panes(self, host: str) -> List[PaneHost]:
+        return [pane for pane in self._panes.values() if pane.host == host]
@@ -0,0 +1,257 @@
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Type, TypeVar
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+T = TypeVar("T")
+
+
+class CircuitOpen(Exception):
+    """Attempt was not started, as circuit of host is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} failed recently, next attempt in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class Backoff:
+    """
+    Jittered exponential backoff ("full jitter"). Delay of attempt N is random value
+    between 0 and min(maximum, initial * 2^N), so retries started at the same moment
+    (like all connections dropped by network blip) are spread out
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        maximum: float,
+        rng: Optional[random.Random] = None,
+    ):
+        self.initial = initial
+        self.maximum = maximum
+        self.rng = rng or random.Random()
+
+    def ceiling(self, attempt: int) -> float:
+        # Exponent is capped, so high attempt numbers do not overflow
+        return min(self.maximum, self.initial * 2 ** min(attempt, 32))
+
+    def delay(self, attempt: int) -> float:
+        return self.rng.uniform(0, self.ceiling(attempt))
+
+
+class CircuitBreaker:
+    """
+    Per host circuit breaker
+
+    After "threshold" consecutive failures, circuit of host is open and no attempts
+    are allowed for "cooldown" seconds. Then it is half-open, and only single attempt
+    (probe) is allowed, success closes circuit, failure opens it again. Probe which
+    does not report its result within "cooldown" seconds is replaced by new one
+
+    With path, failures, open circuits and probes are shared with other processes
+    (like repeated CLI calls) through JSON file, where they expire "cooldown" seconds
+    after last change (open circuits one more "cooldown" later, so they are seen as
+    half-open). File is locked while it is updated, and read again only when it
+    was changed
+    """
+
+    def __init__(
+        self,
+        threshold: int,
+        cooldown: float,
+        clock: Callable[[], float] = time.time,
+        path: Optional[str] = None,
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.path = Path(path).expanduser() if path else None
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._opened: Dict[str, float] = {}
+        # Time until which probe of half-open circuit is in progress
+        self._probing: Dict[str, float] = {}
+        self._mtime: Optional[int] = None
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        now = self.clock()
+        return {
+            host: entry
+            for host, entry in entries.items()
+            if isinstance(entry, dict) and not self._expired(entry, now)
+        }
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        age = self.cooldown * (2 if entry.get("opened") is not None else 1)
+        return now - entry.get("updated", 0) >= age
+
+    def _load(self, force: bool = False) -> None:
+        if not self.path:
+            return
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime and not force:
+            return
+        self._mtime = mtime
+        entries = self._read()
+        self._failures = {host: entry["failures"] for host, entry in entries.items()}
+        self._opened = {
+            host: entry["opened"]
+            for host, entry in entries.items()
+            if entry.get("opened") is not None
+        }
+        self._probing = {
+            host: entry["probing_until"]
+            for host, entry in entries.items()
+            if entry.get("probing_until") is not None
+        }
+
+    @contextmanager
+    def _update(self, host: str) -> Iterator[None]:
+        """
+        Change state of host, on top of current state of file (when set)
+        """
+        if not self.path:
+            with self._lock:
+                yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with self._lock:
+                self._load(force=True)
+                yield
+                entries = self._read()
+                entries.pop(host, None)
+                if host in self._failures:
+                    entries[host] = {
+                        "failures": self._failures[host],
+                        "opened": self._opened.get(host),
+                        "probing_until": self._probing.get(host),
+                        "updated": self.clock(),
+                    }
+                tmp_file = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_file, "w") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_file, self.path)
+                self._mtime = self.path.stat().st_mtime_ns
+
+    def _state(self, host: str) -> str:
+        opened = self._opened.get(host)
+        if opened is None:
+            return CLOSED
+        if self.clock() - opened < self.cooldown:
+            return OPEN
+        return HALF_OPEN
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            self._load()
+            return self._state(host)
+
+    def retry_in(self, host: str) -> float:
+        """
+        Seconds until circuit of host is half-open (0 when attempts are allowed)
+        """
+        with self._lock:
+            self._load()
+            opened = self._opened.get(host)
+            if opened is None:
+                return 0.0
+            return max(0.0, opened + self.cooldown - self.clock())
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            self._load()
+            state = self._state(host)
+            if state != HALF_OPEN:
+                return state == CLOSED
+        # Probe is recorded while file is locked, so only one process probes host
+        with self._update(host):
+            state = self._state(host)
+            if state != HALF_OPEN:
+                return state == CLOSED
+            if self._probing.get(host, 0) > self.clock():
+                return False
+            self._probing[host] = self.clock() + self.cooldown
+            return True
+
+    def success(self, host: str) -> None:
+        with self._lock:
+            if host not in self._failures and host not in self._opened:
+                # Nothing to forget (and no file to write)
+                return
+        with self._update(host):
+            self._failures.pop(host, None)
+            self._opened.pop(host, None)
+            self._probing.pop(host, None)
+
+    def failure(self, host: str) -> None:
+        with self._update(host):
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if host in self._probing or self._failures[host] >= self.threshold:
+                self._opened[host] = self.clock()
+            self._probing.pop(host, None)
+
+
+class RetryScheduler:
+    """
+    Attempts of operation on host, spaced by backoff, up to "attempts" times. Only
+    "retryable" errors are retried and counted as failures of host by circuit
+    breaker, no attempt is started while circuit of host is open (CircuitOpen is
+    raised instead)
+    """
+
+    def __init__(
+        self,
+        backoff: Backoff,
+        breaker: CircuitBreaker,
+        attempts: int,
+        retryable: Tuple[Type[Exception], ...] = (Exception,),
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.backoff = backoff
+        self.breaker = breaker
+        self.attempts = max(1, attempts)
+        self.retryable = retryable
+        self.sleep = sleep
+
+    def run(
+        self,
+        host: str,
+        operation: Callable[[], T],
+        before_retry: Optional[Callable[[], None]] = None,
+    ) -> T:
+        attempt = 0
+        while True:
+            if not self.breaker.allow(host):
+                raise CircuitOpen(host, self.breaker.retry_in(host))
+            try:
+                result = operation()
+            except self.retryable:
+                self.breaker.failure(host)
+                attempt += 1
+                if attempt == self.attempts:
+                    raise
+                if before_retry:
+                    before_retry()
+                self.sleep(self.backoff.delay(attempt - 1))
+            else:
+                self.breaker.success(host)
+                return result
@@ -0,0 +1,374 @@
+import gzip
+import os
+import re
+import shutil
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from sshtmux.core.config import settings
+from sshtmux.services.tmux import WINDOW_OPTIONS, Tmux
+from sshtmux.sshm import expand_names
+
+# Panes captured with single Tmux call
+CAPTURE_BATCH = 16
+# Pane option with file of archived history of pane
+ARCHIVE_OPTION = "@sshm-archive"
+ARCHIVE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+# Fields of "list-panes" output, tab separated
+PANE_FIELDS = [
+    "pane_id",
+    "session_name",
+    "window_index",
+    "window_name",
+    "pane_index",
+    "window_activity",
+    "history_size",
+    WINDOW_OPTIONS["host"],
+    ARCHIVE_OPTION,
+]
+
+
+@dataclass
+class ScrollbackPane:
+    """Pane of sshtmux server, with host of its window (if any)"""
+
+    pane_id: str
+    session: str
+    window_index: int
+    window_name: str
+    pane_index: int
+    activity: int = 0
+    history: int = 0
+    host: str = ""
+    archive: str = ""
+
+    @property
+    def target(self) -> str:
+        return f"{self.session}:{self.window_index}.{self.pane_index}"
+
+
+@dataclass
+class ScrollbackHit:
+    """Line of pane matching search, "line" is number of lines below it (0 is last)"""
+
+    pane: ScrollbackPane
+    line: int
+    text: str
+
+
+def list_panes(
+    tmux: Tmux,
+    sessions: Optional[List[str]] = None,
+    hosts: Optional[List[str]] = None,
+) -> List[ScrollbackPane]:
+    """
+    All panes of sshtmux server (single Tmux call), optionally only of given sessions
+    and hosts (names or "r:" regex)
+    """
+    fmt = "\t".join(f"#{{{name}}}" for name in PANE_FIELDS)
+    result = tmux.server.cmd("list-panes", "-a", "-F", fmt)
+    if result.stderr:
+        # No server running means there is nothing to search
+        return []
+    panes = []
+    for line in result.stdout:
+        pane_id, session, window, name, pane, activity, history, host, archive = (
+            line.split("\t")
+        )
+        panes.append(
+            ScrollbackPane(
+                pane_id=pane_id,
+                session=session,
+                window_index=int(window),
+                window_name=name,
+                pane_index=int(pane),
+                activity=int(activity or 0),
+                history=int(history or 0),
+                host=host,
+                archive=archive,
+            )
+        )
+    if sessions:
+        panes = [pane for pane in panes if pane.session in sessions]
+    if hosts:
+        selected = set(expand_names(hosts, sorted({p.host for p in panes if p.host})))
+        panes = [pane for pane in panes if pane.host in selected]
+    return panes
+
+
+def capture_commands(panes: List[ScrollbackPane], marker: str) -> List[List[str]]:
+    """
+    Commands capturing whole scrollback of panes (wrapped lines joined), capture of
+    every pane is preceded by line with marker and pane id
+    """
+    commands: List[List[str]] = []
+    for pane in panes:
+        commands.append(
+            ["display-message", "-p", "-t", pane.pane_id, f"{marker} #{{pane_id}}"]
+        )
+        commands.append(["capture-pane", "-p", "-J", "-S", "-", "-t", pane.pane_id])
+    return commands
+
+
+def match_captures(
+    lines: Iterable[str], marker: str, regex: "re.Pattern"
+) -> Iterator[Tuple[str, List[Tuple[int, str]]]]:
+    """
+    Read output of capture commands line by line, and yield (pane id, matches) when
+    capture of pane ends. Only matching lines are kept, as (lines below, text)
+    """
+    prefix = marker + " "
+    pane_id = None
+    matches: List[Tuple[int, str]] = []
+    number = 0
+    last = 0
+
+    def section():
+        # Empty lines below last output (unused part of pane) are not counted
+        return pane_id, [(max(0, last - n), text) for n, text in matches]
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith(prefix):
+            if pane_id is not None:
+                yield section()
+            pane_id = line[len(prefix) :]
+            matches, number, last = [], 0, 0
+            continue
+        if pane_id is None:
+            continue
+        if line.strip():
+            last = number
+        if regex.search(line):
+            matches.append((number, line))
+        number += 1
+    if pane_id is not None:
+        yield section()
+
+
+class ScrollbackSearch:
+    """
+    Search of scrollback of all panes
+
+    Panes are captured in batches (CAPTURE_BATCH panes with single Tmux call), batches
+    run in parallel. Output of Tmux is read line by line and only matching lines are
+    kept, so whole scrollback of all panes is never in memory at once
+    """
+
+    def __init__(
+        self,
+        tmux: Tmux,
+        batch_size: int = CAPTURE_BATCH,
+        workers: Optional[int] = None,
+    ):
+        self.tmux = tmux
+        self.batch_size = batch_size
+        self.workers = workers or settings.ssh.SSH_FANOUT_WORKERS
+
+    def _capture(
+        self, panes: List[ScrollbackPane], regex: "re.Pattern"
+    ) -> List[ScrollbackHit]:
+        by_id = {pane.pane_id: pane for pane in panes}
+        hits: List[ScrollbackHit] = []
+        while panes:
+            marker = uuid.uuid4().hex
+            cmd = self.tmux.command() + self.tmux.sequence(
+                capture_commands(panes, marker)
+            )
+            seen = set()
+            with subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                errors="replace",
+            ) as process:
+                for pane_id, matches in match_captures(process.stdout, marker, regex):
+                    seen.add(pane_id)
+                    hits.extend(
+                        ScrollbackHit(by_id[pane_id], line, text)
+                        for line, text in matches
+                    )
+            if process.returncode == 0:
+                break
+            # Tmux stops command sequence at pane closed meanwhile, rest is captured again
+            remaining = [pane for pane in panes if pane.pane_id not in seen]
+            panes = remaining[1:]
+        return hits
+
+    def search(
+        self, regex: "re.Pattern", panes: List[ScrollbackPane]
+    ) -> List[ScrollbackHit]:
+        """
+        Lines of panes matching regex, most recent first (panes of recently active
+        windows first, and newest lines first in each pane)
+        """
+        batches = [
+            panes[i : i + self.batch_size]
+            for i in range(0, len(panes), self.batch_size)
+        ]
+        hits: List[ScrollbackHit] = []
+        if not batches:
+            return hits
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+            for batch_hits in pool.map(lambda b: self._capture(b, regex), batches):
+                hits.extend(batch_hits)
+        hits.sort(key=lambda hit: (-hit.pane.activity, hit.line))
+        return hits
+
+
+def find_pane(tmux: Tmux, target: str) -> Optional[ScrollbackPane]:
+    """
+    Pane by id ("%1") or "session:window.pane"
+    """
+    for pane in list_panes(tmux):
+        if target in (pane.pane_id, pane.target):
+            return pane
+    return None
+
+
+def read_archive(path: str) -> Iterator[str]:
+    """
+    Lines of archived history (file has one gzip member per archiving, in order)
+    """
+    with gzip.open(path, "rt", errors="replace") as fh:
+        for line in fh:
+            yield line.rstrip("\n")
+
+
+class ScrollbackArchive:
+    """
+    Moves history of idle panes out of Tmux server
+
+    History of panes whose window had no activity for "idle" seconds is appended to
+    compressed file (SSHTMUX_SCROLLBACK_PATH) and cleared in Tmux, so memory of Tmux
+    server stays bounded with many open connections. File is stored in pane option
+    (ARCHIVE_OPTION), so history can be read back (archive first, then rest of pane).
+    History is cleared only when window had no activity since it was captured, so no
+    line is lost
+    """
+
+    def __init__(
+        self,
+        tmux: Tmux,
+        idle: Optional[int] = None,
+        min_lines: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.tmux = tmux
+        idle = settings.tmux.TMUX_ARCHIVE_IDLE if idle is None else idle
+        # Activity of window has resolution of seconds, so pane idle for at least
+        # second surely gets new activity time with any output
+        self.idle = max(1, idle)
+        self.min_lines = (
+            settings.tmux.TMUX_ARCHIVE_MIN_LINES if min_lines is None else min_lines
+        )
+        self.clock = clock
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.sshtmux.SSHTMUX_SCROLLBACK_PATH).expanduser()
+
+    def idle_panes(self, panes: List[ScrollbackPane]) -> List[ScrollbackPane]:
+        now = self.clock()
+        return [
+            pane
+            for pane in panes
+            if now - pane.activity >= self.idle and pane.history >= self.min_lines
+        ]
+
+    def archive_file(self, pane: ScrollbackPane) -> Path:
+        if pane.archive:
+            return Path(pane.archive)
+        name = "{}-{}-{}".format(
+            ARCHIVE_NAME_RE.sub("_", pane.target),
+            datetime.now().strftime("%Y%m%dT%H%M%S"),
+            uuid.uuid4().hex[:6],
+        )
+        return self.directory / f"{name}.log.gz"
+
+    def archive(self, pane: ScrollbackPane) -> bool:
+        """
+        Append history of pane to its archive and clear it in Tmux
+        """
+        path = self.archive_file(pane)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = path.stat().st_size if path.exists() else 0
+        capture = [
+            "capture-pane",
+            "-p",
+            "-J",
+            "-S",
+            "-",
+            "-E",
+            "-1",
+            "-t",
+            pane.pane_id,
+        ]
+        with (
+            subprocess.Popen(
+                self.tmux.command() + capture,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            ) as process,
+            gzip.open(path, "ab") as archive,
+        ):
+            shutil.copyfileobj(process.stdout, archive)
+
+        # Cleared only when nothing was written to window since it was listed
+        cleared = False
+        if process.returncode == 0:
+            result = self.tmux.server.cmd(
+                "if-shell",
+                "-F",
+                "-t",
+                pane.pane_id,
+                f"#{{==:#{{window_activity}},{pane.activity}}}",
+                f"clear-history -t {pane.pane_id} ; display-message -p cleared",
+            )
+            cleared = result.stdout == ["cleared"]
+        if not cleared:
+            # Written history is removed, it is archived next time
+            if size:
+                os.truncate(path, size)
+            else:
+                path.unlink()
+            return False
+        self.tmux.server.cmd(
+            "set-option", "-p", "-t", pane.pane_id, ARCHIVE_OPTION, str(path)
+        )
+        return True
+
+    def run(self) -> List[ScrollbackPane]:
+        """
+        Archive all idle panes, returns archived panes
+        """
+        return [
+            pane
+            for pane in self.idle_panes(list_panes(self.tmux))
+            if self.archive(pane)
+        ]
+
+
+def pane_history(tmux: Tmux, pane: ScrollbackPane) -> Iterator[str]:
+    """
+    Whole history of pane, archived lines first, then lines still in Tmux
+    """
+    if pane.archive and Path(pane.archive).exists():
+        yield from read_archive(pane.archive)
+    with subprocess.Popen(
+        tmux.command() + ["capture-pane", "-p", "-J", "-S", "-", "-t", pane.pane_id],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+    ) as process:
+        for line in process.stdout:
+            yield line.rstrip("\n")
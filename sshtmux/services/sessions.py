@@ -0,0 +1,273 @@
+import json
+import os
+import tempfile
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from libtmux import Window
+
+from sshtmux.core.config import settings
+from sshtmux.exceptions import TMUXException
+from sshtmux.services.fanout import FanoutResult, FanoutScheduler, FanoutTask
+from sshtmux.services.pane_logs import pipe_pane_command
+from sshtmux.services.tmux import WINDOW_OPTIONS, ConnectionType, Tmux
+from sshtmux.sshm import SSH_Config, SSH_Host
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT = "default"
+RESTORE_OPTION = "@sshm-restore"
+
+# Fields of "list-windows" output, tab separated
+WINDOW_FIELDS = ["session_name", "window_index", "window_name", "pane_current_path"]
+
+
+@dataclass
+class WindowSnapshot:
+    """Single Tmux window, with connection opened in it (if any)"""
+
+    session: str
+    index: int
+    name: str
+    path: str = ""
+    host: Optional[str] = None
+    group: Optional[str] = None
+    connection: Optional[str] = None
+    identity: Optional[str] = None
+
+
+@dataclass
+class LayoutSnapshot:
+    """All Tmux sessions and windows, in order"""
+
+    windows: List[WindowSnapshot] = field(default_factory=list)
+    saved_at: str = ""
+
+    @property
+    def sessions(self) -> Dict[str, List[WindowSnapshot]]:
+        sessions: Dict[str, List[WindowSnapshot]] = {}
+        for window in self.windows:
+            sessions.setdefault(window.session, []).append(window)
+        return sessions
+
+
+def snapshot_file(name: str) -> Path:
+    """
+    File of named snapshot (in SSHTMUX_SESSIONS_PATH), or given path when name is path
+    """
+    if os.sep in name or name.endswith(".json"):
+        return Path(name).expanduser()
+    return Path(settings.sshtmux.SSHTMUX_SESSIONS_PATH).expanduser() / f"{name}.json"
+
+
+def _list_windows(tmux: Tmux, extra: List[str]) -> List[List[str]]:
+    fmt = "\t".join(f"#{{{name}}}" for name in WINDOW_FIELDS + extra)
+    result = tmux.server.cmd("list-windows", "-a", "-F", fmt)
+    if result.stderr:
+        # No server running means there is nothing to list
+        return []
+    return [line.split("\t") for line in result.stdout]
+
+
+def capture_layout(tmux: Tmux) -> LayoutSnapshot:
+    """
+    Read layout of all sessions with single Tmux call
+    """
+    options = list(WINDOW_OPTIONS.values())
+    layout = LayoutSnapshot(saved_at=datetime.now().isoformat(timespec="seconds"))
+    for row in _list_windows(tmux, options):
+        session, index, name, path = row[:4]
+        values = dict(zip(WINDOW_OPTIONS, row[4:]))
+        layout.windows.append(
+            WindowSnapshot(
+                session=session,
+                index=int(index),
+                name=name,
+                path=path,
+                host=values.get("host") or None,
+                group=values.get("group") or None,
+                connection=values.get("connection") or None,
+                identity=values.get("identity") or None,
+            )
+        )
+    return layout
+
+
+def save_layout(layout: LayoutSnapshot, path: Path) -> None:
+    """
+    Write snapshot to file (atomically, so previous snapshot is never half-written)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": layout.saved_at,
+        "windows": [asdict(window) for window in layout.windows],
+    }
+    fd, tmp_file = tempfile.mkstemp(prefix=".sshtmux-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w") as out:
+            json.dump(document, out, indent=2)
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def load_layout(path: Path) -> LayoutSnapshot:
+    try:
+        with open(path, "r") as fh:
+            document = json.load(fh)
+    except FileNotFoundError:
+        raise TMUXException(f"Session snapshot not found: {path}")
+    except ValueError as e:
+        raise TMUXException(f"Session snapshot is not valid: {path}: {e}")
+    return LayoutSnapshot(
+        windows=[WindowSnapshot(**window) for window in document.get("windows", [])],
+        saved_at=document.get("saved_at", ""),
+    )
+
+
+def _base_index(tmux: Tmux) -> int:
+    result = tmux.server.cmd("show-options", "-gv", "base-index")
+    try:
+        return int(result.stdout[0])
+    except (IndexError, ValueError):
+        return 0
+
+
+def restore_commands(
+    windows: List[Tuple[int, WindowSnapshot]],
+    existing: Dict[str, set],
+    base_index: int,
+    run_id: str,
+) -> List[List[str]]:
+    """
+    Build Tmux commands which recreate missing sessions and windows, from (position
+    in layout, window) pairs, existing windows are given as session -> window names.
+    New sessions keep window indexes, windows missing in existing sessions are
+    appended. Each created window is marked with RESTORE_OPTION ("<run_id>:<position>")
+    """
+    commands: List[List[str]] = []
+    created = set()
+    for position, window in windows:
+        session = window.session
+        if session in existing and window.name in existing[session]:
+            continue
+
+        path = ["-c", window.path] if window.path else []
+        target = f"={session}:{window.index}"
+        if session in created:
+            commands.append(
+                ["new-window", "-d", "-t", target, "-n", window.name] + path
+            )
+        elif session not in existing:
+            # First window is created with session, and moved to its index
+            created.add(session)
+            commands.append(
+                ["new-session", "-d", "-s", session, "-n", window.name] + path
+            )
+            if window.index != base_index:
+                commands.append(["move-window", "-s", f"={session}:^", "-t", target])
+        else:
+            # Appended window is selected, so session target points to it
+            existing[session].add(window.name)
+            target = f"={session}:"
+            commands.append(["new-window", "-t", target, "-n", window.name] + path)
+
+        commands.append(
+            ["set-option", "-w", "-t", target, RESTORE_OPTION, f"{run_id}:{position}"]
+        )
+        if window.host:
+            values = {
+                "host": window.host,
+                "group": window.group or "",
+                "connection": window.connection or ConnectionType.normal.name,
+                "identity": window.identity or "",
+            }
+            commands.extend(
+                ["set-option", "-w", "-t", target, option, values[key]]
+                for key, option in WINDOW_OPTIONS.items()
+            )
+            if settings.tmux.TMUX_PANE_LOGGING:
+                commands.append(pipe_pane_command(target, window.host))
+    return commands
+
+
+def _connection_type(window: WindowSnapshot) -> ConnectionType:
+    if settings.ssh.SSH_CUSTOM_COMMAND:
+        return ConnectionType.custom
+    try:
+        return ConnectionType[window.connection or ConnectionType.normal.name]
+    except KeyError:
+        return ConnectionType.normal
+
+
+def restore_layout(
+    tmux: Tmux,
+    config: SSH_Config,
+    layout: LayoutSnapshot,
+    scheduler: FanoutScheduler,
+    on_result: Optional[Callable[[FanoutResult], None]] = None,
+) -> Tuple[int, List[FanoutResult]]:
+    """
+    Recreate sessions and windows missing in Tmux (one Tmux call per session), then
+    start connections of all created windows in parallel. Returns number of created
+    windows and results of connections
+    """
+    existing: Dict[str, set] = {}
+    for session, _, name, _ in _list_windows(tmux, []):
+        existing.setdefault(session, set()).add(name)
+
+    run_id = uuid.uuid4().hex[:8]
+    placeholder = None
+    if not tmux.server.is_alive():
+        # Base index comes from Tmux configuration, which is loaded only with
+        # first session, so server is started with placeholder session
+        placeholder = f"sshm-restore-{run_id}"
+        tmux.server.cmd("new-session", "-d", "-s", placeholder)
+    base_index = _base_index(tmux)
+    sessions: Dict[str, List[Tuple[int, WindowSnapshot]]] = {}
+    for position, window in enumerate(layout.windows):
+        sessions.setdefault(window.session, []).append((position, window))
+    for windows in sessions.values():
+        tmux.batch(restore_commands(windows, existing, base_index, run_id))
+    if placeholder:
+        tmux.server.cmd("kill-session", "-t", f"={placeholder}")
+
+    # Created windows are found by restore marker
+    created: Dict[int, str] = {}
+    for row in _list_windows(tmux, ["window_id", RESTORE_OPTION]):
+        window_id, marker = row[4], row[5]
+        if marker.startswith(f"{run_id}:"):
+            created[int(marker.split(":")[1])] = window_id
+
+    host_index = config.get_host_index()
+    hosts: List[SSH_Host] = []
+    contexts: List[Tuple[WindowSnapshot, str]] = []
+    for position, window_id in sorted(created.items()):
+        window = layout.windows[position]
+        if not window.host:
+            continue
+        if window.host in host_index:
+            host = host_index[window.host][0]
+        else:
+            # Fast connections are not in configuration
+            host = SSH_Host(name=window.host, group=window.group or window.session)
+        hosts.append(host)
+        contexts.append((window, window_id))
+
+    def start(task: FanoutTask) -> bool:
+        window, window_id = task.context
+        return tmux.start_connection(
+            _connection_type(window),
+            Window.from_window_id(tmux.server, window_id),
+            task.host,
+            window.identity,
+            task.ssh_options_string(),
+        )
+
+    tasks = scheduler.order(scheduler.plan(hosts, contexts))
+    return len(created), scheduler.run(tasks, start, on_result)
@@ -0,0 +1,320 @@
+import fcntl
+import logging
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from libtmux import Pane, Window
+
+from sshtmux.core.config import SSHTMUX_BASEDIR, settings
+from sshtmux.exceptions import IdentityException, SSHException, TMUXException
+from sshtmux.services.retry import Backoff, CircuitBreaker
+from sshtmux.services.tmux import WINDOW_OPTIONS, ConnectionType, Tmux
+from sshtmux.sshm import SSH_Host
+
+SUBSCRIPTION = "sshm-panes"
+CONNECTED_COMMANDS = {"ssh", "sftp"}
+
+# Panes of sshm windows (tagged with host) in all sessions, as "%pane=@window=command"
+PANES_FORMAT = (
+    "#{S:#{W:#{?#{" + WINDOW_OPTIONS["host"] + "},"
+    "#{P:#{pane_id}=#{window_id}=#{pane_current_command} },}}}"
+)
+PANE_RE = re.compile(r"(%\d+)=(@\d+)=(.*?)\s*(?=%\d+=@|$)")
+
+# Output of SSH/SFTP telling connection was dropped (not closed by user)
+DISCONNECT_MESSAGES = [
+    "closed by remote host",
+    "broken pipe",
+    "connection reset",
+    "not responding",
+    "timed out",
+    "network is unreachable",
+    "no route to host",
+    "connection closed",
+]
+
+
+@dataclass
+class SupervisedPane:
+    """SSH pane, with connection it was opened with (from window options)"""
+
+    pane_id: str
+    window_id: str
+    host: SSH_Host
+    connection: ConnectionType
+    identity: Optional[str] = None
+
+
+def parse_panes(value: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Parse subscription value into pane -> (window, current command)
+    """
+    return {pane: (window, command) for pane, window, command in PANE_RE.findall(value)}
+
+
+def is_disconnected(lines: List[str]) -> bool:
+    for line in reversed([line for line in lines if line.strip()][-5:]):
+        text = line.lower()
+        if any(message in text for message in DISCONNECT_MESSAGES):
+            return True
+    return False
+
+
+class Supervisor:
+    """
+    Reconnects SSH panes whose connection dropped
+
+    Panes are not polled, supervisor attaches as Tmux control mode client, and
+    subscribes to current command of all panes in sshm windows, Tmux sends
+    notification only when any of them changes. When pane goes from ssh/sftp back
+    to shell, and its last output is disconnect message (like "Broken pipe"),
+    connection is started again in the same pane, with the same connection type
+    and identity.
+
+    Attempts are delayed with jittered exponential backoff, so panes dropped by the
+    same network blip do not reconnect all at once, and each host has circuit breaker,
+    so unreachable host gets only single probe after cooldown, instead of attempts
+    from all its panes
+    """
+
+    def __init__(
+        self,
+        tmux: Tmux,
+        backoff: Optional[Backoff] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_attempts: Optional[int] = None,
+        workers: Optional[int] = None,
+    ):
+        self.tmux = tmux
+        self.backoff = backoff or Backoff(
+            settings.tmux.TMUX_RECONNECT_BACKOFF,
+            settings.tmux.TMUX_RECONNECT_BACKOFF_MAX,
+        )
+        self.breaker = breaker or CircuitBreaker(
+            settings.tmux.TMUX_RECONNECT_BREAKER_FAILURES,
+            settings.tmux.TMUX_RECONNECT_BREAKER_COOLDOWN,
+        )
+        self.max_attempts = (
+            settings.tmux.TMUX_RECONNECT_ATTEMPTS
+            if max_attempts is None
+            else max_attempts
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or settings.ssh.SSH_FANOUT_WORKERS
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._commands: Dict[str, str] = {}
+        self._reconnecting: Set[str] = set()
+        self._process: Optional[subprocess.Popen] = None
+
+    def control_command(self, session_id: str) -> List[str]:
+        # Control client does not receive output of panes, nor resize them
+        options = ["-f", "no-output,ignore-size", "-t", session_id]
+        return self.tmux.command() + ["-C", "attach"] + options
+
+    def lock(self):
+        """
+        Take lock of supervisor for Tmux server, so only one supervisor runs for it
+        (lock is released when process exits)
+        """
+        server = self.tmux.server
+        name = (server.socket_path or server.socket_name or "default").replace("/", "_")
+        SSHTMUX_BASEDIR.mkdir(parents=True, exist_ok=True)
+        lock_file = open(SSHTMUX_BASEDIR / f"supervisor-{name}.lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise TMUXException("Supervisor is already running for this Tmux server")
+        return lock_file
+
+    def run(self) -> None:
+        """
+        Handle events of Tmux server until it has no sessions (or supervisor is
+        stopped). Control client is attached again when its session is closed
+        """
+        try:
+            while not self._stop.is_set():
+                result = self.tmux.server.cmd("list-sessions", "-F", "#{session_id}")
+                if result.stderr or not result.stdout:
+                    return
+                self._attach(result.stdout[0])
+        finally:
+            self.stop()
+
+    def _attach(self, session_id: str) -> None:
+        self._process = subprocess.Popen(
+            self.control_command(session_id),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        try:
+            self._process.stdin.write(
+                f"refresh-client -B '{SUBSCRIPTION}::{PANES_FORMAT}'\n"
+            )
+            self._process.stdin.flush()
+            for line in self._process.stdout:
+                if line.startswith("%exit"):
+                    break
+                self.handle_event(line.rstrip("\n"))
+        finally:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process = None
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._process:
+            self._process.terminate()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def handle_event(self, line: str) -> List[str]:
+        """
+        Handle single line of control mode output, returns panes found dropped
+        """
+        if not line.startswith("%subscription-changed "):
+            return []
+        header, _, value = line.partition(" : ")
+        if header.split()[1] != SUBSCRIPTION:
+            return []
+        return self.update(parse_panes(value))
+
+    def update(self, panes: Dict[str, Tuple[str, str]]) -> List[str]:
+        """
+        Compare current commands of panes with previous ones, and start reconnecting
+        panes which were connected and are not anymore
+        """
+        changed: List[Tuple[str, str]] = []
+        with self._lock:
+            for pane_id, (window_id, command) in panes.items():
+                previous = self._commands.get(pane_id)
+                if (
+                    previous in CONNECTED_COMMANDS
+                    and command not in CONNECTED_COMMANDS
+                    and pane_id not in self._reconnecting
+                ):
+                    changed.append((pane_id, window_id))
+            self._commands = {pane: command for pane, (_, command) in panes.items()}
+
+        dropped = []
+        for pane_id, window_id in changed:
+            pane = self._dropped_pane(pane_id, window_id)
+            if pane:
+                dropped.append(pane_id)
+                with self._lock:
+                    self._reconnecting.add(pane_id)
+                self._executor.submit(self._reconnect, pane)
+        return dropped
+
+    def _dropped_pane(self, pane_id: str, window_id: str) -> Optional[SupervisedPane]:
+        fmt = "\t".join(f"#{{{option}}}" for option in WINDOW_OPTIONS.values())
+        try:
+            result = self.tmux.batch(
+                [
+                    ["display-message", "-p", "-t", pane_id, fmt],
+                    ["capture-pane", "-p", "-J", "-t", pane_id, "-S", "-20"],
+                ]
+            )
+        except TMUXException:
+            # Pane was closed meanwhile
+            return None
+        if not result or not result.stdout:
+            return None
+        values = dict(zip(WINDOW_OPTIONS, result.stdout[0].split("\t")))
+        if not values.get("host"):
+            return None
+        if not is_disconnected(result.stdout[1:]):
+            logging.info(f"Connection to '{values['host']}' closed in {pane_id}")
+            return None
+
+        try:
+            connection = ConnectionType[values.get("connection") or "normal"]
+        except KeyError:
+            connection = ConnectionType.normal
+        return SupervisedPane(
+            pane_id=pane_id,
+            window_id=window_id,
+            host=SSH_Host(name=values["host"], group=values.get("group") or ""),
+            connection=connection,
+            identity=values.get("identity") or None,
+        )
+
+    def _current_command(self, pane_id: str) -> Optional[str]:
+        result = self.tmux.server.cmd(
+            "display-message", "-p", "-t", pane_id, "#{pane_current_command}"
+        )
+        if result.stderr or not result.stdout:
+            return None
+        return result.stdout[0]
+
+    def _connect(self, pane: SupervisedPane) -> None:
+        window = Window.from_window_id(self.tmux.server, pane.window_id)
+        self.tmux.start_connection(
+            pane.connection,
+            window,
+            pane.host,
+            pane.identity,
+            pane=Pane.from_pane_id(self.tmux.server, pane.pane_id),
+            kill_on_error=False,
+            # Supervisor has its own backoff and breaker
+            retry=False,
+        )
+
+    def _reconnect(self, pane: SupervisedPane) -> bool:
+        name = pane.host.name
+        attempt = 0
+        try:
+            while not self._stop.is_set():
+                wait = max(self.backoff.delay(attempt), self.breaker.retry_in(name))
+                if self._stop.wait(wait):
+                    return False
+
+                command = self._current_command(pane.pane_id)
+                if command is None:
+                    # Pane was closed
+                    return False
+                if command in CONNECTED_COMMANDS:
+                    # Connected again (by user)
+                    return True
+                if not self.breaker.allow(name):
+                    # Other pane of the same host is probing it
+                    continue
+
+                try:
+                    self._connect(pane)
+                    connected = True
+                except (SSHException, TMUXException, IdentityException) as e:
+                    # Connection without password prompt (keys) is only seen as running
+                    connected = (
+                        self._current_command(pane.pane_id) in CONNECTED_COMMANDS
+                    )
+                    if not connected:
+                        logging.info(f"Reconnecting '{name}' failed: {e}")
+
+                if connected:
+                    self.breaker.success(name)
+                    logging.info(f"Reconnected '{name}' in {pane.pane_id}")
+                    return True
+                self.breaker.failure(name)
+                attempt += 1
+                if self.max_attempts and attempt >= self.max_attempts:
+                    logging.warning(
+                        f"Giving up reconnecting '{name}' in {pane.pane_id}"
+                    )
+                    return False
+            return False
+        except Exception:
+            # Runs in worker thread, where exception would be lost
+            logging.exception(f"Reconnecting '{name}' in {pane.pane_id} failed")
+            return False
+        finally:
+            with self._lock:
+                self._reconnecting.discard(pane.pane_id)
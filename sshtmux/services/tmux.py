@@ -1,11 +1,10 @@
 import os
-import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Union
+from typing import Callable, Dict, List, Optional, Set, Union
 
 import libtmux
-from libtmux import Window
+from libtmux import Pane, Window
 from rich import print
 from rich.prompt import Prompt
 
@@ -16,9 +15,18 @@ from sshtmux.core.config import (
     SFTP_CLI,
     settings,
 )
-from sshtmux.exceptions import IdentityException, SSHException, TMUXException
-from sshtmux.services.connections_erros import CONNECTIONS_ERRORS
+from sshtmux.exceptions import (
+    IdentityException,
+    SSHException,
+    SSHUnreachableException,
+    TMUXException,
+)
+from sshtmux.services.fanout import FanoutResult, FanoutScheduler, FanoutTask
+from sshtmux.services.handshake import Handshake, handshake_stages
 from sshtmux.services.identities import PasswordManager, prompt_identity
+from sshtmux.services.pane_logs import pipe_pane_command
+from sshtmux.services.registry import WINDOW_OPTIONS, HostRegistry
+from sshtmux.services.retry import Backoff, CircuitBreaker, CircuitOpen, RetryScheduler
 from sshtmux.services.snippets import prompt_snippet
 from sshtmux.sshm import SSH_Config, SSH_Host
 
@@ -28,6 +36,25 @@ class ConnectionAbstract(ABC):
         super().__init__()
         self.password_manager = PasswordManager()
         self.connection_cmd = settings.ssh.SSH_COMMAND
+        # Extra options placed before host name (like fan-out proxy through bastion master)
+        self.ssh_options = ""
+        # Pane connection is started in (active pane of window when not set), and
+        # whether window is closed when connection fails
+        self.pane: Optional[Pane] = None
+        self.kill_on_error = True
+        # Retries of handshake when host is unreachable (single attempt when not set)
+        self.retry: Optional[RetryScheduler] = None
+
+    def _pane(self, window: Window) -> Pane:
+        return self.pane or window.attached_pane
+
+    def _close(self, window: Window) -> None:
+        if self.kill_on_error:
+            window.kill_window()
+
+    def _connection_command(self, host: SSH_Host) -> str:
+        target = f"{self.ssh_options} {host.name}" if self.ssh_options else host.name
+        return self.connection_cmd.replace("${hostname}", target)
 
     @abstractmethod
     def start(
@@ -40,50 +67,50 @@ class ConnectionAbstract(ABC):
         Start SSH connection
         """
 
-    def _check_connections_errors(
+    def _handshake(
         self,
         window: Window,
-        pane_output: Union[str, List[str]],
         host: SSH_Host,
-    ):
-        if isinstance(pane_output, str):
-            pane_output = [pane_output]
-
-        is_failed = False
-        for text in pane_output:
-            if text.startswith("ssh:") or text.startswith(
-                "ssh_exchange_identification:"
-            ):
-                is_failed = True
-            else:
-                for error in CONNECTIONS_ERRORS:
-                    if error.lower() in text.lower():
-                        is_failed = True
-                        break
-
-            if is_failed:
-                window.kill_window()
-                error_msg = (
-                    pane_output[-2] if len(pane_output) >= 2 else str(pane_output)
-                )
-                raise SSHException(f"{host}\n\nConnection Error!\n\n{error_msg}")
-
-    def _check_timeout_reached(
-        self,
-        timeout_start,
-        pane_output: List[str],
-        host: SSH_Host,
-        window: Window,
-    ):
-        if time.time() - timeout_start > settings.tmux.TMUX_TIMEOUT_COMMANDS:
-            timeout_mgs = f"{host}\n\n Timeout reached!"
-            window.kill_window()
-            if pane_output and len(pane_output) >= 2:
-                error_msg = (
-                    pane_output[-2] if len(pane_output) >= 2 else str(pane_output)
-                )
-                raise SSHException(f"{timeout_mgs} \n\n {error_msg}")
-            raise SSHException(f"{timeout_mgs} \n\n {host} \n\n {pane_output}")
+        password: Optional[str] = None,
+    ) -> str:
+        """
+        Start connection command, and answer prompts of host handshake (password is
+        response to password prompt, which is left to user when not set)
+        """
+
+        def secret(reference: Optional[str]) -> str:
+            if reference is None:
+                if password is None:
+                    raise IdentityException("Connection has no Identity")
+                return password
+            return self.password_manager.get_password(reference)
+
+        handshake = Handshake(
+            host,
+            handshake_stages(host, identity=password is not None),
+            secret,
+            settings.tmux.TMUX_TIMEOUT_COMMANDS,
+        )
+        pane = self._pane(window)
+        command = self._connection_command(host)
+
+        def attempt() -> str:
+            return handshake.run(pane, command)
+
+        def interrupt() -> None:
+            # Stop connection still trying, before command is typed again
+            handshake.interrupt(pane)
+
+        try:
+            if self.retry:
+                return self.retry.run(host.name, attempt, interrupt)
+            return attempt()
+        except CircuitOpen as e:
+            self._close(window)
+            raise SSHUnreachableException(f"{host}\n\nConnection Error!\n\n{e}")
+        except (SSHException, IdentityException):
+            self._close(window)
+            raise
 
 
 class NormalConnection(ConnectionAbstract):
@@ -93,21 +120,7 @@ class NormalConnection(ConnectionAbstract):
         host: SSH_Host,
         identity: Union[str, None],
     ):
-        pane_output = None
-        cmd = self.connection_cmd.replace("${hostname}", host.name)
-        window.attached_pane.send_keys(cmd)
-        timeout_start = time.time()
-        password_prompt_found = False
-        while not password_prompt_found:
-            self._check_timeout_reached(timeout_start, pane_output, host, window)
-            pane_output = window.attached_pane.capture_pane()
-            self._check_connections_errors(window, pane_output, host)
-
-            for text in pane_output:
-                if "password:" in text:
-                    password_prompt_found = True
-                    break
-            time.sleep(0.1)
+        self._handshake(window, host)
 
 
 class IdentityConnection(ConnectionAbstract):
@@ -117,51 +130,12 @@ class IdentityConnection(ConnectionAbstract):
         host: SSH_Host,
         identity: Union[str, None],
     ):
-        pane_output = None
-        cmd = self.connection_cmd.replace("${hostname}", host.name)
         try:
             password = self.password_manager.get_password(identity)
         except IdentityException as e:
-            window.kill_window()
+            self._close(window)
             raise e
-        window.attached_pane.send_keys(cmd)
-
-        timeout_start = time.time()
-        password_prompt_found = False
-        while not password_prompt_found:
-            self._check_timeout_reached(timeout_start, pane_output, host, window)
-
-            pane_output = window.attached_pane.capture_pane()
-            self._check_connections_errors(window, pane_output, host)
-
-            for text in pane_output:
-                if "password:" in text:
-                    password_prompt_found = True
-                    break
-            time.sleep(0.1)
-
-        if password_prompt_found:
-            window.attached_pane.send_keys(password)
-            self._validate_ssh_session_identity(window, host, pane_output)
-
-    def _validate_ssh_session_identity(
-        self,
-        window: Window,
-        host: SSH_Host,
-        last_pane_output: List[str],
-    ):
-        pane_output = None
-        timeout_start = time.time()
-
-        while True:
-            self._check_timeout_reached(timeout_start, pane_output, host, window)
-
-            pane_output = window.attached_pane.capture_pane()
-            if last_pane_output == pane_output:
-                time.sleep(0.1)
-                continue
-            self._check_connections_errors(window, pane_output, host)
-            break
+        self._handshake(window, host, password)
 
 
 class CustomConnection(ConnectionAbstract):
@@ -179,12 +153,12 @@ class CustomConnection(ConnectionAbstract):
             try:
                 password = self.password_manager.get_password(identity)
             except IdentityException as e:
-                window.kill_window()
+                self._close(window)
                 raise e
             cmd = cmd.replace("${password}", password)
         else:
             cmd = cmd.replace("${password}", "")
-        window.attached_pane.send_keys(cmd)
+        self._pane(window).send_keys(cmd)
 
 
 class SFTPNormalConnection(NormalConnection):
@@ -212,6 +186,68 @@ class ConnectionType(Enum):
     sftp_identity = SFTPIdentityConnection
 
 
+# Size of arguments of single Tmux call, Tmux refuses longer commands (its message
+# to server is limited to 16KB)
+MAX_BATCH_SIZE = 12 * 1024
+
+
+def escape_tmux_arg(value: str) -> str:
+    """
+    Argument ending with ";" would be taken as command separator by Tmux
+    """
+    return value[:-1] + "\\;" if value.endswith(";") else value
+
+
+def window_name(host: SSH_Host, session_name: str) -> str:
+    """
+    Name of host window, without group prefix (already shown as session name)
+    """
+    if host.name.startswith(session_name):
+        return host.name.replace(f"{session_name}-", "")
+    return host.name
+
+
+class WindowBatch:
+    """
+    Builder of Tmux commands creating sessions and windows for single Tmux call
+
+    Every window is appended after last window of its session, so following commands
+    (like options of window) target it as "$", without knowing its index. Tmux prints
+    ids of windows in order they were added
+    """
+
+    def __init__(self, existing_sessions: Set[str]):
+        self.sessions = set(existing_sessions)
+        self.commands: List[List[str]] = []
+        self.windows = 0
+
+    def add_window(
+        self,
+        session_name: str,
+        name: str,
+        command: Optional[str] = None,
+        select: bool = False,
+    ) -> str:
+        """
+        Add window (and its session when it does not exist), returns target of window
+        """
+        target = f"={session_name}:$"
+        args = ["-P", "-F", "#{window_id}", "-n", name]
+        if session_name in self.sessions:
+            new = ["new-window", "-d", "-a", "-t", target] + args
+        else:
+            self.sessions.add(session_name)
+            new = ["new-session", "-d", "-s", session_name] + args
+        self.commands.append(new + [command] if command else new)
+        if select:
+            self.commands.append(["select-window", "-t", target])
+        self.windows += 1
+        return target
+
+    def add(self, commands: List[List[str]]) -> None:
+        self.commands.extend(commands)
+
+
 class Tmux:
     def __init__(self) -> None:
         self.server = libtmux.Server(
@@ -219,6 +255,154 @@ class Tmux:
             socket_path=settings.tmux.TMUX_SOCKET_PATH,
             config_file=settings.tmux.TMUX_CONFIG_FILE,
         )
+        self.registry = HostRegistry.shared or HostRegistry(self.server)
+        # Shared by connections started by this instance, so breaker of unreachable
+        # host short-circuits all of them (and following CLI calls, through file)
+        self.retry = RetryScheduler(
+            Backoff(settings.ssh.SSH_RETRY_BACKOFF, settings.ssh.SSH_RETRY_BACKOFF_MAX),
+            CircuitBreaker(
+                settings.ssh.SSH_RETRY_BREAKER_FAILURES,
+                settings.ssh.SSH_RETRY_BREAKER_COOLDOWN,
+                path=settings.sshtmux.SSHTMUX_BREAKER_FILE,
+            ),
+            settings.ssh.SSH_RETRY_ATTEMPTS,
+            retryable=(SSHUnreachableException,),
+        )
+
+    def command(self) -> List[str]:
+        """
+        Tmux executable with options of sshtmux server (for calls not done by libtmux)
+        """
+        cmd = ["tmux"]
+        if self.server.config_file:
+            cmd.append(f"-f{self.server.config_file}")
+        if self.server.socket_path:
+            cmd.append(f"-S{self.server.socket_path}")
+        if self.server.socket_name:
+            cmd.append(f"-L{self.server.socket_name}")
+        return cmd
+
+    @staticmethod
+    def sequence(commands: List[List[str]]) -> List[str]:
+        """
+        Arguments of single Tmux call running all commands (as command sequence)
+        """
+        args: List[str] = []
+        for command in commands:
+            if args:
+                args.append(";")
+            args.extend(escape_tmux_arg(str(arg)) for arg in command)
+        return args
+
+    @staticmethod
+    def chunks(commands: List[List[str]]) -> List[List[List[str]]]:
+        """
+        Split commands to parts which fit single Tmux call (MAX_BATCH_SIZE)
+        """
+        parts: List[List[List[str]]] = []
+        size = 0
+        for command in commands:
+            command_size = sum(len(str(arg).encode()) + 1 for arg in command) + 2
+            if not parts or size + command_size > MAX_BATCH_SIZE:
+                parts.append([])
+                size = 0
+            parts[-1].append(command)
+            size += command_size
+        return parts
+
+    def batch(self, commands: List[List[str]]):
+        """
+        Run many Tmux commands with single Tmux call (as command sequence), or with
+        few calls when they do not fit single one. Output of all calls is returned
+        """
+        result = None
+        stdout: List[str] = []
+        if commands:
+            self.registry.invalidate()
+        for part in self.chunks(commands):
+            result = self.server.cmd(*self.sequence(part))
+            if result.stderr:
+                raise TMUXException("\n".join(result.stderr))
+            stdout.extend(result.stdout)
+        if result:
+            result.stdout = stdout
+        return result
+
+    def tag_commands(
+        self,
+        target: str,
+        host: SSH_Host,
+        type_connection: ConnectionType,
+        identity: Union[str, None] = None,
+    ) -> List[List[str]]:
+        values = {
+            "host": host.name,
+            "group": host.group,
+            "connection": type_connection.name,
+            "identity": identity or "",
+        }
+        # Pane target of window is its active pane (the one running connection)
+        commands = [
+            ["set-option", scope, "-t", target, option, values[key]]
+            for scope in ["-w", "-p"]
+            for key, option in WINDOW_OPTIONS.items()
+        ]
+        if settings.tmux.TMUX_PANE_LOGGING:
+            commands.append(pipe_pane_command(target, host.name))
+        return commands
+
+    def tag_window(
+        self,
+        window: Window,
+        host: SSH_Host,
+        type_connection: ConnectionType,
+        identity: Union[str, None] = None,
+    ) -> None:
+        self.batch(self.tag_commands(window.window_id, host, type_connection, identity))
+
+    def start_connection(
+        self,
+        type_connection: ConnectionType,
+        window: Window,
+        host: SSH_Host,
+        identity: Union[str, None] = None,
+        ssh_options: str = "",
+        pane: Optional[Pane] = None,
+        kill_on_error: bool = True,
+        retry: bool = True,
+    ) -> bool:
+        connection: ConnectionAbstract = type_connection.value()
+        connection.ssh_options = ssh_options
+        connection.pane = pane
+        connection.kill_on_error = kill_on_error
+        connection.retry = self.retry if retry else None
+        connection.start(window, host, identity)
+        return True
+
+    def new_windows(
+        self,
+        type_connection: ConnectionType,
+        hosts: List[SSH_Host],
+        identity: Union[str, None] = None,
+        overwritten_group: str = None,
+        attach=False,
+    ) -> List[str]:
+        """
+        Create (tagged) windows of hosts, and their missing sessions, with single Tmux
+        call. Returns ids of windows, in order of hosts
+        """
+        batch = WindowBatch(self.registry.sessions())
+        for host in hosts:
+            session_name = overwritten_group or host.group
+            target = batch.add_window(
+                session_name, window_name(host, session_name), select=attach
+            )
+            batch.add(self.tag_commands(target, host, type_connection, identity))
+        result = self.batch(batch.commands)
+        window_ids = result.stdout if result else []
+        if len(window_ids) != batch.windows:
+            raise TMUXException(f"{hosts}\n\n Something went wrong to find windows!")
+        return window_ids
 
     def create_window(
         self,
@@ -228,45 +412,58 @@ class Tmux:
         identity: Union[str, None] = None,
         overwritten_group: str = None,
     ):
-        window = None
-        window_name = host.name
-        session_name = host.group
-        connection: ConnectionAbstract = type_connection.value()
-        if overwritten_group:
-            session_name = overwritten_group
-        session = self.server.find_where({"session_name": session_name})
+        window_ids = self.new_windows(
+            type_connection, [host], identity, overwritten_group, attach
+        )
+        window = Window.from_window_id(self.server, window_ids[0])
+        try:
+            self.start_connection(type_connection, window, host, identity)
+        except KeyboardInterrupt as e:
+            raise TMUXException(str(e))
 
-        if window_name.startswith(session_name):
-            window_name = window_name.replace(f"{session_name}-", "")
+        if attach:
+            window.session.attach()
+        return True
 
-        if not session:
-            self.server.cmd(
-                "new-session", "-d", "-P", "-F#{session_id}", "-s", session_name
+    def create_windows(
+        self,
+        type_connection: ConnectionType,
+        hosts: List[SSH_Host],
+        scheduler: FanoutScheduler,
+        identity: Union[str, None] = None,
+        overwritten_group: str = None,
+        on_result: Optional[Callable[[FanoutResult], None]] = None,
+    ) -> List[FanoutResult]:
+        """
+        Open windows for many hosts at once. All windows (and sessions) are created
+        with single Tmux call, then connections are started in parallel by fan-out
+        scheduler, with limited number of handshakes per bastion
+        """
+        tasks = scheduler.order(scheduler.plan(hosts))
+        valid = [task for task in tasks if not task.error]
+        windows: Dict[int, str] = {}
+        try:
+            window_ids = self.new_windows(
+                type_connection,
+                [task.host for task in valid],
+                identity,
+                overwritten_group,
+            )
+            windows = {id(task): wid for task, wid in zip(valid, window_ids)}
+        except TMUXException as e:
+            for task in valid:
+                task.error = str(e)
+
+        def start(task: FanoutTask) -> bool:
+            return self.start_connection(
+                type_connection,
+                Window.from_window_id(self.server, windows[id(task)]),
+                task.host,
+                identity,
+                task.ssh_options_string(),
             )
-            session = self.server.find_where({"session_name": session_name})
-            if not session:
-                raise TMUXException(f"{host}\n\n Something went wrong to find session!")
-
-            if len(session.windows) == 1:
-                window = session.windows[0].rename_window(window_name)
-            else:
-                raise TMUXException(
-                    f"{host}\n\n Something went wrong to find inicial window!"
-                )
-        else:
-            window = session.new_window(window_name=window_name, attach=attach)
-
-        if window:
-            try:
-                connection.start(window, host, identity)
-            except KeyboardInterrupt as e:
-                raise TMUXException(str(e))
-        else:
-            raise TMUXException(f"{host}\n\n Something went wrong to find window!")
 
-        if attach:
-            session.attach()
-        return True
+        return scheduler.run(tasks, start, on_result)
 
     def attach(self):
         sessions = self.server.list_sessions()
@@ -281,13 +478,12 @@ class Tmux:
         return False
 
     def execute_cmd_tmux(self, cmd, session_name, window_index, panel_index):
-        session = self.server.find_where({"session_name": session_name})
-        if not session:
+        target = f"={session_name}:{window_index}.{panel_index}"
+        result = self.server.cmd(
+            "send-keys", "-t", target, escape_tmux_arg(cmd), "Enter"
+        )
+        if result.stderr:
             print("No Tmux session available")
-            return
-        window = [w for w in session.windows if str(w.index) == str(window_index)][0]
-        panel = [p for p in window.panes if str(p.index) == str(panel_index)][0]
-        panel.send_keys(cmd)
 
     def execute_cmd_shell(self, cmd):
         if not cmd:
@@ -314,33 +510,33 @@ class Tmux:
             return
         self.execute_cmd_tmux(identity, session_name, window_index, panel_index)
 
-    def execute_multi_command(self, session):
+    def execute_multi_command(self, session_name):
         cmd = Prompt.ask("Multi Session Command")
         if not cmd:
             return
-        for window in session.windows:
-            for panel in window.panes:
-                panel.send_keys(cmd)
+        panes = self.registry.load(session_name).panes(session_name)
+        self.batch([["send-keys", "-t", p.pane_id, cmd, "Enter"] for p in panes])
 
     def execute_host_cmd(self, session_name, window_index, panel_index, cmd_ref):
         cmd = None
-        session = self.server.find_where({"session_name": session_name})
-        if not session:
+        pane = self.registry.lookup(session_name, window_index, panel_index)
+        if not pane:
             print("No Tmux session available")
             return
 
-        window = [w for w in session.windows if str(w.index) == str(window_index)][0]
-        if session_name in [
+        if pane.host:
+            hostname = pane.host
+        elif session_name in [
             FAST_CONNECTIONS_GROUP_NAME,
             FAST_SESSIONS_NAME,
             SSH_Config.DEFAULT_GROUP_NAME,
         ]:
-            hostname = window.name
+            # Windows opened before connections were tagged
+            hostname = pane.window_name
+        elif not pane.window_name.startswith(f"{session_name}-"):
+            hostname = f"{session_name}-{pane.window_name}"
         else:
-            if not window.name.startswith(f"{session_name}-"):
-                hostname = f"{session_name}-{window.name}"
-            else:
-                hostname = window.name
+            hostname = pane.window_name
 
         if cmd_ref == SFTP_CLI:
             cmd = (
@@ -351,4 +547,4 @@ class Tmux:
             self.execute_cmd_shell(cmd)
 
         if cmd_ref == MULTICOMMNAD_CLI:
-            self.execute_multi_command(session)
+            self.execute_multi_command(session_name)
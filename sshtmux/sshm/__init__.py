@@ -1,9 +1,12 @@
 from .ssh_config import SSH_Config  # noqa: F401
 from .ssh_group import SSH_Group  # noqa: F401
 from .ssh_host import SSH_Host  # noqa: F401
+from .ssh_resolver import SSH_Resolver  # noqa: F401
+from .ssh_topology import SSH_Topology  # noqa: F401
 from .ssh_parameters import *  # noqa: F401, F403
 from .ssh_parameters import *  # noqa: F401, F403
 from .ssh_graph import generate_graph  # noqa: F401
+from .ssh_export import export_config  # noqa: F401
 from .sshutils import (
     complete_params,  # noqa: F401
     complete_ssh_group_names,  # noqa: F401
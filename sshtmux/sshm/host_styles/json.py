@@ -1,4 +1,5 @@
 import json
+from dataclasses import asdict
 
 from rich.json import JSON
 
@@ -9,5 +10,5 @@ from ..ssh_host import SSH_Host
 # Render host data as JSON output
 # ------------------------------------------------------------------------------
 def render(host: SSH_Host):
-    host_json = json.dumps(host.__dict__)
+    host_json = json.dumps(asdict(host))
     return JSON(host_json)
@@ -1,16 +1,21 @@
 import copy
 import fnmatch
+import functools
 import logging
 import os
 import re
+import shutil
+import sys
+import tempfile
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from rich import print
 
 from ..core.config import settings
 from .ssh_group import SSH_Group
-from .ssh_host import SSH_Host
+from .ssh_host import InheritedParams, SSH_Host
+from .ssh_resolver import MULTI_VALUE_KEYWORDS, EffectiveParams, SSH_Resolver
 
 logging.basicConfig(level=logging.INFO)
 
@@ -45,6 +50,14 @@ class SSH_Config:
         self.current_group: str = self.DEFAULT_GROUP_NAME
         self.current_host: Optional[SSH_Host] = None
         self.current_host_info: list = []
+        # Pool of parsed strings, so same values are stored only once for all hosts
+        self._strings: Dict[str, str] = {}
+        # Host and Match blocks in order they are in config file (order of groups and
+        # hosts above is not the same for files not written by SSHTmux)
+        self.block_order: List[SSH_Host] = []
+
+        # Effective (OpenSSH) configuration of hosts, computed on demand
+        self.resolver = SSH_Resolver(self)
 
     @property
     def groups_sorted(self):
@@ -92,6 +105,21 @@ class SSH_Config:
         # Reset "cache" since we flushed host info
         self.current_host = None
 
+    @classmethod
+    def host_type(cls, name: str) -> str:
+        """
+        Type of "Host" block by its name: global pattern, pattern (any wildcard or
+        negation, as in OpenSSH patterns) or normal host
+        """
+        if name == cls.GLOBAL_PATTERN_HOST_NAME:
+            return "global_pattern"
+        if any(c in name for c in "*?!"):
+            return "pattern"
+        return "normal"
+
+    def _share_string(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
     def _sort_groups(self):
         base_groups_list = [self.DEFAULT_GROUP_NAME, self.GLOBAL_PATTERN_GROUP_NAME]
         base_groups = [g for g in self.groups if g.name in base_groups_list]
@@ -178,7 +206,7 @@ class SSH_Config:
                     logging.debug(
                         f"META: Host comment found '{value}' Caching for next host definition...'"
                     )
-                    self.current_host_info.append(value)
+                    self.current_host_info.append(self._share_string(value))
                     continue
 
                 else:
@@ -212,14 +240,10 @@ class SSH_Config:
                     group = self.GLOBAL_PATTERN_GROUP_NAME
                 elif keyword_lower == "match":
                     host_type = "match"
-                elif value == "*":
-                    host_type = "global_pattern"
-                    group = self.GLOBAL_PATTERN_GROUP_NAME
-                elif "*" in value:
-                    host_type = "pattern"
-                    group = self.GLOBAL_PATTERN_GROUP_NAME
                 else:
-                    host_type = "normal"
+                    host_type = self.host_type(value)
+                    if host_type != "normal":
+                        group = self.GLOBAL_PATTERN_GROUP_NAME
 
                 logging.debug(f"Host '{value}' is '{host_type}' type!")
 
@@ -229,6 +253,7 @@ class SSH_Config:
                     type=host_type,
                     info=self.current_host_info,
                 )
+                self.block_order.append(self.current_host)
                 # Reset global host info cache when we find new host (from this line, any host comments will apply to next host)
                 self.current_host_info = []
                 continue
@@ -244,20 +269,77 @@ class SSH_Config:
                     logging.debug(
                         f"Config keyword for host '{self.current_host}': {keyword} -> {value}"
                     )
-                    self.current_host.params[keyword] = value
+                    keyword = sys.intern(keyword)
+                    value = self._share_string(value)
+                    params = self.current_host.params
+                    stored_keyword = params.key_of(keyword)
+                    if stored_keyword is None:
+                        params[keyword] = value
+                    elif keyword.lower() in MULTI_VALUE_KEYWORDS:
+                        # Repeated keyword (like "IdentityFile"), keep all values in order
+                        # under spelling of first occurrence
+                        if not isinstance(params[stored_keyword], list):
+                            params[stored_keyword] = [params[stored_keyword]]
+                        params[stored_keyword].append(value)
+                    else:
+                        # Same as OpenSSH, first value of other keywords is used
+                        logging.debug(
+                            f"Repeated keyword '{keyword}' of host '{self.current_host}' ignored"
+                        )
                     continue
 
         # Last entries must be flushed manually as there are no new "hosts" to trigger storing parsed data into config struct
         self._config_flush_host()
 
+        # Hosts inheriting from the same patterns share one list
+        shared_inherited: Dict[Tuple[int, ...], List[Tuple[str, dict]]] = {}
         for group in self.groups:
             for host in group.hosts:
                 if host.type == "normal":
-                    host.inherited_params = self.find_inherited_params(host.name)
+                    inherited = self.find_inherited_params(host.name)
+                    key = tuple(id(params) for _, params in inherited)
+                    host.inherited_params = shared_inherited.setdefault(key, inherited)
 
         self._sort_groups()
+        self.invalidate_cache()
         return self
 
+    def _inherited_matches(self, host: SSH_Host) -> List[Tuple[str, dict]]:
+        return [
+            (block.host.name, block.host.params)
+            for block in self.resolver.applied_blocks(host.name)
+            if block.host.type in ["match", "global_match"]
+        ]
+
+    def invalidate_cache(self) -> None:
+        """
+        Drop cached effective configuration, must be called when hosts or their
+        parameters are modified (generating config invalidates it as well)
+        """
+        self.resolver.invalidate()
+
+        # "Match" blocks are inherited as well, when they apply to host. They are
+        # evaluated by resolver only when inherited params of host are read, so
+        # listing hosts does not evaluate them (and run "Match exec" commands).
+        # Hosts added since last call get them too, others are evaluated again
+        has_matches = any(group.matches for group in self.groups)
+        for group in self.groups:
+            for host in group.hosts:
+                if isinstance(host.inherited_params, InheritedParams):
+                    host.inherited_params.reset()
+                elif has_matches and host.type == "normal":
+                    host.inherited_params = InheritedParams(
+                        host.inherited_params,
+                        functools.partial(self._inherited_matches, host),
+                    )
+
+    def effective_params(self, name: str) -> EffectiveParams:
+        """
+        Return effective parameters for host name, with OpenSSH precedence
+        (see SSH_Resolver), keywords are in lower-case
+        """
+        return self.resolver.resolve(name)
+
     def generate_ssh_config(self):
         """
         SSH config generation function
@@ -284,6 +366,8 @@ class SSH_Config:
 
         # Render all groups
         self._sort_groups()
+        self.invalidate_cache()
+        block_order: List[SSH_Host] = []
         for group in self.groups:
             if group.name == self.GLOBAL_PATTERN_GROUP_NAME and (
                 len(group.patterns) == 0 and len(group.matches) == 0
@@ -313,7 +397,7 @@ class SSH_Config:
                 lines.append(f"#{'-'*79}\n")  # add horizontal decoration line
 
             # Append hosts and patterns items from group
-            for host in group.all_hosts:
+            for host in group.iter_all_hosts():
                 # If there is host-info assigned to host, add it before adding "host" definition
                 for host_info in host.info:
                     lines.append(
@@ -327,6 +411,7 @@ class SSH_Config:
                     keyword = "Host"
 
                 lines.append(f"{keyword} {host.name}\n")
+                block_order.append(host)
 
                 # Add all assigned host params
                 for token, value in host.params.items():
@@ -343,6 +428,7 @@ class SSH_Config:
 
         # Store output lines
         self.ssh_config_lines = lines
+        self.block_order = block_order
         return self
 
     def write_out(self) -> None:
@@ -351,9 +437,24 @@ class SSH_Config:
         """
         if self.stdout:
             print("".join(self.ssh_config_lines))
-        else:
-            with open(self.ssh_config_file, "w") as out:
+            return
+
+        # Write into temporary file next to the target and replace target with it,
+        # so readers never see partially written configuration. Symlinked config
+        # (like from dotfiles repository) is resolved, so the link is kept
+        target = os.path.realpath(self.ssh_config_file)
+        config_dir = os.path.dirname(target) or "."
+        fd, tmp_file = tempfile.mkstemp(prefix=".sshtmux-", dir=config_dir)
+        try:
+            with os.fdopen(fd, "w") as out:
                 out.writelines(self.ssh_config_lines)
+            if os.path.exists(target):
+                shutil.copymode(target, tmp_file)
+            os.replace(tmp_file, target)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
 
     def check_group_by_name(self, name: str) -> bool:
         """
@@ -391,8 +492,7 @@ class SSH_Config:
                 exit(1)
 
         for group in self.groups:
-            all_hosts = group.all_hosts
-            for host in all_hosts:
+            for host in group.iter_all_hosts():
                 if host.name == name:
                     return True
         return False
@@ -404,22 +504,42 @@ class SSH_Config:
         function will either return ('None','None') or will throw exception
         """
         for group in self.groups:
-            all_hosts = group.all_hosts
-            for host in all_hosts:
+            for host in group.iter_all_hosts():
                 if host.name == name:
                     return host, group
         raise Exception(f"Requested host '{name}' not found in the SSH configuration")
 
+    def get_host_index(self) -> Dict[str, Tuple[SSH_Host, SSH_Group]]:
+        """
+        Return dictionary of all hosts by their name, with their assigned group.
+        Useful when many hosts are looked up at once, as each lookup is then constant time
+        """
+        index: Dict[str, Tuple[SSH_Host, SSH_Group]] = {}
+        for group in self.groups:
+            for host in group.iter_all_hosts():
+                index.setdefault(host.name, (host, group))
+        return index
+
+    def remove_hosts(self, hosts: Iterable[Tuple[SSH_Host, SSH_Group]]) -> None:
+        """
+        Remove many hosts from their groups at once, each group list is rebuilt only once
+        """
+        removed: Dict[int, Tuple[SSH_Group, set]] = {}
+        for host, group in hosts:
+            removed.setdefault(id(group), (group, set()))[1].add(id(host))
+
+        for group, host_ids in removed.values():
+            group.hosts = [h for h in group.hosts if id(h) not in host_ids]
+            group.patterns = [h for h in group.patterns if id(h) not in host_ids]
+            group.matches = [h for h in group.matches if id(h) not in host_ids]
+        self.invalidate_cache()
+
     def get_all_host_names(self) -> List[str]:
         """
         Return all host names from current configuration
         Useful for auto-completion, or for quick checking if name already exists
         """
-        all_hosts: List[str] = []
-        for group in self.groups:
-            for host in group.all_hosts:
-                all_hosts.append(host.name)
-        return all_hosts
+        return [host.name for group in self.groups for host in group.iter_all_hosts()]
 
     def get_all_group_names(self) -> List[str]:
         """
@@ -452,6 +572,7 @@ class SSH_Config:
         non-matching items removed.
         """
         filtered_groups: List[SSH_Group] = []
+        name_re = re.compile(name_filter) if name_filter else None
         for group in self.groups:
             # If group filter is defined, check if current group matches the name to progress
             if group_filter:
@@ -460,27 +581,40 @@ class SSH_Config:
                     continue
 
             # When group is not skipped, check if name filter is used, and filter out groups
-            if name_filter:
+            if name_re:
                 # Make a new copy of group, so we dont mess original config
                 group_copy = copy.copy(group)
-                group_copy.hosts = []
-                group_copy.patterns = []
-                include_group = False
-
-                for host in group.all_hosts:
-                    match = re.search(name_filter, host.name)
-                    if match:
-                        include_group = True
-                        if host.type == "normal":
-                            group_copy.hosts.append(host)
-                        else:
-                            group_copy.patterns.append(host)
-                if include_group:
+                group_copy.hosts = [h for h in group.hosts if name_re.search(h.name)]
+                group_copy.patterns = [
+                    h for h in group.patterns if name_re.search(h.name)
+                ]
+                group_copy.matches = [
+                    h for h in group.matches if name_re.search(h.name)
+                ]
+                if group_copy.hosts_count > 0:
                     filtered_groups.append(group_copy)
             else:
                 filtered_groups.append(group)
         return filtered_groups
 
+    def iter_hosts(
+        self, group_filter: str = "", name_filter: str = ""
+    ) -> Iterator[Tuple[SSH_Group, SSH_Host]]:
+        """
+        Lazily yields (group, host) pairs that satisfy optional group and name regex.
+        Unlike 'filter_config', no group copies are made, so callers streaming
+        output over very large configurations keep memory usage constant.
+        """
+        group_re = re.compile(group_filter) if group_filter else None
+        name_re = re.compile(name_filter) if name_filter else None
+        for group in self.groups:
+            if group_re and not group_re.search(group.name):
+                continue
+            for host in group.iter_all_hosts():
+                if name_re and not name_re.search(host.name):
+                    continue
+                yield group, host
+
     def move_host_to_group(
         self, found_host: SSH_Host, found_group: SSH_Group, target_group: SSH_Group
     ) -> None:
@@ -490,12 +624,13 @@ class SSH_Config:
         if found_host.type == "normal":
             target_group.hosts.append(found_host)
             found_group.hosts.remove(found_host)
-        if found_host.type == "match":
+        elif found_host.type == "match":
             target_group.matches.append(found_host)
             found_group.matches.remove(found_host)
         else:
             target_group.patterns.append(found_host)
             found_group.patterns.remove(found_host)
+        self.invalidate_cache()
 
     def validate_name(self, name):
         if not settings.ssh.SSH_VALIDATE_SSHCONFIG:
@@ -504,9 +639,9 @@ class SSH_Config:
         if not (3 <= len(name) <= 50):
             return False, "The name must be between 3 and 50 characters."
 
-        if not re.match(r"^[a-zA-Z0-9_\%\.\-\*]+$", name):
+        if not re.match(r"^[a-zA-Z0-9_\%\.\-\*\?]+$", name):
             return (
                 False,
-                "The name cannot contain special characters. Except (%), (.), (-), (*)",
+                "The name cannot contain special characters. Except (%), (.), (-), (*), (?)",
             )
         return True, None
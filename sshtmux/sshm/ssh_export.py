@@ -0,0 +1,237 @@
+import csv
+import json
+import re
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from .ssh_config import SSH_Config
+from .ssh_group import SSH_Group
+from .ssh_host import SSH_Host
+from .ssh_keywords import keyword_id
+from .ssh_resolver import SSH_Resolver
+
+EXPORT_FORMATS = ["ndjson", "json", "csv"]
+
+# Fields that can be projected from host model, additionally any single parameter
+# can be requested with "param:<keyword>" field (value resolved with inheritance)
+EXPORT_FIELDS = [
+    "name",
+    "group",
+    "type",
+    "info",
+    "params",
+    "inherited_params",
+    "effective_params",
+]
+DEFAULT_FIELDS = {
+    "ndjson": EXPORT_FIELDS,
+    "json": EXPORT_FIELDS,
+    "csv": ["name", "group", "type", "param:hostname", "param:user", "param:port"],
+}
+PARAM_FIELD_PREFIX = "param:"
+
+
+def parse_fields(fields: Optional[str], fmt: str) -> List[str]:
+    """
+    Parse comma separated list of fields to export, and validate it.
+    When no fields are given, default fields for output format are returned
+    """
+    if not fields:
+        return list(DEFAULT_FIELDS[fmt])
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    for field in selected:
+        if field.startswith(PARAM_FIELD_PREFIX) and len(field) > len(
+            PARAM_FIELD_PREFIX
+        ):
+            continue
+        if field not in EXPORT_FIELDS:
+            raise ValueError(
+                f"Unknown export field '{field}'. Use one of: {','.join(EXPORT_FIELDS)} or 'param:<keyword>'"
+            )
+    return selected
+
+
+def resolve_param(
+    host: SSH_Host, param: str, resolver: Optional[SSH_Resolver] = None
+) -> Any:
+    """
+    Return value for parameter, direct host params have precedence over inherited ones.
+    Keyword is matched case-insensitive, returns None if parameter is not defined.
+    With resolver, values of normal hosts are resolved as OpenSSH would do
+    """
+    if resolver and host.type == "normal":
+        return resolver.get(host.name, param)
+
+    if param in host.params:
+        return host.params[param]
+    for _, i_params in host.inherited_params:
+        if param in i_params:
+            return i_params[param]
+    return None
+
+
+def host_record(
+    host: SSH_Host,
+    group: SSH_Group,
+    fields: List[str],
+    resolver: Optional[SSH_Resolver] = None,
+) -> Dict:
+    """
+    Create plain (JSON serializable) record of host with only requested fields
+    """
+    record: Dict[str, Any] = {}
+    for field in fields:
+        if field == "group":
+            # Use group where host is stored, patterns keep their own "group" marker
+            record[field] = group.name
+        elif field == "inherited_params":
+            record[field] = [
+                {"pattern": pattern, "params": params}
+                for pattern, params in host.inherited_params
+            ]
+        elif field == "effective_params":
+            if resolver and host.type == "normal":
+                params = resolver.resolve(host.name)
+            else:
+                params = host.get_all_params()
+            # Keywords in canonical spelling, same for all host types
+            record[field] = {keyword_id(k): value for k, value in params.items()}
+        elif field.startswith(PARAM_FIELD_PREFIX):
+            record[field] = resolve_param(
+                host, field[len(PARAM_FIELD_PREFIX) :], resolver
+            )
+        else:
+            record[field] = getattr(host, field)
+    return record
+
+
+def iter_records(
+    config: SSH_Config,
+    fields: List[str],
+    group_filter: str = "",
+    name_filter: str = "",
+) -> Iterator[Tuple[SSH_Group, Dict]]:
+    for group, host in config.iter_hosts(group_filter, name_filter):
+        yield group, host_record(host, group, fields, config.resolver)
+
+
+def export_ndjson(
+    config: SSH_Config,
+    out: IO[str],
+    fields: List[str],
+    group_filter: str = "",
+    name_filter: str = "",
+) -> int:
+    count = 0
+    for _, record in iter_records(config, fields, group_filter, name_filter):
+        out.write(json.dumps(record))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def _csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def export_csv(
+    config: SSH_Config,
+    out: IO[str],
+    fields: List[str],
+    group_filter: str = "",
+    name_filter: str = "",
+) -> int:
+    count = 0
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    for _, record in iter_records(config, fields, group_filter, name_filter):
+        writer.writerow([_csv_value(record[f]) for f in fields])
+        count += 1
+    return count
+
+
+def export_json(
+    config: SSH_Config,
+    out: IO[str],
+    fields: List[str],
+    group_filter: str = "",
+    name_filter: str = "",
+) -> int:
+    """
+    Writes whole configuration as single JSON document. Document is written
+    incrementally, group by group and host by host, so it is never held in memory.
+    Groups without hosts are included, unless hosts are filtered by name
+    """
+    count = 0
+    group_re = re.compile(group_filter) if group_filter else None
+    name_re = re.compile(name_filter) if name_filter else None
+
+    out.write(f'{{"opts": {json.dumps(config.opts)}, "groups": [')
+    first_group = True
+    for group in config.groups:
+        if group_re and not group_re.search(group.name):
+            continue
+
+        first_host = True
+        for host in group.iter_all_hosts():
+            if name_re and not name_re.search(host.name):
+                continue
+            if first_host:
+                out.write("" if first_group else ", ")
+                out.write(_json_group_head(group))
+                first_group = False
+            else:
+                out.write(", ")
+            first_host = False
+            out.write(json.dumps(host_record(host, group, fields, config.resolver)))
+            count += 1
+
+        if first_host and name_re:
+            continue
+        if first_host:
+            out.write("" if first_group else ", ")
+            out.write(_json_group_head(group))
+            first_group = False
+        out.write("]}")
+
+    out.write("]}\n")
+    return count
+
+
+def _json_group_head(group: SSH_Group) -> str:
+    return (
+        f'{{"name": {json.dumps(group.name)}, "desc": {json.dumps(group.desc)}, '
+        f'"info": {json.dumps(group.info)}, "hosts": ['
+    )
+
+
+EXPORTERS = {
+    "ndjson": export_ndjson,
+    "json": export_json,
+    "csv": export_csv,
+}
+
+
+def export_config(
+    config: SSH_Config,
+    out: IO[str],
+    fmt: str = "ndjson",
+    fields: Optional[List[str]] = None,
+    group_filter: str = "",
+    name_filter: str = "",
+) -> int:
+    """
+    Export parsed SSH configuration in machine-readable format, returns number
+    of exported hosts
+    """
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    if fields is None:
+        fields = list(DEFAULT_FIELDS[fmt])
+    return EXPORTERS[fmt](
+        config, out, fields, group_filter=group_filter, name_filter=name_filter
+    )
@@ -1,10 +1,11 @@
 from dataclasses import dataclass, field
-from typing import List
+from itertools import chain
+from typing import Iterator, List
 
 from .ssh_host import SSH_Host
 
 
-@dataclass
+@dataclass(slots=True)
 class SSH_Group:
     """Class for SSH Group config structure"""
 
@@ -19,8 +20,19 @@ class SSH_Group:
 
     @property
     def all_hosts(self):
+        """
+        New list with hosts, patterns and matches of group. When list is only
+        iterated over, use "iter_all_hosts", which does not copy anything
+        """
         return self.hosts + self.patterns + self.matches
 
+    def iter_all_hosts(self) -> Iterator[SSH_Host]:
+        return chain(self.hosts, self.patterns, self.matches)
+
+    @property
+    def hosts_count(self) -> int:
+        return len(self.hosts) + len(self.patterns) + len(self.matches)
+
     def deep_filter(self, value: str) -> bool:
         """
         Method returns bool value
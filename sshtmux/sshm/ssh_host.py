@@ -1,20 +1,101 @@
 import importlib
 import socket
 from dataclasses import dataclass, field
-from typing import Dict, Literal, Tuple
+from typing import Callable, Dict, Iterable, List, Literal, Optional, Tuple
 
 from rich.console import Console
 
 from ..core.config import settings
+from .ssh_keywords import SSH_Params, keyword_id
 
 console = Console()
 
 DEBUG_STYLES = False
 
 
-@dataclass
+class InheritedParams(list):
+    """
+    Inherited parameters of host, where some of them are known only once they
+    are read. Entries given at creation (patterns) come first, followed by
+    entries returned by "load" (applied "Match" blocks), which is called on first
+    read (so "Match exec" commands run only for hosts that are inspected), and
+    again after "reset"
+    """
+
+    __slots__ = ("_load", "_size", "_pending")
+
+    def __init__(
+        self,
+        items: Iterable = (),
+        load: Optional[Callable[[], List[Tuple[str, dict]]]] = None,
+    ):
+        super().__init__(items)
+        self._load = load
+        self._size = super().__len__()
+        self._pending = load is not None
+
+    def _loaded(self) -> None:
+        if self._pending:
+            self._pending = False
+            self.extend(self._load())
+
+    @property
+    def patterns(self) -> List[Tuple[str, dict]]:
+        """
+        Entries given at creation, read without loading the others
+        """
+        return super().__getitem__(slice(self._size))
+
+    def reset(self) -> None:
+        """
+        Drop loaded entries, they are loaded again on next read
+        """
+        del self[self._size :]
+        self._pending = self._load is not None
+
+    def __iter__(self):
+        self._loaded()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self._loaded()
+        return super().__len__()
+
+    def __getitem__(self, index):
+        self._loaded()
+        return super().__getitem__(index)
+
+    def __contains__(self, item) -> bool:
+        self._loaded()
+        return super().__contains__(item)
+
+    def __add__(self, other) -> list:
+        return list(self) + list(other)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == other
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def __reduce_ex__(self, protocol):
+        # Copies (and pickles) are loaded
+        return (InheritedParams, (list(self),))
+
+
+@dataclass(slots=True)
 class SSH_Host:
-    """Class for SSH host config structure"""
+    """
+    Class for SSH host config structure
+
+    Class is slotted, as big configurations hold many thousands of hosts. Keyword
+    and value strings are shared between hosts by parser, and hosts that inherit from
+    the same patterns share single "inherited_params" list (it must not be modified).
+    Parameters are kept in "SSH_Params" dictionary, so keywords are case-insensitive
+    """
 
     name: str
     group: str
@@ -22,20 +103,30 @@ class SSH_Host:
         "normal"
     )
     info: list = field(default_factory=list)
-    params: dict = field(default_factory=dict)
+    params: dict = field(default_factory=SSH_Params)
 
     inherited_params: list = field(default_factory=list)
     print_style: str = settings.sshtmux.SSHTMUX_HOST_STYLE
 
+    def __post_init__(self):
+        if not isinstance(self.params, SSH_Params):
+            self.params = SSH_Params(self.params)
+
     def get_all_params(self) -> Dict[str, str]:
         """
         Method combines configured host parameters with all
-        host inherited parameters, and returns them as dictionary
+        host inherited parameters, and returns them as dictionary.
+        First obtained value wins (keywords are case-insensitive), own params are
+        taken first. For exact OpenSSH semantics use "SSH_Config.effective_params"
         """
-        return {
-            **self.params,
-            **{k: v for d in self.inherited_params for k, v in d[1].items()},
-        }
+        all_params: Dict[str, str] = {}
+        seen = set()
+        for params in [self.params] + [p for _, p in self.inherited_params]:
+            for keyword, value in params.items():
+                if keyword_id(keyword) not in seen:
+                    seen.add(keyword_id(keyword))
+                    all_params[keyword] = value
+        return all_params
 
     def get_target(self) -> str:
         """
@@ -43,7 +134,7 @@ class SSH_Host:
         If name is just alias, and host has defined "hostname" then hostname will be returned
         When there is no hostname, only host name is returned
         """
-        return self.name if "hostname" not in self.params else self.params["hostname"]
+        return self.params.get("hostname", self.name)
 
     def resolve_target(self) -> Tuple[str, bool]:
         """
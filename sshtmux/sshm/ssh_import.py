@@ -0,0 +1,296 @@
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from .ssh_config import SSH_Config
+from .ssh_group import SSH_Group
+from .ssh_host import SSH_Host
+from .ssh_keywords import SSH_Params, keyword_id
+from .sshutils import check_ssh_params_batch
+
+IMPORT_FORMATS = ["ndjson", "json", "csv"]
+IMPORT_FORMAT_EXTENSIONS = {
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".json": "json",
+    ".csv": "csv",
+}
+
+# CSV columns with special meaning, any other column is treated as SSH parameter
+# (optionally prefixed with "param:", as written by "sshm export")
+CSV_HOST_COLUMNS = ["name", "group", "type", "info"]
+PARAM_COLUMN_PREFIX = "param:"
+
+
+@dataclass
+class ImportRecord:
+    """Host definition loaded from import file"""
+
+    name: str
+    # Not set when import does not have group, existing host stays in its group
+    group: Optional[str] = None
+    info: Optional[List[str]] = None
+    params: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ImportChange:
+    """Changes that import will apply on already existing host"""
+
+    record: ImportRecord
+    host: SSH_Host
+    group: SSH_Group
+    params: Dict[str, Tuple[Optional[str], str]] = field(default_factory=dict)
+    info: bool = False
+    move: bool = False
+
+
+@dataclass
+class ImportPlan:
+    """Result of comparing import records with current configuration"""
+
+    creates: List[ImportRecord] = field(default_factory=list)
+    updates: List[ImportChange] = field(default_factory=list)
+    deletes: List[Tuple[SSH_Host, SSH_Group]] = field(default_factory=list)
+    unchanged: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.creates or self.updates or self.deletes)
+
+
+def detect_format(filename: str) -> Optional[str]:
+    for extension, fmt in IMPORT_FORMAT_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return fmt
+    return None
+
+
+def _record_from_dict(data: Dict, default_group: Optional[str] = None) -> Dict:
+    return {
+        "name": data.get("name"),
+        "group": data.get("group") or default_group,
+        "type": data.get("type"),
+        "info": data.get("info"),
+        "params": data.get("params") or {},
+    }
+
+
+def _load_json(fh: IO[str]) -> Iterator[Dict]:
+    document = json.load(fh)
+    if isinstance(document, list):
+        for data in document:
+            yield _record_from_dict(data)
+        return
+
+    # Document as written by "sshm export -f json"
+    for group in document.get("groups", []):
+        for data in group.get("hosts", []):
+            yield _record_from_dict(data, group.get("name"))
+
+
+def _load_ndjson(fh: IO[str]) -> Iterator[Dict]:
+    for line in fh:
+        line = line.strip()
+        if line:
+            yield _record_from_dict(json.loads(line))
+
+
+def _load_csv(fh: IO[str]) -> Iterator[Dict]:
+    for row in csv.DictReader(fh):
+        info = row.get("info")
+        if info:
+            info = json.loads(info) if info.startswith("[") else [info]
+        params = {}
+        for column, value in row.items():
+            if column in CSV_HOST_COLUMNS or not value:
+                continue
+            if column.startswith(PARAM_COLUMN_PREFIX):
+                column = column[len(PARAM_COLUMN_PREFIX) :]
+            params[column] = value
+        yield {
+            "name": row.get("name"),
+            "group": row.get("group") or None,
+            "type": row.get("type"),
+            "info": info or None,
+            "params": params,
+        }
+
+
+LOADERS = {
+    "ndjson": _load_ndjson,
+    "json": _load_json,
+    "csv": _load_csv,
+}
+
+
+def load_records(
+    config: SSH_Config, fh: IO[str], fmt: str
+) -> Tuple[List[ImportRecord], List[Tuple[str, str]]]:
+    """
+    Load and validate host definitions from file, returns list of valid records,
+    and list of (name, error message) tuples for records which are not valid
+    """
+    if fmt not in LOADERS:
+        raise ValueError(f"Unknown import format '{fmt}'")
+
+    records: List[ImportRecord] = []
+    errors: List[Tuple[str, str]] = []
+    seen = set()
+
+    for index, data in enumerate(LOADERS[fmt](fh), start=1):
+        name = (data["name"] or "").strip()
+        if not name:
+            errors.append((f"#{index}", "Host name is missing"))
+            continue
+        if name in seen:
+            errors.append((name, "Host is defined more than once"))
+            continue
+        seen.add(name)
+
+        if data["type"] and data["type"] not in ["normal", "pattern"]:
+            # Export writes all hosts, Match blocks and global pattern are left as they are
+            logging.warning(
+                f"{name}: host type '{data['type']}' is not imported, skipped"
+            )
+            continue
+
+        is_valid_name, message = config.validate_name(name)
+        if not is_valid_name:
+            errors.append((name, message))
+            continue
+
+        info = data["info"]
+        if isinstance(info, str):
+            info = [info]
+
+        records.append(
+            ImportRecord(
+                name=name,
+                group=data["group"],
+                info=info,
+                # Keywords are validated in canonical spelling (export can use any)
+                params={keyword_id(str(k)): str(v) for k, v in data["params"].items()},
+            )
+        )
+
+    # Validate parameters of all hosts at once, shared values are validated only once
+    valid_records: List[ImportRecord] = []
+    results = check_ssh_params_batch([record.params for record in records])
+    for record, (valid_params, param_errors) in zip(records, results):
+        if param_errors:
+            errors.extend((record.name, error.strip()) for error in param_errors)
+            continue
+        record.params = valid_params
+        valid_records.append(record)
+
+    return valid_records, errors
+
+
+def plan_import(
+    config: SSH_Config, records: List[ImportRecord], delete_missing: bool = False
+) -> ImportPlan:
+    """
+    Compare import records with current configuration and prepare plan with all
+    hosts to create, update or delete. Configuration is not modified
+    """
+    plan = ImportPlan()
+
+    # Index current configuration once, so each record lookup is constant time
+    existing = config.get_host_index()
+    imported_groups = set()
+
+    for record in records:
+        if record.name not in existing:
+            # New host without group goes to default group
+            record.group = record.group or config.DEFAULT_GROUP_NAME
+            imported_groups.add(record.group)
+            plan.creates.append(record)
+            continue
+
+        host, group = existing[record.name]
+        imported_groups.add(record.group or group.name)
+        if host.type not in ["normal", "pattern"]:
+            plan.errors.append((record.name, f"Host type '{host.type}' is read-only"))
+            continue
+
+        change = ImportChange(record=record, host=host, group=group)
+        change.move = record.group is not None and record.group != group.name
+        change.info = record.info is not None and record.info != host.info
+        for keyword, value in record.params.items():
+            current_value = host.params.get(keyword)
+            if current_value != value:
+                change.params[keyword] = (current_value, value)
+
+        if change.move or change.info or change.params:
+            plan.updates.append(change)
+        else:
+            plan.unchanged += 1
+
+    if delete_missing:
+        # Only normal hosts from groups which are present in import are synced,
+        # other groups, and group patterns, are not touched
+        imported_names = {record.name for record in records}
+        for group in config.groups:
+            if group.name not in imported_groups:
+                continue
+            for host in group.hosts:
+                if host.name not in imported_names:
+                    plan.deletes.append((host, group))
+
+    return plan
+
+
+def _get_or_create_group(config: SSH_Config, name: str) -> SSH_Group:
+    for group in config.groups:
+        if group.name == name:
+            return group
+    group = SSH_Group(name=name)
+    config.groups.append(group)
+    return group
+
+
+def apply_import(config: SSH_Config, plan: ImportPlan) -> None:
+    """
+    Apply import plan on configuration (in memory). Writing configuration to
+    file is left to caller, so all changes are written at once
+    """
+    config.remove_hosts(plan.deletes)
+
+    for change in plan.updates:
+        host = change.host
+        if change.move:
+            target_group = _get_or_create_group(config, change.record.group)
+            config.move_host_to_group(host, change.group, target_group)
+            if host.type == "normal":
+                host.group = target_group.name
+        if change.info:
+            host.info = list(change.record.info)
+        for keyword, (_, value) in change.params.items():
+            # Keyword in different spelling is replaced
+            host.params[keyword] = value
+
+    for record in plan.creates:
+        host_type = config.host_type(record.name)
+        if host_type == "global_pattern":
+            group = config.global_pattern_group
+        else:
+            group = _get_or_create_group(config, record.group)
+        # Same as in parsing, patterns are stored in group but marked as global
+        host_group = group.name
+        if host_type != "normal":
+            host_group = config.GLOBAL_PATTERN_GROUP_NAME
+        host = SSH_Host(
+            name=record.name,
+            group=host_group,
+            type=host_type,
+            info=list(record.info or []),
+            params=SSH_Params(record.params),
+        )
+        if host_type == "normal":
+            group.hosts.append(host)
+        else:
+            group.patterns.append(host)
@@ -0,0 +1,136 @@
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from .ssh_parameters import SSHParams
+
+# Canonical OpenSSH keyword spelling, generated from "SSHParams" annotations and
+# looked up by lower-case keyword
+KEYWORD_IDS: Dict[str, str] = {
+    keyword.lower(): keyword for keyword in SSHParams.__annotations__
+}
+
+# Up to this many parameters, stored keywords are scanned instead of indexed
+# (most hosts have only few parameters, and index would double their memory)
+INDEX_THRESHOLD = 8
+
+
+def keyword_id(keyword: str) -> str:
+    """
+    Return canonical ID of SSH keyword (case-insensitive), unknown keywords are
+    identified by their lower-case spelling
+    """
+    lower = keyword.lower()
+    return KEYWORD_IDS.get(lower, lower)
+
+
+class SSH_Params(dict):
+    """
+    Dictionary of host parameters with case-insensitive keywords
+
+    Keywords are stored with spelling used in configuration (so it is written back
+    unchanged, and dictionary serializes as any other one), but lookups, updates and
+    deletes work with any spelling. Setting keyword already present in different
+    spelling replaces it (with new spelling), so each keyword is stored only once.
+    Bigger dictionaries keep index of canonical keyword IDs, so all operations are
+    constant time
+    """
+
+    __slots__ = ("_index",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._index: Optional[Dict[str, str]] = None
+        self.update(*args, **kwargs)
+
+    def key_of(self, keyword: str) -> Optional[str]:
+        """
+        Return keyword as stored in dictionary, or None when it is not present
+        """
+        if dict.__contains__(self, keyword):
+            return keyword
+        if self._index is not None:
+            return self._index.get(keyword_id(keyword))
+        if len(self) > INDEX_THRESHOLD:
+            self._index = {keyword_id(key): key for key in dict.keys(self)}
+            return self._index.get(keyword_id(keyword))
+        lower = keyword.lower()
+        for key in dict.keys(self):
+            if key.lower() == lower:
+                return key
+        return None
+
+    def __contains__(self, keyword) -> bool:
+        return isinstance(keyword, str) and self.key_of(keyword) is not None
+
+    def __getitem__(self, keyword: str):
+        return dict.__getitem__(self, self.key_of(keyword) or keyword)
+
+    def __setitem__(self, keyword: str, value) -> None:
+        current = self.key_of(keyword)
+        if current is not None and current != keyword:
+            dict.__delitem__(self, current)
+        dict.__setitem__(self, keyword, value)
+        if self._index is not None:
+            self._index[keyword_id(keyword)] = keyword
+
+    def __delitem__(self, keyword: str) -> None:
+        current = self.key_of(keyword)
+        dict.__delitem__(self, keyword if current is None else current)
+        if self._index is not None:
+            del self._index[keyword_id(current)]
+
+    def get(self, keyword: str, default=None):
+        current = self.key_of(keyword)
+        return default if current is None else dict.__getitem__(self, current)
+
+    def pop(self, keyword: str, *default):
+        current = self.key_of(keyword)
+        if current is None:
+            return dict.pop(self, keyword, *default)
+        if self._index is not None:
+            del self._index[keyword_id(current)]
+        return dict.pop(self, current)
+
+    def popitem(self) -> Tuple[str, Union[str, list]]:
+        item = dict.popitem(self)
+        if self._index is not None:
+            del self._index[keyword_id(item[0])]
+        return item
+
+    def setdefault(self, keyword: str, default=None):
+        current = self.key_of(keyword)
+        if current is None:
+            self[keyword] = default
+            return default
+        return dict.__getitem__(self, current)
+
+    def update(self, *args, **kwargs) -> None:
+        source = args[0] if args else ()
+        items: Iterable = source
+        if hasattr(source, "keys"):
+            items = ((key, source[key]) for key in source.keys())
+        for keyword, value in items:
+            self[keyword] = value
+        for keyword, value in kwargs.items():
+            self[keyword] = value
+
+    def __ior__(self, other) -> "SSH_Params":
+        self.update(other)
+        return self
+
+    def __or__(self, other) -> "SSH_Params":
+        params = SSH_Params(self)
+        params.update(other)
+        return params
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._index = None
+
+    def copy(self) -> "SSH_Params":
+        return SSH_Params(self)
+
+    def __copy__(self) -> "SSH_Params":
+        return SSH_Params(self)
+
+    def __reduce__(self):
+        return (SSH_Params, (dict(self),))
@@ -1,8 +1,14 @@
 import os
 import re
-from typing import Literal, Optional
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
 
-from pydantic import BaseModel, IPvAnyAddress, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    IPvAnyAddress,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
 
 CIPHERS = [
     "3des-cbc",
@@ -128,6 +134,18 @@ SYSLOGFACILITY = Literal[
     "LOCAL7",
 ]
 PORT_RANGE = (1, 65535)
+# Keywords with file or path value, they are valid only when path exists
+PATH_KEYWORDS = (
+    "IdentityFile",
+    "CertificateFile",
+    "UserKnownHostsFile",
+    "GlobalKnownHostsFile",
+    "PKCS11Provider",
+    "ControlPath",
+    "RevokedHostKeys",
+    "RevokedKeys",
+    "SecurityKeyProvider",
+)
 SSH_HOSTNAME_REGEX = r"^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$|^([a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9\-]*[a-zA-Z0-9])(\.[a-zA-Z0-9\-]+)*$|^([0-9a-fA-F]{1,4}:){7}([0-9a-fA-F]{1,4})$"
 
 
@@ -402,17 +420,7 @@ class SSHParams(BaseModel):
                 return True
         raise ValueError(f"Invalid Format: {v}")
 
-    @field_validator(
-        "IdentityFile",
-        "CertificateFile",
-        "UserKnownHostsFile",
-        "GlobalKnownHostsFile",
-        "PKCS11Provider",
-        "ControlPath",
-        "RevokedHostKeys",
-        "RevokedKeys",
-        "SecurityKeyProvider",
-    )
+    @field_validator(*PATH_KEYWORDS)
     def validate_path(cls, v):
         if v and not os.path.exists(v):
             raise ValueError(f"File or Path does not exits: {v}")
@@ -450,3 +458,80 @@ class SSHParams(BaseModel):
                 f"Invalid hostname format for SSH: {host}. It must follow the SSH hostname rules."
             )
         return v
+
+
+class SSHParamsValidator:
+    """
+    Validates SSH parameters against SSHParams model one (keyword, value) pair at a time.
+    All SSHParams validators work on single field, so results are memoised per pair, and
+    values repeated across many hosts (User, Port...) are validated only once. Paths are
+    checked every time, as files can be created or removed meanwhile
+    """
+
+    def __init__(self, maxsize: int = 8192):
+        self.maxsize = maxsize
+        self._cache: Dict[Tuple[str, str], Tuple[Dict, Tuple[str, ...]]] = {}
+
+    @staticmethod
+    def _format_error(error) -> str:
+        loc = error.get("loc")
+        if len(loc) > 0:
+            return f"{loc[0]} - {error.get('msg')}"
+        return error.get("msg")
+
+    def _validate_pair(self, keyword: str, value: str) -> Tuple[Dict, Tuple[str, ...]]:
+        try:
+            ssh_params = SSHParams(**{keyword: value})
+        except ValidationError as e:
+            return {}, tuple(self._format_error(error) for error in e.errors())
+
+        # Same as "model_dump(exclude_none=True)", but only for single set field
+        keyword = keyword.strip()
+        valid_value = getattr(ssh_params, keyword)
+        return ({keyword: valid_value} if valid_value is not None else {}), ()
+
+    def validate_pair(self, keyword: str, value: str) -> Tuple[Dict, Tuple[str, ...]]:
+        """
+        Returns validated {keyword: value} dictionary and tuple of errors for single parameter
+        """
+        if keyword.strip() in PATH_KEYWORDS:
+            return self._validate_pair(keyword, value)
+        key = (keyword, value)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._validate_pair(keyword, value)
+            if len(self._cache) >= self.maxsize:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def validate(self, parameters: Dict[str, str]) -> Tuple[Dict, List[str]]:
+        """
+        Validate parameters of single host, returns tuple of validated parameters and list
+        of error messages (when list is not empty, validated parameters are empty)
+        """
+        valid_params: Dict = {}
+        errors: List[str] = []
+        for keyword, value in parameters.items():
+            valid_param, param_errors = self.validate_pair(keyword, value)
+            if param_errors:
+                errors.extend(param_errors)
+            else:
+                valid_params.update(valid_param)
+        if errors:
+            return {}, errors
+        return valid_params, errors
+
+    def validate_many(
+        self, parameters_list: Iterable[Dict[str, str]]
+    ) -> List[Tuple[Dict, List[str]]]:
+        """
+        Validate parameters of many hosts at once, results are in same order as input
+        """
+        return [self.validate(parameters) for parameters in parameters_list]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+ssh_params_validator = SSHParamsValidator()
@@ -0,0 +1,379 @@
+import getpass
+import logging
+import re
+import shlex
+import socket
+import subprocess
+from typing import Callable, Dict, List, Optional, Pattern, Tuple, Union
+
+from ..core.config import settings
+from .ssh_host import SSH_Host
+
+# Keywords that can be given many times, all obtained values are used (in order).
+# For every other keyword, first obtained value wins (see ssh_config(5))
+MULTI_VALUE_KEYWORDS = {
+    "certificatefile",
+    "dynamicforward",
+    "identityfile",
+    "localforward",
+    "remoteforward",
+    "sendenv",
+}
+# Multi-value keywords where OpenSSH ignores values that were already added
+UNIQUE_VALUE_KEYWORDS = MULTI_VALUE_KEYWORDS - {"sendenv"}
+
+EffectiveValue = Union[str, List[str]]
+EffectiveParams = Dict[str, EffectiveValue]
+
+
+def compile_host_patterns(
+    patterns: str, separator: Optional[str] = None, ignore_case: bool = False
+) -> Tuple[Optional[Pattern], Optional[Pattern]]:
+    """
+    Compile OpenSSH pattern list into (positive, negated) regex pair.
+    Only "*" and "?" wildcards are supported, same as in OpenSSH
+    """
+    positive: List[str] = []
+    negated: List[str] = []
+    for pattern in patterns.split(separator):
+        if not pattern:
+            continue
+        target = positive
+        if pattern.startswith("!"):
+            target = negated
+            pattern = pattern[1:]
+        target.append(re.escape(pattern).replace(r"\*", ".*").replace(r"\?", "."))
+
+    flags = re.IGNORECASE if ignore_case else 0
+
+    def _join(items: List[str]) -> Optional[Pattern]:
+        return re.compile(f"^(?:{'|'.join(items)})$", flags) if items else None
+
+    return _join(positive), _join(negated)
+
+
+def match_patterns(
+    positive: Optional[Pattern], negated: Optional[Pattern], value: str
+) -> bool:
+    if negated and negated.match(value):
+        return False
+    return bool(positive and positive.match(value))
+
+
+class MatchState:
+    """
+    Values that "Match" criteria are evaluated against, while resolving single host
+    """
+
+    __slots__ = ("original_host", "user", "local_user", "final", "canonical")
+
+    def __init__(self, original_host: str, user: Optional[str], local_user: str):
+        self.original_host = original_host
+        self.user = user
+        self.local_user = local_user
+        self.final = False
+        self.canonical = False
+
+    def host(self, effective: EffectiveParams) -> str:
+        hostname = effective.get("hostname")
+        if hostname and not self.final:
+            return hostname.replace("%h", self.original_host)
+        return hostname or self.original_host
+
+    def remote_user(self, effective: EffectiveParams) -> str:
+        return self.user or effective.get("user") or self.local_user
+
+
+Predicate = Callable[[MatchState, EffectiveParams], bool]
+
+
+def _match_all(state: MatchState, effective: EffectiveParams) -> bool:
+    return True
+
+
+def _match_none(state: MatchState, effective: EffectiveParams) -> bool:
+    return False
+
+
+def _match_final(state: MatchState, effective: EffectiveParams) -> bool:
+    return state.final
+
+
+def _match_canonical(state: MatchState, effective: EffectiveParams) -> bool:
+    return state.canonical
+
+
+class HostBlock:
+    """
+    Single "Host" block of configuration, prepared for fast matching
+    """
+
+    __slots__ = ("index", "host", "is_literal", "positive", "negated", "params")
+
+    def __init__(self, index: int, host: SSH_Host):
+        self.index = index
+        self.host = host
+        # Plain host names are looked up by name, only patterns need regex
+        self.is_literal = not any(c in host.name for c in "*?!")
+        self.positive, self.negated = None, None
+        if not self.is_literal:
+            self.positive, self.negated = compile_host_patterns(host.name)
+        # Keywords are case-insensitive, repeated keywords are stored as lists
+        self.params: List[Tuple[str, List[str]]] = [
+            (keyword.lower(), value if isinstance(value, list) else [value])
+            for keyword, value in host.params.items()
+        ]
+
+    def matches(self, name: str) -> bool:
+        return match_patterns(self.positive, self.negated, name)
+
+
+class MatchBlock(HostBlock):
+    """
+    Single "Match" block, criteria are compiled into predicates once, and all
+    of them must be true for block to apply
+    """
+
+    __slots__ = ("predicates", "is_final")
+
+    def __init__(self, index: int, host: SSH_Host, resolver: "SSH_Resolver"):
+        self.index = index
+        self.host = host
+        self.is_literal = False
+        self.positive, self.negated = None, None
+        self.params = [
+            (keyword.lower(), value if isinstance(value, list) else [value])
+            for keyword, value in host.params.items()
+        ]
+        self.is_final = False
+        self.predicates: List[Predicate] = self._compile(host.name, resolver)
+
+    def _compile(self, criteria: str, resolver: "SSH_Resolver") -> List[Predicate]:
+        try:
+            tokens = shlex.split(criteria)
+        except ValueError:
+            tokens = criteria.split()
+
+        predicates: List[Predicate] = []
+        while tokens:
+            criterion = tokens.pop(0)
+            negate = criterion.startswith("!")
+            criterion = criterion.lstrip("!").lower()
+
+            if criterion == "all":
+                predicate: Predicate = _match_all
+            elif criterion == "final":
+                self.is_final = True
+                predicate = _match_final
+            elif criterion == "canonical":
+                predicate = _match_canonical
+            elif not tokens:
+                logging.warning(f"Match criterion '{criterion}' is missing argument")
+                return [_match_none]
+            elif criterion == "exec":
+                predicate = resolver.exec_predicate(tokens.pop(0))
+            elif criterion in ["host", "originalhost", "user", "localuser", "tagged"]:
+                predicate = self._pattern_predicate(criterion, tokens.pop(0))
+            else:
+                # Criteria like "localnetwork" depend on local machine state
+                logging.debug(f"Match criterion '{criterion}' is not supported")
+                return [_match_none]
+
+            if negate:
+                predicates.append(
+                    lambda state, effective, p=predicate: not p(state, effective)
+                )
+            else:
+                predicates.append(predicate)
+        return predicates
+
+    @staticmethod
+    def _pattern_predicate(criterion: str, patterns: str) -> Predicate:
+        # Host names are compared case-insensitive, same as in OpenSSH
+        ignore_case = criterion in ["host", "originalhost"]
+        positive, negated = compile_host_patterns(patterns, ",", ignore_case)
+        value_of: Dict[str, Callable[[MatchState, EffectiveParams], str]] = {
+            "host": lambda state, effective: state.host(effective),
+            "originalhost": lambda state, effective: state.original_host,
+            "user": lambda state, effective: state.remote_user(effective),
+            "localuser": lambda state, effective: state.local_user,
+            "tagged": lambda state, effective: effective.get("tag", ""),
+        }
+        get_value = value_of[criterion]
+        return lambda state, effective: match_patterns(
+            positive, negated, get_value(state, effective)
+        )
+
+    def applies(self, state: MatchState, effective: EffectiveParams) -> bool:
+        return all(predicate(state, effective) for predicate in self.predicates)
+
+
+class SSH_Resolver:
+    """
+    Resolves effective configuration of hosts, the same way OpenSSH does
+
+    Blocks are evaluated in order they are in SSH config file (blocks added after
+    it was parsed follow them), for each keyword first obtained value wins, except multi-value keywords, where all values
+    are collected. "Match" blocks are evaluated with values obtained so far, and when
+    "Match final" is used (or CanonicalizeHostname is enabled), configuration is
+    evaluated once more for final host name. Keywords are returned in lower-case
+    (same as "ssh -G" prints them).
+
+    "Match exec" runs commands, so it is only evaluated when allowed (setting
+    SSH_MATCH_EXEC), otherwise it never matches. Hostname canonicalization itself
+    (DNS lookups) is not done, "canonical" matches in final pass when it is enabled.
+
+    Results are cached per (host, user), cache must be invalidated when configuration
+    is modified
+    """
+
+    def __init__(self, config, allow_exec: Optional[bool] = None):
+        self.config = config
+        self.allow_exec = (
+            settings.ssh.SSH_MATCH_EXEC if allow_exec is None else allow_exec
+        )
+        self.local_user = getpass.getuser()
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self._exec_cache: Dict[str, bool] = {}
+        self._literal_blocks: Dict[str, List[HostBlock]] = {}
+        self._pattern_blocks: List[HostBlock] = []
+        self._match_blocks: List[MatchBlock] = []
+        self._has_final = False
+        self._cache: Dict[
+            Tuple[str, Optional[str]], Tuple[EffectiveParams, List[HostBlock]]
+        ] = {}
+        self._compiled = False
+
+    @property
+    def has_matches(self) -> bool:
+        if not self._compiled:
+            self._compile()
+        return bool(self._match_blocks)
+
+    def _compile(self) -> None:
+        # Configuration is only read, order of its groups and hosts is kept
+        order = {id(host): index for index, host in enumerate(self.config.block_order)}
+        hosts = [
+            host for group in self.config.groups for host in group.iter_all_hosts()
+        ]
+        for position, host in enumerate(hosts):
+            index = order.get(id(host), len(order) + position)
+            if host.type in ["match", "global_match"]:
+                block = MatchBlock(index, host, self)
+                self._match_blocks.append(block)
+                self._has_final = self._has_final or block.is_final
+                continue
+            block = HostBlock(index, host)
+            if block.is_literal:
+                for name in host.name.split():
+                    self._literal_blocks.setdefault(name, []).append(block)
+            else:
+                self._pattern_blocks.append(block)
+        self._compiled = True
+
+    def exec_predicate(self, command: str) -> Predicate:
+        def predicate(state: MatchState, effective: EffectiveParams) -> bool:
+            if not self.allow_exec:
+                return False
+            expanded = (
+                command.replace("%%", "\0")
+                .replace("%h", state.host(effective))
+                .replace("%n", state.original_host)
+                .replace("%p", str(effective.get("port", "22")))
+                .replace("%r", state.remote_user(effective))
+                .replace("%u", state.local_user)
+                .replace("%L", socket.gethostname().split(".")[0])
+                .replace("%l", socket.gethostname())
+                .replace("\0", "%")
+            )
+            if expanded not in self._exec_cache:
+                result = subprocess.run(
+                    expanded,
+                    shell=True,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                self._exec_cache[expanded] = result.returncode == 0
+            return self._exec_cache[expanded]
+
+        return predicate
+
+    def _candidates(self, name: str) -> List[HostBlock]:
+        blocks = list(self._literal_blocks.get(name, []))
+        blocks += [block for block in self._pattern_blocks if block.matches(name)]
+        blocks += self._match_blocks
+        blocks.sort(key=lambda block: block.index)
+        return blocks
+
+    def _apply_pass(
+        self,
+        name: str,
+        state: MatchState,
+        effective: EffectiveParams,
+        applied: List[HostBlock],
+    ) -> None:
+        for block in self._candidates(name):
+            if isinstance(block, MatchBlock) and not block.applies(state, effective):
+                continue
+            if block not in applied:
+                applied.append(block)
+            for keyword, values in block.params:
+                if keyword in MULTI_VALUE_KEYWORDS:
+                    current = effective.setdefault(keyword, [])
+                    for value in values:
+                        if keyword in UNIQUE_VALUE_KEYWORDS and value in current:
+                            continue
+                        current.append(value)
+                elif keyword not in effective:
+                    effective[keyword] = values[0]
+
+    def _resolve(
+        self, name: str, user: Optional[str]
+    ) -> Tuple[EffectiveParams, List[HostBlock]]:
+        key = (name, user)
+        if key in self._cache:
+            return self._cache[key]
+        if not self._compiled:
+            self._compile()
+
+        effective: EffectiveParams = {}
+        applied: List[HostBlock] = []
+        state = MatchState(name, user, self.local_user)
+        if user:
+            # User given on command line has precedence over configuration
+            effective["user"] = user
+
+        self._apply_pass(name, state, effective, applied)
+
+        canonicalize = str(effective.get("canonicalizehostname", "no")).lower()
+        if "hostname" in effective:
+            effective["hostname"] = effective["hostname"].replace("%h", name)
+        if self._has_final or canonicalize in ["yes", "always"]:
+            state.final = True
+            state.canonical = canonicalize in ["yes", "always"]
+            self._apply_pass(state.host(effective), state, effective, applied)
+
+        self._cache[key] = (effective, applied)
+        return self._cache[key]
+
+    def resolve(self, name: str, user: Optional[str] = None) -> EffectiveParams:
+        """
+        Return effective parameters of host name (does not have to be defined in config),
+        optionally for user given on command line (like "ssh user@host").
+        Returned dictionary is cached and shared, it must not be modified
+        """
+        return self._resolve(name, user)[0]
+
+    def applied_blocks(self, name: str, user: Optional[str] = None) -> List[HostBlock]:
+        """
+        Return all "Host" and "Match" blocks that applied to host, in order
+        """
+        return self._resolve(name, user)[1]
+
+    def get(
+        self, name: str, keyword: str, user: Optional[str] = None
+    ) -> Optional[EffectiveValue]:
+        return self.resolve(name, user).get(keyword.lower())
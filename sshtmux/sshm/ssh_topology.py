@@ -0,0 +1,261 @@
+import json
+import re
+from typing import IO, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from ..exceptions import SSHException
+from .ssh_config import SSH_Config
+from .ssh_group import SSH_Group
+from .ssh_host import SSH_Host
+
+TOPOLOGY_FORMATS = ["dot", "json"]
+
+# [user@]host[:port] or ssh://[user@]host[:port], host can be IPv6 in brackets
+JUMP_HOP_RE = re.compile(
+    r"^(?:ssh://)?(?:(?P<user>[^@]+)@)?(?P<host>\[[^\]]+\]|[^:]+)(?::(?P<port>\d+))?$"
+)
+
+
+class JumpHop(NamedTuple):
+    """Single host in ProxyJump chain, with optional user and port"""
+
+    name: str
+    user: Optional[str] = None
+    port: Optional[str] = None
+
+    def __str__(self) -> str:
+        user = f"{self.user}@" if self.user else ""
+        port = f":{self.port}" if self.port else ""
+        return f"{user}{self.name}{port}"
+
+
+JumpPath = Tuple[JumpHop, ...]
+
+
+def parse_jump_hop(spec: str) -> JumpHop:
+    match = JUMP_HOP_RE.match(spec.strip())
+    if not match:
+        return JumpHop(spec.strip())
+    host = match.group("host")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    return JumpHop(host, match.group("user"), match.group("port"))
+
+
+def parse_proxyjump(value: Optional[str]) -> List[JumpHop]:
+    """
+    Parse ProxyJump value into list of hops, in order they are connected to.
+    "none" (and missing value) means host is reached directly
+    """
+    if not value or value.strip().lower() == "none":
+        return []
+    return [parse_jump_hop(spec) for spec in value.split(",") if spec.strip()]
+
+
+class SSH_Topology:
+    """
+    Graph of ProxyJump connections between hosts
+
+    Jumps of all hosts are collected in one pass (from effective configuration, so
+    ProxyJump inherited from patterns and matches is used too), and connection paths
+    are resolved once per host and memoised, so tracing whole configuration is linear.
+
+    Multi-hop values ("a,b,c") are handled same as in OpenSSH: first hop is reached
+    with its own configuration, every next hop is reached through previous one (its
+    own ProxyJump is not used), and target is reached through last hop. Hosts which
+    are part of ProxyJump cycle (and hosts jumping through them) have no path, but
+    error message instead
+    """
+
+    def __init__(self, config: SSH_Config):
+        self.config = config
+        self.hosts: Dict[str, Tuple[SSH_Host, SSH_Group]] = {}
+        self.jumps: Dict[str, List[JumpHop]] = {}
+        self.cycles: List[List[str]] = []
+        self.errors: Dict[str, str] = {}
+        self._paths: Dict[str, JumpPath] = {}
+
+    def build(self, names: Optional[Iterable[str]] = None) -> "SSH_Topology":
+        """
+        Collect jumps of given hosts (by default, all normal hosts in configuration)
+        and all jump hosts they connect through, and resolve their paths. Can be
+        called again to add more hosts, already resolved ones are kept
+        """
+        if not self.hosts:
+            self.hosts = self.config.get_host_index()
+        if names is None:
+            names = [
+                name for name, (host, _) in self.hosts.items() if host.type == "normal"
+            ]
+
+        added: List[str] = []
+        pending = [name for name in names if name not in self.jumps]
+        while pending:
+            name = pending.pop()
+            if name in self.jumps:
+                continue
+            hops = parse_proxyjump(self.config.resolver.get(name, "proxyjump"))
+            self.jumps[name] = hops
+            added.append(name)
+            pending.extend(hop.name for hop in hops if hop.name not in self.jumps)
+
+        for name in added:
+            self._resolve(name)
+        return self
+
+    def _resolve(self, name: str) -> None:
+        # Iterative walk through first hops, so long chains do not hit recursion limit
+        stack = [name]
+        visiting: Set[str] = set()
+        while stack:
+            current = stack[-1]
+            if current in self._paths or current in self.errors:
+                stack.pop()
+                continue
+            visiting.add(current)
+
+            hops = self.jumps[current]
+            if not hops:
+                self._paths[current] = (JumpHop(current),)
+                stack.pop()
+                continue
+
+            first = hops[0].name
+            if first in self._paths:
+                # First hop is reached with user/port given in this ProxyJump value
+                self._paths[current] = (
+                    self._paths[first][:-1] + tuple(hops) + (JumpHop(current),)
+                )
+                stack.pop()
+            elif first in self.errors:
+                self.errors[current] = f"Jump host '{first}' cannot be reached"
+                stack.pop()
+            elif first in visiting:
+                cycle = stack[stack.index(first) :]
+                self.cycles.append(cycle)
+                message = "ProxyJump cycle: " + " -> ".join(cycle + [first])
+                for cycle_name in cycle:
+                    self.errors[cycle_name] = message
+            else:
+                stack.append(first)
+
+    def path(self, name: str) -> JumpPath:
+        """
+        Return connection path for host, from first jump host to host itself.
+        Hosts that were not part of build are added on demand
+        """
+        if name not in self.jumps:
+            self.build([name])
+        if name in self.errors:
+            raise SSHException(self.errors[name])
+        return self._paths[name]
+
+    def edges(self) -> List[Tuple[str, str]]:
+        """
+        Return unique (jump host, reached host) pairs, for all resolved hosts
+        """
+        edges: Dict[Tuple[str, str], None] = {}
+        for name, hops in self.jumps.items():
+            chain = [hop.name for hop in hops] + [name]
+            for source, target in zip(chain, chain[1:]):
+                edges.setdefault((source, target), None)
+        return list(edges)
+
+    def select(self, name_filter: Optional[str] = None) -> List[str]:
+        """
+        Return names of hosts matching filter (regex), and all hosts on their paths
+        """
+        if not name_filter:
+            return list(self.jumps)
+        name_re = re.compile(name_filter)
+        selected: Dict[str, None] = {}
+        for name in self.jumps:
+            if not name_re.search(name):
+                continue
+            selected.setdefault(name, None)
+            for hop in self._paths.get(name, ()):
+                selected.setdefault(hop.name, None)
+        return list(selected)
+
+    def node(self, name: str) -> Dict:
+        """
+        Plain (JSON serializable) representation of single host in graph
+        """
+        host, group = self.hosts.get(name, (None, None))
+        path = self._paths.get(name)
+        return {
+            "name": name,
+            "group": group.name if group else None,
+            "defined": host is not None,
+            "jumps": [str(hop) for hop in self.jumps.get(name, [])],
+            "path": [str(hop) for hop in path] if path is not None else None,
+            "error": self.errors.get(name),
+        }
+
+
+def _dot_quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def write_dot(topology: SSH_Topology, names: List[str], output: IO[str]) -> None:
+    selected = set(names)
+    cycle_edges = {
+        (source, target)
+        for cycle in topology.cycles
+        for source, target in zip(cycle[1:] + cycle[:1], cycle)
+    }
+    output.write("digraph sshm_topology {\n")
+    output.write("    rankdir=LR;\n")
+    output.write("    node [shape=box];\n")
+    for name in names:
+        attrs = []
+        if name not in topology.hosts:
+            attrs.append("style=dashed")
+        if name in topology.errors:
+            attrs.append("color=red")
+        suffix = f" [{', '.join(attrs)}]" if attrs else ""
+        output.write(f"    {_dot_quote(name)}{suffix};\n")
+    for source, target in topology.edges():
+        if source not in selected or target not in selected:
+            continue
+        suffix = " [color=red]" if (source, target) in cycle_edges else ""
+        output.write(f"    {_dot_quote(source)} -> {_dot_quote(target)}{suffix};\n")
+    output.write("}\n")
+
+
+def write_json(topology: SSH_Topology, names: List[str], output: IO[str]) -> None:
+    selected = set(names)
+    document = {
+        "nodes": [topology.node(name) for name in names],
+        "edges": [
+            {"from": source, "to": target}
+            for source, target in topology.edges()
+            if source in selected and target in selected
+        ],
+        "cycles": [
+            cycle for cycle in topology.cycles if any(n in selected for n in cycle)
+        ],
+    }
+    json.dump(document, output, indent=2)
+    output.write("\n")
+
+
+WRITERS = {
+    "dot": write_dot,
+    "json": write_json,
+}
+
+
+def export_topology(
+    config: SSH_Config,
+    output: IO[str],
+    fmt: str = "dot",
+    name_filter: Optional[str] = None,
+) -> SSH_Topology:
+    """
+    Build topology of whole configuration and write it out in requested format
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown topology format '{fmt}'")
+    topology = SSH_Topology(config).build()
+    WRITERS[fmt](topology, topology.select(name_filter), output)
+    return topology
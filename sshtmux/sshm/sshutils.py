@@ -1,13 +1,14 @@
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from pydantic import ValidationError
 from rich import print
 
 from ..core.config import T_Host_Style, settings
+from ..exceptions import SSHException
 from ..services.identities import PasswordManager
 from .ssh_config import SSH_Config, SSH_Host
-from .ssh_parameters import SSHParams
+from .ssh_parameters import SSHParams, ssh_params_validator
+from .ssh_topology import SSH_Topology
 
 
 def complete_ssh_host_names(ctx, param, incomplete) -> List[str]:
@@ -45,7 +46,7 @@ def expand_names(names: Tuple, all_names: list) -> List[str]:
 
     for name in names:
         if name.startswith("r:"):
-            name_re = name.split(":")[1]
+            name_re = name.split(":", 1)[1]
             # print(f"Got regex type name def - '{name_re}'")
             for i_name in all_names:
                 match = re.search(name_re, i_name)
@@ -58,68 +59,72 @@ def expand_names(names: Tuple, all_names: list) -> List[str]:
 
 # Function to trace connected hosts via "proxyjump" SSH parameter
 # For target host, return a list of hosts in order of connections to reach the target host
-# In case host is directly reachable (no "proxyjump" param), it will return list of single (target) host
-def trace_jumphosts(name: str, config: SSH_Config, ctx, style: str) -> List[SSH_Host]:
-    # Keep list of linked hosts via proxyjump option
-    traced_hosts: List[SSH_Host] = []
+# (target first, then jump hosts back to the first one). In case host is directly
+# reachable (no "proxyjump" param), it will return list of single (target) host
+def trace_jumphosts(
+    name: str,
+    config: SSH_Config,
+    ctx,
+    style: str,
+    topology: Optional[SSH_Topology] = None,
+) -> List[SSH_Host]:
+    # Path is resolved from topology graph (multi-hop values and cycles are handled
+    # there), only hosts on the path are traced if no prebuilt topology is given
+    if topology is None:
+        topology = SSH_Topology(config)
+    try:
+        path = topology.path(name)
+    except SSHException as e:
+        print(f"Cannot trace jump hosts for '{name}': {e}")
+        ctx.exit(1)
 
-    # we are first checking host that is asked, and then check if that host has a "proxy" defined
-    # if proxy is defined, we add found host to traced list, and search attached proxy, it this way we
-    # can trace full connection path for later graph processing
-    while True:
-        # Search for host in current configuration
-        if not config.check_host_by_name(name):
+    traced_hosts: List[SSH_Host] = []
+    for hop in reversed(path):
+        if hop.name not in topology.hosts:
             print(
-                f"Cannot get info for used host '{name}' as it is not defined in configuration!"
+                f"Cannot get info for used host '{hop.name}' as it is not defined in configuration!"
             )
             ctx.exit(1)
 
-        found_host = config.get_host_by_name(name)[0]
+        found_host = topology.hosts[hop.name][0]
 
         # Set SSH host print style from user input
         found_host.print_style = style
-
-        # Add current host, and its table to traced lists
         traced_hosts.append(found_host)
 
-        # Find proxy info if it exists, if not, break the loop
-        proxyjump = None
-        host_params = {k.lower(): v for k, v in found_host.params.items()}
-        if "proxyjump" in host_params:
-            proxyjump = host_params["proxyjump"]
-        else:
-            for _, params in found_host.inherited_params:
-                for key, value in params.items():
-                    if key.lower() == "proxyjump":
-                        proxyjump = value
-
-        # If there is connected host, we switch "name" and continue the loop
-        # Otherwise we exit the loop
-        if proxyjump:
-            name = proxyjump
-        else:
-            break
-
     return traced_hosts
 
 
+def check_ssh_params(parameters: Dict[str, str]) -> Tuple[Dict, List[str]]:
+    """
+    Validate SSH parameters, returns tuple of validated parameters and list of
+    error messages (when list is not empty, validated parameters are empty)
+    """
+    if not settings.ssh.SSH_VALIDATE_SSHCONFIG:
+        return parameters, []
+    return ssh_params_validator.validate(parameters)
+
+
+def check_ssh_params_batch(
+    parameters_list: List[Dict[str, str]],
+) -> List[Tuple[Dict, List[str]]]:
+    """
+    Validate SSH parameters of many hosts at once, repeated (keyword, value) pairs
+    are validated only once. Returns results in same order as input list
+    """
+    if not settings.ssh.SSH_VALIDATE_SSHCONFIG:
+        return [(parameters, []) for parameters in parameters_list]
+    return ssh_params_validator.validate_many(parameters_list)
+
+
 def validate_ssh_params(parameters_input: Tuple[Tuple[str, str]]) -> Dict:
     parameters = {item[0]: item[1] for item in parameters_input}
-    if not settings.ssh.SSH_VALIDATE_SSHCONFIG:
-        return parameters
-    try:
-        ssh_params = SSHParams(**parameters)
-    except ValidationError as e:
+    valid_ssh_params, errors = check_ssh_params(parameters)
+    if errors:
         print("Cannot validate parameters!")
-        for error in e.errors():
-            loc = error.get("loc")
-            if len(loc) > 0:
-                print(f"{loc[0]} - {error.get('msg')} ")
-            else:
-                print(error.get("msg"))
+        for error in errors:
+            print(error)
         exit(1)
-
-    valid_ssh_params = ssh_params.model_dump(exclude_none=True)
     return valid_ssh_params
 
 
@@ -128,13 +133,8 @@ def validate_unique_param(
 ) -> None:
     """
     Remove duplicate Params on SSH config. If there is a keyword in lower case and same with case sensitive.
-    Lower will be removed
+    Lower will be removed. Host params are case-insensitive "SSH_Params", so each
+    keyword is looked up in constant time
     """
-    host_params_to_delete = []
     for new_param in new_params:
-        for host_param in host_params:
-            if new_param.lower() == host_param.lower():
-                host_params_to_delete.append(host_param)
-    for param in host_params_to_delete:
-        del host_params[param]
-    {**host_params, **new_params}
+        host_params.pop(new_param, None)
@@ -0,0 +1,129 @@
+import threading
+import time
+from pathlib import Path
+
+from sshtmux.services.fanout import (
+    FanoutScheduler,
+    FanoutTask,
+    master_command,
+    proxy_options,
+    ssh_command,
+)
+from sshtmux.sshm import SSH_Config
+from sshtmux.sshm.ssh_topology import JumpHop
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+config1="""
+Host bastion1
+    hostname 1.1.1.1
+
+Host bastion2
+    hostname 2.2.2.2
+
+Host web-1
+    proxyjump bastion1
+
+Host web-2
+    proxyjump bastion1
+
+Host web-3
+    proxyjump bastion1
+
+Host db-1
+    proxyjump admin@bastion2:2222
+
+Host local
+    hostname 127.0.0.1
+
+Host loop
+    proxyjump loop
+"""
+
+
+def _hosts(config, names):
+    index = config.get_host_index()
+    return [index[name][0] for name in names]
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_plan_and_order():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    scheduler = FanoutScheduler(config, multiplex=False)
+
+    groups = scheduler.plan(_hosts(config, ["web-1", "web-2", "web-3", "db-1", "local"]))
+    assert {chain: [t.host.name for t in tasks] for chain, tasks in groups.items()} == {
+        (JumpHop("bastion1"),): ["web-1", "web-2", "web-3"],
+        (JumpHop("bastion2", "admin", "2222"),): ["db-1"],
+        (): ["local"],
+    }
+    # Tasks of different bastions are interleaved
+    assert [t.host.name for t in scheduler.order(groups)] == [
+        "web-1", "db-1", "local", "web-2", "web-3"
+    ]
+
+
+def test_bastion_limit():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    scheduler = FanoutScheduler(config, workers=8, bastion_limit=2, multiplex=False)
+
+    lock = threading.Lock()
+    running = {"bastion1": 0}
+    peak = {"bastion1": 0}
+
+    def work(task):
+        with lock:
+            running["bastion1"] += 1
+            peak["bastion1"] = max(peak["bastion1"], running["bastion1"])
+        time.sleep(0.05)
+        with lock:
+            running["bastion1"] -= 1
+        return task.host.name
+
+    hosts = _hosts(config, ["web-1", "web-2", "web-3"])
+    results = scheduler.fanout(hosts, work)
+    assert [r.value for r in results] == ["web-1", "web-2", "web-3"]
+    assert peak["bastion1"] == 2
+
+
+def test_errors():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    scheduler = FanoutScheduler(config, multiplex=False)
+
+    def work(task):
+        if task.host.name == "local":
+            raise RuntimeError("failed")
+        return True
+
+    results = scheduler.fanout(_hosts(config, ["loop", "local", "web-1"]), work)
+    errors = {r.task.host.name: r.error for r in results if not r.ok}
+    assert errors == {"loop": "ProxyJump cycle: loop -> loop", "local": "failed"}
+
+
+def test_ssh_commands():
+    chain = (JumpHop("jump"), JumpHop("bastion", "admin", "2222"))
+    socket_path = Path("/tmp/control/abc")
+
+    cmd = master_command(chain, socket_path, 60)
+    assert "ProxyJump=jump" in cmd
+    assert cmd[-7:] == ["-l", "admin", "-p", "2222", "-f", "-N", "bastion"]
+
+    options = proxy_options(chain, socket_path)
+    assert options == [
+        "-o", "ProxyJump=none",
+        "-o", "ProxyCommand=ssh -o ControlPath=/tmp/control/abc -W [%h]:%p bastion",
+    ]
+
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    task = FanoutTask(host=_hosts(config, ["web-1"])[0], ssh_options=options)
+    cmd = ssh_command(task, "uptime")
+    assert cmd[0] == "ssh"
+    assert cmd[-2:] == ["web-1", "uptime"]
+    assert "ProxyJump=none" in cmd
@@ -0,0 +1,103 @@
+import shutil
+import uuid
+
+import pytest
+
+from sshtmux.core.config import settings
+from sshtmux.exceptions import TMUXException
+from sshtmux.services.fanout import FanoutScheduler
+from sshtmux.services.sessions import (
+    RESTORE_OPTION,
+    LayoutSnapshot,
+    WindowSnapshot,
+    capture_layout,
+    load_layout,
+    restore_commands,
+    restore_layout,
+    save_layout,
+)
+from sshtmux.services.tmux import Tmux, escape_tmux_arg
+from sshtmux.sshm import SSH_Config
+
+#-----------------------------------
+# SAMPLES
+#-----------------------------------
+layout1 = LayoutSnapshot(
+    windows=[
+        WindowSnapshot("web", 1, "web-1", "/srv", "web-1", "web", "normal", None),
+        WindowSnapshot("web", 3, "web-2", "", "web-2", "web", "identity", "ops"),
+        WindowSnapshot("db", 1, "db-1", "", "db-1", "db", "normal", None),
+        WindowSnapshot("db", 2, "notes", "/tmp"),
+    ],
+    saved_at="2024-01-01T00:00:00",
+)
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_restore_commands():
+    windows = list(enumerate(layout1.windows))
+    commands = restore_commands(windows[:2], {}, 1, "run")
+    assert commands[0] == ["new-session", "-d", "-s", "web", "-n", "web-1", "-c", "/srv"]
+    # First window already has base index, so it is not moved
+    assert commands[1] == ["set-option", "-w", "-t", "=web:1", RESTORE_OPTION, "run:0"]
+    assert ["new-window", "-d", "-t", "=web:3", "-n", "web-2"] in commands
+    assert ["set-option", "-w", "-t", "=web:3", "@sshm-identity", "ops"] in commands
+
+    # Existing windows are kept, missing ones appended
+    commands = restore_commands(windows[2:], {"db": {"db-1"}}, 0, "run")
+    assert commands == [
+        ["new-window", "-t", "=db:", "-n", "notes", "-c", "/tmp"],
+        ["set-option", "-w", "-t", "=db:", RESTORE_OPTION, "run:3"],
+    ]
+
+    commands = restore_commands(windows[2:], {}, 0, "run")
+    assert commands[1] == ["move-window", "-s", "=db:^", "-t", "=db:1"]
+
+
+def test_escape_tmux_arg():
+    assert escape_tmux_arg("a;b") == "a;b"
+    assert escape_tmux_arg("ls;") == r"ls\;"
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "sessions" / "work.json"
+    save_layout(layout1, path)
+    assert load_layout(path) == layout1
+    assert load_layout(path).sessions.keys() == {"web", "db"}
+
+    with pytest.raises(TMUXException):
+        load_layout(tmp_path / "missing.json")
+    (tmp_path / "broken.json").write_text("{")
+    with pytest.raises(TMUXException):
+        load_layout(tmp_path / "broken.json")
+
+
+@pytest.mark.skipif(not shutil.which("tmux"), reason="tmux is not installed")
+def test_capture_and_restore(monkeypatch):
+    monkeypatch.setattr(settings.tmux, "TMUX_SOCKET_NAME", f"sshm-{uuid.uuid4().hex}")
+    monkeypatch.setattr(settings.tmux, "TMUX_SOCKET_PATH", None)
+    monkeypatch.setattr(settings.tmux, "TMUX_CONFIG_FILE", "/dev/null")
+    tmux = Tmux()
+    layout = LayoutSnapshot(
+        windows=[
+            WindowSnapshot("one", 0, "a;", "/tmp"),
+            WindowSnapshot("one", 5, "b"),
+            WindowSnapshot("two", 2, "c"),
+        ]
+    )
+    scheduler = FanoutScheduler(SSH_Config([]), multiplex=False)
+    try:
+        created, results = restore_layout(tmux, SSH_Config([]), layout, scheduler)
+        assert (created, results) == (3, [])
+        captured = capture_layout(tmux)
+        assert [(w.session, w.index, w.name) for w in captured.windows] == [
+            ("one", 0, "a;"), ("one", 5, "b"), ("two", 2, "c")
+        ]
+
+        # Nothing is created again
+        created, _ = restore_layout(tmux, SSH_Config([]), layout, scheduler)
+        assert created == 0
+    finally:
+        tmux.server.kill()
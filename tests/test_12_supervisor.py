@@ -0,0 +1,101 @@
+import random
+from types import SimpleNamespace
+
+from sshtmux.services.retry import CLOSED, HALF_OPEN, OPEN, Backoff, CircuitBreaker
+from sshtmux.services.supervisor import (
+    SupervisedPane,
+    Supervisor,
+    is_disconnected,
+    parse_panes,
+)
+from sshtmux.services.tmux import ConnectionType
+from sshtmux.sshm import SSH_Host
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_backoff():
+    backoff = Backoff(1.0, 30.0, rng=random.Random(1))
+    assert [backoff.ceiling(n) for n in range(7)] == [1, 2, 4, 8, 16, 30, 30]
+    assert backoff.ceiling(10_000) == 30
+    for attempt in range(10):
+        assert 0 <= backoff.delay(attempt) <= backoff.ceiling(attempt)
+
+
+def test_circuit_breaker():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=2, cooldown=60, clock=clock)
+
+    breaker.failure("web")
+    assert breaker.state("web") == CLOSED and breaker.allow("web")
+    breaker.failure("web")
+    assert breaker.state("web") == OPEN and not breaker.allow("web")
+    assert breaker.retry_in("web") == 60
+    assert breaker.allow("db")
+
+    # Only single probe is allowed after cooldown
+    clock.now += 60
+    assert breaker.state("web") == HALF_OPEN
+    assert breaker.allow("web") and not breaker.allow("web")
+    breaker.failure("web")
+    assert breaker.state("web") == OPEN
+
+    clock.now += 60
+    assert breaker.allow("web")
+    breaker.success("web")
+    assert breaker.state("web") == CLOSED and breaker.retry_in("web") == 0
+
+
+def test_parse_panes():
+    assert parse_panes("%1=@1=ssh %2=@1=bash %3=@2=my tool ") == {
+        "%1": ("@1", "ssh"), "%2": ("@1", "bash"), "%3": ("@2", "my tool")
+    }
+    assert parse_panes("") == {}
+
+
+def test_is_disconnected():
+    assert is_disconnected(["$ ssh web", "client_loop: send disconnect: Broken pipe", "$ ", ""])
+    assert is_disconnected(["Connection to web closed by remote host.", "$ "])
+    assert not is_disconnected(["logout", "Connection to web closed.", "$ "])
+
+
+def test_supervisor_update(monkeypatch):
+    supervisor = Supervisor(tmux=None, max_attempts=1, workers=1)
+    checked = []
+    reconnected = []
+
+    def dropped_pane(pane_id, window_id):
+        checked.append(pane_id)
+        if pane_id == "%3":
+            # Closed by user
+            return None
+        return SupervisedPane(pane_id, window_id, SSH_Host("web", "grp"), ConnectionType.normal)
+
+    monkeypatch.setattr(supervisor, "_dropped_pane", dropped_pane)
+    monkeypatch.setattr(supervisor, "_reconnect", reconnected.append)
+    # Reconnect is run right away, instead of worker thread
+    supervisor._executor.shutdown()
+    supervisor._executor = SimpleNamespace(
+        submit=lambda func, *args: func(*args), shutdown=lambda **_: None
+    )
+    try:
+        event = "%subscription-changed sshm-panes $0 - - - : "
+        assert supervisor.handle_event(event + "%1=@1=ssh %2=@2=bash %3=@3=sftp") == []
+        assert supervisor.handle_event("%subscription-changed other $0 - - - : %1=@1=bash") == []
+        assert supervisor.handle_event(event + "%1=@1=bash %2=@2=bash %3=@3=bash") == ["%1"]
+        assert checked == ["%1", "%3"]
+        # Pane being reconnected is not checked again
+        supervisor.handle_event(event + "%1=@1=ssh")
+        assert supervisor.handle_event(event + "%1=@1=bash") == []
+    finally:
+        supervisor.stop()
+    assert [pane.pane_id for pane in reconnected] == ["%1"]
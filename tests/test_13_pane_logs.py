@@ -0,0 +1,100 @@
+import os
+import re
+import threading
+import time
+
+from sshtmux import logwriter
+from sshtmux.core.config import settings
+from sshtmux.services.pane_logs import required_trigrams, search_logs
+
+#-----------------------------------
+# SAMPLES
+#-----------------------------------
+output1 = (
+    b"\x1b[1mWelcome\x1b[0m to web-1\r\n"
+    b"$ uptime\r\n"
+    b" 10:00:00 up 3 days, load average: 0.01\r\n"
+    b"kernel: eth0 link down\r\n"
+)
+output2 = b"backup completed\nerror: disk quota exceeded on /srv\n"
+
+
+def _write(directory, chunks, segment_size=1024 * 1024):
+    read_fd, write_fd = os.pipe()
+
+    def feed():
+        # Chunks are read separately, as pane output
+        for chunk in chunks:
+            os.write(write_fd, chunk)
+            time.sleep(0.05)
+        os.close(write_fd)
+
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+    try:
+        logwriter.run(read_fd, str(directory), "%1", segment_size, "gzip", 1.0)
+    finally:
+        feeder.join()
+        os.close(read_fd)
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_clean_output():
+    data, carry = logwriter.clean_output(b"\x1b[31mred\x1b[0m\r\nnext \x1b[3")
+    assert (data, carry) == (b"red\nnext ", b"\x1b[3")
+    data, carry = logwriter.clean_output(b"2mgreen", carry)
+    assert (data, carry) == (b"green", b"")
+
+
+def test_writer_segments(tmp_path):
+    _write(tmp_path, [output1[:20], output1[20:], output2], segment_size=60)
+    segments = sorted(p for p in tmp_path.iterdir() if p.suffix == ".gz")
+    assert len(segments) == 2
+
+    lines = [line for s in segments for line in logwriter.read_segment(str(s))]
+    assert lines[:2] == [b"Welcome to web-1", b"$ uptime"]
+    assert lines[-1] == b"error: disk quota exceeded on /srv"
+
+    index, meta = logwriter.TrigramIndex.load(logwriter.index_path(str(segments[0])))
+    assert meta["bytes"] >= 60 and meta["lines"] == 4
+    assert b"wel" in index and b"eth" in index and b"quo" not in index
+
+
+def test_read_unfinished_segment(tmp_path):
+    segment = logwriter.Segment(str(tmp_path), "%1", "gzip")
+    segment.write(b"first line\nsecond")
+    segment.flush()
+    assert list(logwriter.read_segment(segment.path)) == [b"first line", b"second"]
+    segment.close()
+
+
+def test_required_trigrams():
+    def trigrams(pattern, flags=0):
+        return required_trigrams(re.compile(pattern, flags))
+
+    assert trigrams("disk quota") == {b"dis", b"isk", b"quo", b"uot", b"ota"}
+    assert trigrams(r"err(or)?: (\w+) quota+") == {b"err", b"quo", b"uot"}
+    assert trigrams("(reset|refused)") == set()
+    assert trigrams("ERROR", re.IGNORECASE) == {b"err", b"rro", b"ror"}
+    # "k" also matches Kelvin sign when case is ignored
+    assert trigrams("disk", re.IGNORECASE) == set()
+
+
+def test_search_logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.sshtmux, "SSHTMUX_LOGS_PATH", str(tmp_path))
+    _write(tmp_path / "web-1", [output1])
+    _write(tmp_path / "db-1", [output2])
+
+    stats = {}
+    hits = list(search_logs("disk quota", stats=stats))
+    assert [(h.host, h.line_number, h.text) for h in hits] == [
+        ("db-1", 2, "error: disk quota exceeded on /srv")
+    ]
+    # Segment of web-1 was not decompressed, as it does not contain searched words
+    assert stats == {"segments": 2, "searched": 1}
+
+    assert [h.host for h in search_logs("LINK DOWN", ignore_case=True)] == ["web-1"]
+    assert [h.host for h in search_logs(r"\w+", hosts=["r:^web"])] == ["web-1"] * 4
+    assert list(search_logs("load", hosts=["missing"])) == []
@@ -0,0 +1,130 @@
+import re
+from types import SimpleNamespace
+
+from sshtmux.core.config import settings
+from sshtmux.services.scrollback import (
+    ARCHIVE_OPTION,
+    ScrollbackArchive,
+    ScrollbackHit,
+    ScrollbackPane,
+    ScrollbackSearch,
+    capture_commands,
+    match_captures,
+    read_archive,
+)
+
+
+class FakeTmux:
+    """Captures print given history, other commands return given output"""
+
+    def __init__(self, history, stdout):
+        self.history = history
+        self.stdout = stdout
+        self.calls = []
+        self.server = self
+
+    def command(self):
+        return ["sh", "-c", f"printf '{self.history}'", "sh"]
+
+    def cmd(self, *args):
+        self.calls.append(args)
+        return SimpleNamespace(stdout=self.stdout, stderr=[])
+
+#-----------------------------------
+# SAMPLES
+#-----------------------------------
+marker = "0123abcd"
+output = [
+    f"{marker} %1\n",
+    "$ df -h\n",
+    "error: disk full\n",
+    "$\n",
+    "\n",
+    "\n",
+    f"{marker} %2\n",
+    "Error: disk full\n",
+    "ok\n",
+    f"{marker} %3\n",
+]
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_capture_commands():
+    panes = [ScrollbackPane("%1", "web", 1, "web-1", 0)]
+    assert capture_commands(panes, marker) == [
+        ["display-message", "-p", "-t", "%1", f"{marker} #{{pane_id}}"],
+        ["capture-pane", "-p", "-J", "-S", "-", "-t", "%1"],
+    ]
+    assert panes[0].target == "web:1.0"
+
+
+def test_match_captures():
+    regex = re.compile("error", re.IGNORECASE)
+    # Empty lines at bottom of pane are not counted
+    assert list(match_captures(output, marker, regex)) == [
+        ("%1", [(1, "error: disk full")]),
+        ("%2", [(1, "Error: disk full")]),
+        ("%3", []),
+    ]
+    assert [m for _, m in match_captures(output, marker, re.compile("^\\$"))] == [
+        [(2, "$ df -h"), (0, "$")],
+        [],
+        [],
+    ]
+
+
+def test_search_order():
+    panes = [
+        ScrollbackPane("%1", "web", 1, "web-1", 0, activity=100),
+        ScrollbackPane("%2", "web", 2, "web-2", 0, activity=200),
+        ScrollbackPane("%3", "db", 1, "db-1", 0, activity=150),
+    ]
+    batches = []
+
+    def capture(batch, regex):
+        batches.append([pane.pane_id for pane in batch])
+        return [ScrollbackHit(pane, line, pane.pane_id) for pane in batch for line in (3, 0)]
+
+    search = ScrollbackSearch(tmux=None, batch_size=2, workers=2)
+    search._capture = capture
+    hits = search.search(re.compile("x"), panes)
+    assert sorted(batches) == [["%1", "%2"], ["%3"]]
+    # Recently active windows first, newest lines first
+    assert [(hit.text, hit.line) for hit in hits] == [
+        ("%2", 0), ("%2", 3), ("%3", 0), ("%3", 3), ("%1", 0), ("%1", 3)
+    ]
+
+
+def test_idle_panes():
+    panes = [
+        ScrollbackPane("%1", "web", 1, "web-1", 1, activity=1000, history=5000),
+        ScrollbackPane("%2", "web", 2, "web-2", 1, activity=1000, history=10),
+        ScrollbackPane("%3", "web", 3, "web-3", 1, activity=1500, history=5000),
+    ]
+    archive = ScrollbackArchive(None, idle=600, min_lines=100, clock=lambda: 1700)
+    assert [pane.pane_id for pane in archive.idle_panes(panes)] == ["%1"]
+
+
+def test_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.sshtmux, "SSHTMUX_SCROLLBACK_PATH", str(tmp_path))
+    pane = ScrollbackPane("%1", "web", 1, "web-1", 1, activity=1000, history=2)
+
+    tmux = FakeTmux("one\\ntwo\\n", ["cleared"])
+    assert ScrollbackArchive(tmux, idle=1, min_lines=1).archive(pane)
+    path = str(next(tmp_path.iterdir()))
+    assert path.endswith(".log.gz") and "web_1.1-" in path
+    assert tmux.calls[0][-1].startswith("clear-history -t %1")
+    assert tmux.calls[1] == ("set-option", "-p", "-t", "%1", ARCHIVE_OPTION, path)
+
+    # Next history is appended to the same file
+    pane.archive = path
+    tmux = FakeTmux("three\\n", ["cleared"])
+    assert ScrollbackArchive(tmux, idle=1, min_lines=1).archive(pane)
+    assert list(read_archive(path)) == ["one", "two", "three"]
+
+    # Pane was active meanwhile, history is not cleared nor archived
+    tmux = FakeTmux("four\\n", [])
+    assert not ScrollbackArchive(tmux, idle=1, min_lines=1).archive(pane)
+    assert list(read_archive(path)) == ["one", "two", "three"]
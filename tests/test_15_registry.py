@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from sshtmux.services.registry import HostRegistry, parse_pane
+
+
+class FakeServer:
+    """Returns given output of Tmux, and records commands"""
+
+    def __init__(self, stdout=None, stderr=None):
+        self.stdout = stdout or []
+        self.stderr = stderr or []
+        self.calls = []
+
+    def cmd(self, *args):
+        self.calls.append(args)
+        return SimpleNamespace(stdout=self.stdout, stderr=self.stderr)
+
+
+#-----------------------------------
+# SAMPLES
+#-----------------------------------
+panes = [
+    "%1\tweb\t1\t1\trenamed\tweb-1\tweb\tidentity\tops",
+    "%2\tweb\t1\t2\trenamed\tweb-1\tweb\tidentity\tops",
+    "%3\tweb\t2\t1\tbash\t\t\t\t",
+]
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_parse_pane():
+    pane = parse_pane(panes[0])
+    assert (pane.pane_id, pane.window_index, pane.pane_index) == ("%1", 1, 1)
+    assert (pane.host, pane.connection, pane.identity) == ("web-1", "identity", "ops")
+    assert pane.ssh_host.name == "web-1" and pane.ssh_host.group == "web"
+    assert parse_pane(panes[2]).host == ""
+
+
+def test_registry_load():
+    server = FakeServer(stdout=panes)
+    registry = HostRegistry(server).load()
+    assert server.calls[0][:2] == ("list-panes", "-a")
+    assert [p.pane_id for p in registry.host_panes("web-1")] == ["%1", "%2"]
+    assert registry.get("%3").window_name == "bash"
+
+    # Reloading session replaces only its panes
+    server.stdout = panes[2:]
+    registry.load("web")
+    assert server.calls[1][:4] == ("list-panes", "-s", "-t", "=web")
+    assert [p.pane_id for p in registry.panes("web")] == ["%3"]
+
+
+def test_registry_lookup():
+    server = FakeServer(stdout=panes[1:2])
+    registry = HostRegistry(server)
+    # Host is found also when window was renamed
+    assert registry.lookup("web", 1, 2).host == "web-1"
+    assert server.calls[0][:5] == (
+        "list-panes", "-t", "=web:1", "-f", "#{==:#{pane_index},2}"
+    )
+    assert registry.get("%2") is not None
+
+    server = FakeServer(stderr=["can't find session: web"])
+    assert HostRegistry(server).lookup("web", 1, 2) is None
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from sshtmux.services.registry import HostRegistry
+from sshtmux.services.tmux import (
+    MAX_BATCH_SIZE,
+    ConnectionType,
+    Tmux,
+    WindowBatch,
+    window_name,
+)
+from sshtmux.sshm import SSH_Host
+
+
+class FakeServer:
+    """Prints id of every created window, and records Tmux calls"""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.calls = []
+
+    def cmd(self, *args):
+        self.calls.append(args)
+        if args[0] == "list-sessions":
+            return SimpleNamespace(stdout=self.sessions, stderr=[])
+        created = [arg for arg in args if arg in ("new-session", "new-window")]
+        stdout = [f"@{n}" for n in range(len(created))]
+        return SimpleNamespace(stdout=stdout, stderr=[])
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_window_name():
+    assert window_name(SSH_Host(name="web-1", group="web"), "web") == "1"
+    assert window_name(SSH_Host(name="db-1", group="web"), "web") == "db-1"
+
+
+def test_window_batch():
+    batch = WindowBatch({"web"})
+    assert batch.add_window("web", "1") == "=web:$"
+    batch.add_window("db", "1", command="top")
+    batch.add_window("db", "2", select=True)
+    assert batch.windows == 3
+    assert batch.commands == [
+        ["new-window", "-d", "-a", "-t", "=web:$", "-P", "-F", "#{window_id}", "-n", "1"],
+        ["new-session", "-d", "-s", "db", "-P", "-F", "#{window_id}", "-n", "1", "top"],
+        ["new-window", "-d", "-a", "-t", "=db:$", "-P", "-F", "#{window_id}", "-n", "2"],
+        ["select-window", "-t", "=db:$"],
+    ]
+
+
+def test_chunks():
+    commands = [["set-option", "-w", "@sshm-host", "x" * 1000]] * 30
+    parts = Tmux.chunks(commands)
+    assert len(parts) == 3 and sum(len(part) for part in parts) == 30
+    for part in parts:
+        assert len(" ".join(Tmux.sequence(part))) < MAX_BATCH_SIZE
+    assert Tmux.chunks([]) == []
+
+
+def test_new_windows():
+    tmux = Tmux.__new__(Tmux)
+    tmux.server = FakeServer(["web"])
+    tmux.registry = HostRegistry(tmux.server)
+    hosts = [SSH_Host(name="web-1", group="web"), SSH_Host(name="db-1", group="db")]
+    assert tmux.new_windows(ConnectionType.normal, hosts) == ["@0", "@1"]
+
+    # Sessions are listed once, then all windows are created with single call
+    assert len(tmux.server.calls) == 2
+    args = tmux.server.calls[1]
+    assert args[:6] == ("new-window", "-d", "-a", "-t", "=web:$", "-P")
+    assert ("new-session", "-d", "-s", "db") in [args[i : i + 4] for i in range(len(args))]
+    assert args.count("@sshm-host") == 4
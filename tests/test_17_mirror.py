@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+from sshtmux.services.mirror import SUBSCRIPTION, TmuxMirror
+
+
+class FakeServer:
+    """Returns given panes, and counts Tmux calls"""
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.calls = 0
+
+    def cmd(self, *args):
+        self.calls += 1
+        return SimpleNamespace(stdout=self.stdout, stderr=[])
+
+
+def _mirror(stdout):
+    mirror = TmuxMirror(SimpleNamespace(server=FakeServer(stdout)))
+    # As if attached to Tmux in control mode
+    mirror.live = True
+    return mirror
+
+
+#-----------------------------------
+# SAMPLES
+#-----------------------------------
+panes = [
+    "%1\tweb\t1\t1\t1\tweb-1\tweb\tnormal\t",
+    "%2\tweb\t1\t2\t1\tweb-1\tweb\tnormal\t",
+    "%3\tdb\t1\t1\tdb-1\tdb-1\tdb\tidentity\tdba",
+]
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_mirror_lookups():
+    mirror = _mirror(panes)
+    assert mirror.lookup("web", 1, 2).pane_id == "%2"
+    assert mirror.lookup("web", "1", "1").pane_id == "%1"
+    assert mirror.lookup("web", 3, 1) is None
+    assert mirror.sessions() == {"web", "db"}
+    assert [p.pane_id for p in mirror.panes("web")] == ["%1", "%2"]
+    assert [p.identity for p in mirror.host_panes("db-1")] == ["dba"]
+    # Loaded once, then served from mirror
+    assert mirror.server.calls == 1 and mirror.reloads == 1
+
+
+def test_mirror_events():
+    mirror = _mirror(panes)
+    mirror.sessions()
+    assert not mirror.handle_event("%output %1 hello")
+    assert not mirror.handle_event("%subscription-changed sshm-panes $0 - - - : x")
+    assert mirror.server.calls == 1
+
+    assert mirror.handle_event("%unlinked-window-add @5")
+    mirror.server.stdout = panes[2:]
+    assert mirror.sessions() == {"db"}
+    assert mirror.handle_event(f"%subscription-changed {SUBSCRIPTION} $0 - - - : x")
+    mirror.server.stdout = panes
+    assert mirror.lookup("web", 1, 1).host == "web-1"
+    assert mirror.server.calls == 3
+
+
+def test_mirror_not_attached():
+    mirror = _mirror(panes)
+    mirror.live = False
+    # Without notifications mirror cannot know it is current
+    mirror.sessions()
+    mirror.sessions()
+    assert mirror.server.calls == 2
@@ -0,0 +1,148 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sshtmux.core.config import SSHHandshakeStage, settings
+from sshtmux.exceptions import SSHException, SSHUnreachableException
+from sshtmux.services.handshake import Handshake, handshake_stages
+from sshtmux.services.identities import totp
+from sshtmux.sshm import SSH_Host
+
+
+class FakePane:
+    """Shows next screen every time Enter is sent, and records typed keys"""
+
+    pane_id = "%1"
+
+    def __init__(self, screens):
+        self.screens = screens
+        self.keys = []
+        self.server = self
+
+    def send_keys(self, keys, enter=True, literal=False):
+        self.keys.append(keys)
+
+    def enter(self):
+        self.screens = self.screens[1:] or self.screens
+
+    def cmd(self, *args):
+        return SimpleNamespace(stdout=["0"] + self.screens[0], stderr=[])
+
+
+def _handshake(host, identity=True, timeout=1):
+    secrets = {None: "secret", "ops-otp": "GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ"}
+    return Handshake(host, handshake_stages(host, identity), secrets.get, timeout)
+
+
+#-----------------------------------
+# SAMPLES
+#-----------------------------------
+command = "ssh -o ConnectTimeout=10 web-1"
+login = ["~$ " + command, "Are you sure you want to continue connecting (yes/no)? "]
+password = login + ["yes", "ops@web-1's password: "]
+otp = password + ["", "Verification code: "]
+shell = otp + ["", "Last login: today, 3 failed attempts", "[ops@web-1 ~]$ "]
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_totp():
+    # RFC 6238 test vector (SHA1)
+    assert totp("GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ", clock=lambda: 59) == "287082"
+
+
+def test_handshake_stages(monkeypatch):
+    monkeypatch.setattr(settings.ssh, "SSH_HANDSHAKE", [
+        SSHHandshakeStage(name="otp", response="${totp:ops-otp}", hosts=["r:^web"]),
+        SSHHandshakeStage(name="motd", pattern="Press Enter", response=""),
+    ])
+    stages = handshake_stages(SSH_Host(name="web-1", group="web"), identity=True)
+    assert [s.name for s in stages] == ["motd", "hostkey", "otp", "password", "shell"]
+    assert stages[2].response == "${totp:ops-otp}"
+    assert stages[3].response == "${password}"
+
+    stages = handshake_stages(SSH_Host(name="db-1", group="db"), identity=False)
+    assert [s.response for s in stages if s.name in ("otp", "password")] == [None, None]
+
+
+def test_handshake_run(monkeypatch):
+    monkeypatch.setattr(settings.ssh, "SSH_HANDSHAKE", [
+        SSHHandshakeStage(name="otp", response="${totp:ops-otp}"),
+    ])
+    pane = FakePane([login, password, otp, shell])
+    assert _handshake(SSH_Host(name="web-1", group="web")).run(pane, command) == "shell"
+    assert pane.keys[:3] == [command, "yes", "secret"]
+    assert len(pane.keys[3]) == 6
+
+    # Without identity password prompt is left to user
+    pane = FakePane([login, password])
+    host = SSH_Host(name="web-1", group="web")
+    assert _handshake(host, identity=False).run(pane, command) == "password"
+
+
+def test_handshake_fails():
+    host = SSH_Host(name="web-1", group="web")
+    rejected = password + ["", "ops@web-1's password: "]
+    with pytest.raises(SSHException, match="repeated"):
+        _handshake(host).run(FakePane([password, rejected]), command)
+
+    refused = login[:1] + ["ssh: connect to host web-1 port 22: Connection refused"]
+    with pytest.raises(SSHUnreachableException, match="Connection refused"):
+        _handshake(host).run(FakePane([refused]), command)
+
+    # Same prompt is asked by jump host and by host
+    host = SSH_Host(name="web-1", group="web", params={"ProxyJump": "bastion"})
+    pane = FakePane([password, rejected, shell])
+    assert _handshake(host).run(pane, command) == "shell"
+
+
+def test_handshake_timeout():
+    host = SSH_Host(name="web-1", group="web")
+    with pytest.raises(SSHException, match="Timeout"):
+        _handshake(host, timeout=0.2).run(FakePane([login[:1]]), command)
+
+    # Host which did not show anything is unreachable
+    with pytest.raises(SSHUnreachableException):
+        _handshake(host, timeout=0.2).run(FakePane([login[:1]]), command)
+
+    # Unknown prompt (without login) shows host is reachable
+    unknown = login[:1] + ["Last login: today", "➜  ~ "]
+    with pytest.raises(SSHException, match="Timeout") as error:
+        _handshake(host, timeout=0.2).run(FakePane([unknown]), command)
+    assert not isinstance(error.value, SSHUnreachableException)
+
+    # Answered login followed by unknown prompt is taken as connected
+    pane = FakePane([password, password + ["", "web-1 λ"]])
+    assert _handshake(host, timeout=0.2).run(pane, command) == "shell"
+
+
+def test_handshake_retry():
+    host = SSH_Host(name="web-1", group="web")
+    handshake = _handshake(host)
+    # Local shell prompt is shown again when connection command exits
+    refused = login[:1] + ["ssh: connect to host web-1 port 22: Connection refused", "~$"]
+    with pytest.raises(SSHUnreachableException):
+        handshake.run(FakePane([refused]), command)
+
+    # Command typed again, output of previous attempt is not checked
+    pane = FakePane([refused + ["~$ " + command, "Last login: today", "[ops@web-1 ~]$"]])
+    assert handshake.run(pane, command) == "shell"
+    assert handshake.start == 3
+
+
+def test_handshake_interrupt():
+    host = SSH_Host(name="web-1", group="web")
+    handshake = _handshake(host, timeout=0.2)
+    with pytest.raises(SSHUnreachableException):
+        handshake.run(FakePane([login[:1]]), command)
+
+    # Back in local shell, command can be typed again
+    pane = FakePane([login[:1] + ["^C", "~$"]])
+    handshake.interrupt(pane, timeout=0.2)
+    assert pane.keys == ["C-c"]
+
+    # Command is not typed into remote shell
+    pane = FakePane([login[:1] + ["Last login: today", "➜  ~ "]])
+    with pytest.raises(SSHException, match="not typed again"):
+        handshake.interrupt(pane, timeout=0.2)
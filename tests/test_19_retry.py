@@ -0,0 +1,130 @@
+import pytest
+
+from sshtmux.exceptions import SSHException, SSHUnreachableException
+from sshtmux.services.retry import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    Backoff,
+    CircuitBreaker,
+    CircuitOpen,
+    RetryScheduler,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Operation:
+    """Fails with given errors, then returns number of calls"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.calls
+
+
+def _scheduler(breaker, attempts=3):
+    sleeps = []
+    scheduler = RetryScheduler(
+        Backoff(1.0, 10.0),
+        breaker,
+        attempts,
+        retryable=(SSHUnreachableException,),
+        sleep=sleeps.append,
+    )
+    return scheduler, sleeps
+
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_breaker_file(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / "breaker.json")
+    breaker = CircuitBreaker(threshold=2, cooldown=60, clock=clock, path=path)
+    breaker.failure("web")
+
+    # Failures are counted by all processes sharing the file
+    other = CircuitBreaker(threshold=2, cooldown=60, clock=clock, path=path)
+    other.failure("web")
+    assert breaker.state("web") == OPEN
+    assert CircuitBreaker(2, 60, clock=clock, path=path).retry_in("web") == 60
+
+    breaker.success("web")
+    assert other.state("web") == CLOSED
+
+    # Entries expire cooldown after last failure
+    other.failure("db")
+    clock.now += 60
+    assert CircuitBreaker(2, 60, clock=clock, path=path)._read() == {}
+
+
+def test_breaker_file_probe(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / "breaker.json")
+    breaker = CircuitBreaker(threshold=1, cooldown=60, clock=clock, path=path)
+    breaker.failure("web")
+    clock.now += 60
+
+    # Half-open circuit allows single probe, for all processes sharing the file
+    other = CircuitBreaker(threshold=1, cooldown=60, clock=clock, path=path)
+    assert other.state("web") == HALF_OPEN
+    assert breaker.allow("web")
+    assert not other.allow("web")
+    assert not CircuitBreaker(1, 60, clock=clock, path=path).allow("web")
+
+    # Probe which never reported result is replaced
+    clock.now += 60
+    assert other.allow("web")
+    assert not breaker.allow("web")
+    other.failure("web")
+    assert breaker.state("web") == OPEN
+
+    clock.now += 60
+    assert breaker.allow("web")
+    breaker.success("web")
+    assert other.allow("web") and other.allow("web")
+
+
+def test_retry_scheduler():
+    breaker = CircuitBreaker(threshold=3, cooldown=60, clock=Clock())
+    scheduler, sleeps = _scheduler(breaker)
+
+    operation = Operation(SSHUnreachableException(), SSHUnreachableException())
+    retried = []
+    assert scheduler.run("web", operation, lambda: retried.append(1)) == 3
+    assert len(sleeps) == 2 and len(retried) == 2
+    assert breaker.state("web") == CLOSED
+
+    # Rejected login is not retried, nor counted by breaker
+    operation = Operation(SSHException("denied"))
+    with pytest.raises(SSHException, match="denied"):
+        scheduler.run("web", operation)
+    assert operation.calls == 1
+
+
+def test_retry_circuit_open():
+    breaker = CircuitBreaker(threshold=3, cooldown=60, clock=Clock())
+    scheduler, sleeps = _scheduler(breaker)
+
+    operation = Operation(*[SSHUnreachableException("refused")] * 3)
+    with pytest.raises(SSHUnreachableException, match="refused"):
+        scheduler.run("dead", operation)
+    assert operation.calls == 3 and len(sleeps) == 2
+
+    # Unreachable host is not tried again until cooldown ends
+    operation = Operation()
+    with pytest.raises(CircuitOpen):
+        scheduler.run("dead", operation)
+    assert operation.calls == 0
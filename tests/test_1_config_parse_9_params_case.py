@@ -0,0 +1,96 @@
+import copy
+import json
+import pickle
+
+from sshtmux.sshm import SSH_Config
+from sshtmux.sshm.ssh_keywords import INDEX_THRESHOLD, SSH_Params, keyword_id
+from sshtmux.sshm.sshutils import validate_unique_param
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+config1="""
+Host test
+    HostName 1.2.3.4
+    PORT 2222
+    IdentityFile ~/.ssh/id_rsa
+    identityfile ~/.ssh/id_ed25519
+    hostname 5.6.7.8
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_keyword_id():
+    assert keyword_id("hostname") == "Hostname"
+    assert keyword_id("HOSTNAME") == "Hostname"
+    assert keyword_id("proxyjump") == "ProxyJump"
+    # Keywords unknown to validator are identified by lower-case spelling
+    assert keyword_id("SomeKeyword") == "somekeyword"
+
+
+def test_parse_keeps_spelling():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    host, _ = config.get_host_by_name("test")
+
+    assert list(host.params) == ["HostName", "PORT", "IdentityFile"]
+    assert host.params["hostname"] == "1.2.3.4"
+    assert host.params["Port"] == "2222"
+    assert host.params["identityfile"] == ["~/.ssh/id_rsa", "~/.ssh/id_ed25519"]
+    # Only multi-value keywords keep repeated values, others keep first one
+    assert host.get_target() == "1.2.3.4"
+
+    content = "".join(config.generate_ssh_config().ssh_config_lines)
+    assert "    HostName 1.2.3.4\n" in content
+    assert "    PORT 2222\n" in content
+
+
+def test_params_operations():
+    params = SSH_Params({"HostName": "1.2.3.4", "User": "test"})
+
+    assert "hostname" in params and "HOSTNAME" in params
+    assert params.get("user") == "test"
+    assert params.get("port", "22") == "22"
+
+    # New spelling replaces old one, keyword is stored only once
+    params["hostname"] = "4.3.2.1"
+    assert dict(params) == {"User": "test", "hostname": "4.3.2.1"}
+
+    params |= {"user": "other", "Port": "22"}
+    assert dict(params) == {"hostname": "4.3.2.1", "user": "other", "Port": "22"}
+    assert isinstance(params | {"PORT": "2222"}, SSH_Params)
+    assert dict(params | {"PORT": "2222"})["PORT"] == "2222"
+    del params["port"]
+
+    del params["USER"]
+    assert params.pop("Hostname") == "4.3.2.1"
+    assert params == {}
+
+
+def test_params_index():
+    params = SSH_Params({f"Keyword{i}": str(i) for i in range(INDEX_THRESHOLD + 2)})
+
+    assert params["keyword3"] == "3"
+    params["KEYWORD3"] = "new"
+    del params["keyword4"]
+    assert params["keyword3"] == "new"
+    assert "keyword4" not in params
+    assert len(params) == INDEX_THRESHOLD + 1
+
+
+def test_params_copy_and_serialize():
+    params = SSH_Params({"HostName": "1.2.3.4", "IdentityFile": ["a", "b"]})
+
+    for copied in [copy.copy(params), copy.deepcopy(params), pickle.loads(pickle.dumps(params))]:
+        assert isinstance(copied, SSH_Params)
+        assert copied == params
+        assert copied["hostname"] == "1.2.3.4"
+
+    assert json.loads(json.dumps(params)) == {"HostName": "1.2.3.4", "IdentityFile": ["a", "b"]}
+
+
+def test_validate_unique_param():
+    host_params = SSH_Params({"hostname": "1.2.3.4", "Port": "22"})
+    validate_unique_param(host_params, {"HostName": "4.3.2.1"})
+    assert dict(host_params) == {"Port": "22"}
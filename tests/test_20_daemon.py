@@ -0,0 +1,196 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import click
+import pytest
+
+from sshtmux import client
+from sshtmux.services.daemon import SSHMDaemon
+from sshtmux.sshm import ssh_config
+
+CLIENT = str(Path(client.__file__))
+
+
+@click.group()
+def cli(): ...
+
+
+@cli.command()
+@click.argument("name")
+@click.pass_obj
+def greet(obj, name):
+    line = sys.stdin.readline().strip()
+    click.echo(f"{obj} {name} {line}")
+    click.echo("done", err=True)
+    sys.exit(3)
+
+
+class Exec(Exception): ...
+
+
+def _fake_exec(calls):
+    def execvp(file, args):
+        calls.append(args)
+        raise Exec()
+
+    return execvp
+
+
+@pytest.fixture
+def daemon_socket(tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    daemon = SSHMDaemon(path, cli)
+    # Served without SSH config, Tmux and its mirror
+    daemon.load = lambda: None
+    daemon.sshmconf = "config"
+    pid = os.fork()
+    if pid == 0:
+        try:
+            daemon.serve_forever()
+        finally:
+            os._exit(0)
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+    yield path
+    os.kill(pid, signal.SIGTERM)
+    os.waitpid(pid, 0)
+
+
+#------------------------------------------------------------------------------
+# Test request is run by daemon with terminal (stdio) of client
+#------------------------------------------------------------------------------
+def test_daemon_request(daemon_socket):
+    result = subprocess.run(
+        [sys.executable, CLIENT, "--socket", daemon_socket, "greet", "bob"],
+        input="hello\n", capture_output=True, text=True, timeout=10,
+    )
+    assert result.stdout == "config bob hello\n"
+    assert result.stderr == "done\n"
+    assert result.returncode == 3
+
+
+def test_daemon_idle_client(daemon_socket):
+    # Client which never sends request does not block other ones
+    idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    idle.connect(daemon_socket)
+    try:
+        started = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, CLIENT, "--socket", daemon_socket, "greet", "bob"],
+            input="hello\n", capture_output=True, text=True, timeout=10,
+        )
+        assert result.returncode == 3
+        assert time.monotonic() - started < 2
+    finally:
+        idle.close()
+
+
+#------------------------------------------------------------------------------
+# Test client runs "sshm" itself when daemon does not take request
+#------------------------------------------------------------------------------
+def test_client_fallback_no_daemon(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(client.os, "execvp", _fake_exec(calls))
+    with pytest.raises(Exec):
+        client.main(["--socket", str(tmp_path / "none.sock"), "host", "list"])
+    assert calls == [["sshm", "host", "list"]]
+
+
+def test_client_fallback_refused(tmp_path, monkeypatch):
+    path = str(tmp_path / "daemon.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+
+    def refuse():
+        # Same as daemon which cannot fork, connection is closed without answer
+        conn, _ = listener.accept()
+        conn.close()
+
+    thread = threading.Thread(target=refuse)
+    thread.start()
+    calls = []
+    monkeypatch.setattr(client.os, "execvp", _fake_exec(calls))
+    try:
+        with pytest.raises(Exec):
+            client.main(["--socket", path, "host", "list"])
+    finally:
+        thread.join(5)
+        listener.close()
+    assert calls == [["sshm", "host", "list"]]
+
+
+#------------------------------------------------------------------------------
+# Test daemon keeps last valid config, when changed config is not valid
+#------------------------------------------------------------------------------
+def test_daemon_invalid_config(tmp_path, monkeypatch):
+    config_file = tmp_path / "config"
+    config_file.write_text("Host web\n    hostname 1.2.3.4\n")
+    monkeypatch.setattr(ssh_config.settings.ssh, "SSH_CONFIG_FILE", str(config_file))
+
+    daemon = SSHMDaemon(str(tmp_path / "daemon.sock"), cli)
+    # Tmux (and mirror) are not needed
+    daemon.tmux = object()
+    daemon.load()
+    sshmconf = daemon.sshmconf
+    assert sshmconf.get_host_by_name("web")
+
+    config_file.write_text("hostname 1.2.3.4\nHost web\n")
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    daemon.load()
+    assert daemon.sshmconf is sshmconf
+
+
+#------------------------------------------------------------------------------
+# Test Tmux notifications are handled before client connected at the same time
+#------------------------------------------------------------------------------
+def test_daemon_mirror_first(tmp_path, monkeypatch):
+    handled = []
+    read_fd, write_fd = os.pipe()
+
+    class Mirror:
+        def attach(self):
+            return read_fd
+
+        def read_events(self):
+            handled.append("mirror")
+            os.read(read_fd, 1024)
+            return True
+
+        def stop(self): ...
+
+    def accept():
+        handled.append("accept")
+        raise KeyboardInterrupt()
+
+    daemon = SSHMDaemon(str(tmp_path / "daemon.sock"), cli)
+    daemon.load = lambda: None
+    daemon.mirror = Mirror()
+    daemon._accept = accept
+    listen = daemon._listen
+
+    def listen_and_connect():
+        # Client and notification are both waiting, when daemon starts selecting
+        listen()
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(daemon.socket_path)
+        os.write(write_fd, b"%window-add @1\n")
+
+    daemon._listen = listen_and_connect
+    monkeypatch.setattr(signal, "signal", lambda *_: None)
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            daemon.serve_forever()
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+    assert handled == ["mirror", "accept"]
@@ -0,0 +1,49 @@
+from sshtmux.sshm import SSH_Config
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+
+config1="""
+Host defaulthost
+    hostname 2.2.3.3
+
+#-----------------------
+#@group: testgroup
+#-----------------------
+Host testgroup-app
+    hostname 4.3.2.1
+
+Host testgroup-db
+    hostname 4.3.2.2
+
+Host testgroup-*
+    user test4321
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_iter_hosts_all():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    names = [host.name for _, host in config.iter_hosts()]
+    assert names == ["defaulthost", "testgroup-app", "testgroup-db", "testgroup-*"]
+
+
+def test_iter_hosts_filters():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    by_group = [(g.name, h.name) for g, h in config.iter_hosts(group_filter="^testgroup$")]
+    assert by_group == [
+        ("testgroup", "testgroup-app"),
+        ("testgroup", "testgroup-db"),
+        ("testgroup", "testgroup-*"),
+    ]
+
+    by_name = [h.name for _, h in config.iter_hosts(name_filter="db$")]
+    assert by_name == ["testgroup-db"]
+
+    assert list(config.iter_hosts(group_filter="default", name_filter="db")) == []
@@ -0,0 +1,48 @@
+from sshtmux.sshm import SSH_Config
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+
+config1="""
+#-----------------------
+#@group: testgroup
+#-----------------------
+Host testgroup-app
+    hostname 4.3.2.1
+
+Host testgroup-db
+    hostname 4.3.2.2
+
+Host testgroup-*
+    user test4321
+
+Match user testgroup
+    port 2222
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_iter_all_hosts():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+    group = config.get_group_by_name("testgroup")
+
+    names = [host.name for host in group.iter_all_hosts()]
+    assert names == [host.name for host in group.all_hosts]
+    assert names == ["testgroup-app", "testgroup-db", "testgroup-*", "user testgroup"]
+    assert group.hosts_count == 4
+
+
+def test_filter_config_matches():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    groups = config.filter_config("", "^user")
+    assert len(groups) == 1
+    assert [h.name for h in groups[0].iter_all_hosts()] == ["user testgroup"]
+    assert groups[0].matches == [config.get_group_by_name("testgroup").matches[0]]
+
+    groups = config.filter_config("", "app$")
+    assert [h.name for h in groups[0].iter_all_hosts()] == ["testgroup-app"]
@@ -0,0 +1,42 @@
+import os
+
+from sshtmux.sshm import SSH_Config
+
+#------------------------------------------------------------------------------
+# Test writing configuration replaces target file atomically and keeps its mode
+#------------------------------------------------------------------------------
+config1="""
+Host test
+    hostname 1.2.3.4
+"""
+
+def test_write_out(tmp_path):
+    target = tmp_path / "config"
+    target.write_text("old content\n")
+    os.chmod(target, 0o600)
+
+    config = SSH_Config( config1.splitlines())
+    config.ssh_config_file = str(target)
+    config.parse().generate_ssh_config().write_out()
+
+    assert target.read_text() == "".join(config.ssh_config_lines)
+    assert oct(os.stat(target).st_mode & 0o777) == oct(0o600)
+    assert os.listdir(tmp_path) == ["config"]
+
+
+def test_write_out_symlink(tmp_path):
+    (tmp_path / "dotfiles").mkdir()
+    target = tmp_path / "dotfiles" / "config"
+    target.write_text("old content\n")
+    os.chmod(target, 0o640)
+    link = tmp_path / "config"
+    link.symlink_to(target)
+
+    config = SSH_Config( config1.splitlines())
+    config.ssh_config_file = str(link)
+    config.parse().generate_ssh_config().write_out()
+
+    assert link.is_symlink()
+    assert target.read_text() == "".join(config.ssh_config_lines)
+    assert oct(os.stat(target).st_mode & 0o777) == oct(0o640)
+    assert sorted(os.listdir(tmp_path / "dotfiles")) == ["config"]
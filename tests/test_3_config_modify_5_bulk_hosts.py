@@ -0,0 +1,51 @@
+from sshtmux.sshm import SSH_Config, expand_names
+
+#------------------------------------------------------------------------------
+# Test selecting and removing many hosts at once
+#------------------------------------------------------------------------------
+config1 = """
+Host defaulthost
+    hostname 2.2.3.3
+
+#-----------------------
+#@group: testgroup
+#-----------------------
+Host testgroup-app
+    hostname 4.3.2.1
+
+Host testgroup-db
+    hostname 4.3.2.2
+
+Host testgroup-*
+    user test4321
+"""
+
+def test_host_index():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    index = config.get_host_index()
+    assert list(index) == ["defaulthost", "testgroup-app", "testgroup-db", "testgroup-*"]
+
+    host, group = index["testgroup-db"]
+    assert host.params == {"hostname": "4.3.2.2"}
+    assert group.name == "testgroup"
+
+
+def test_expand_names():
+    names = expand_names(("r:^testgroup-(app|db)$", "defaulthost"), ["defaulthost", "testgroup-app", "testgroup-db", "testgroup-*"])
+    assert sorted(names) == ["defaulthost", "testgroup-app", "testgroup-db"]
+
+    names = expand_names(("r:a:b",), ["a:b", "ab"])
+    assert names == ["a:b"]
+
+
+def test_remove_hosts():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    index = config.get_host_index()
+    config.remove_hosts([index["testgroup-app"], index["testgroup-*"], index["defaulthost"]])
+
+    assert config.get_all_host_names() == ["testgroup-db"]
+    assert config.get_group_by_name("testgroup").patterns == []
@@ -0,0 +1,150 @@
+import shutil
+import subprocess
+
+import pytest
+
+from sshtmux.sshm import SSH_Config
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+
+config1="""
+Host web1
+    HostName %h.example.com
+    IdentityFile ~/.ssh/a
+    Port 2200
+
+Host db1
+    HostName 10.0.0.5
+
+#-----------------------
+#@group: web
+#-----------------------
+Host web2
+    HostName 10.0.1.2
+    IdentityFile ~/.ssh/c
+    IdentityFile ~/.ssh/d
+
+Host web* !web3
+    IdentityFile ~/.ssh/b
+    user deploy
+    Port 2222
+    ServerAliveInterval 30
+    ProxyJump bastion
+    SendEnv LANG
+
+Host *
+    User root
+    SendEnv LC_*
+"""
+
+# Global pattern first, followed by Match in group (group is written after it)
+config2="""
+Host *
+    User globaluser
+
+Host web-01
+    HostName 10.0.0.1
+
+#-----------------------
+#@group: web
+#-----------------------
+Host web-02
+    HostName 10.0.0.2
+
+Match host 10.0.0.2
+    User matched
+    Port 2200
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_effective_params_precedence():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    assert config.effective_params("web1") == {
+        "hostname": "web1.example.com",
+        "identityfile": ["~/.ssh/a", "~/.ssh/b"],
+        "port": "2200",
+        "user": "deploy",
+        "serveraliveinterval": "30",
+        "proxyjump": "bastion",
+        "sendenv": ["LANG", "LC_*"],
+    }
+    assert config.effective_params("web3") == {"user": "root", "sendenv": ["LC_*"]}
+    assert config.resolver.get("web2", "IdentityFile") == [
+        "~/.ssh/c",
+        "~/.ssh/d",
+        "~/.ssh/b",
+    ]
+
+
+def test_effective_params_invalidate():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    assert config.effective_params("db1")["user"] == "root"
+    host, _ = config.get_host_by_name("db1")
+    host.params["User"] = "admin"
+    assert config.effective_params("db1")["user"] == "root"
+
+    config.invalidate_cache()
+    assert config.effective_params("db1")["user"] == "admin"
+
+
+def _ssh_g(config_file, name):
+    output = subprocess.run(
+        ["ssh", "-G", "-F", str(config_file), name],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    ssh_g = {}
+    for line in output.splitlines():
+        keyword, _, value = line.partition(" ")
+        ssh_g.setdefault(keyword, []).append(value)
+    return ssh_g
+
+
+def test_effective_params_file_order():
+    config = SSH_Config( config2.splitlines())
+    config.parse()
+
+    # Blocks apply in order of config file, not in order SSHTmux writes them
+    assert config.effective_params("web-02") == {
+        "user": "globaluser",
+        "hostname": "10.0.0.2",
+        "port": "2200",
+    }
+    assert config.effective_params("web-01")["user"] == "globaluser"
+
+    # Once written by SSHTmux, file (and resolver) follows its order
+    config.generate_ssh_config()
+    assert config.effective_params("web-02")["user"] == "matched"
+
+
+@pytest.mark.skipif(shutil.which("ssh") is None, reason="OpenSSH client not installed")
+@pytest.mark.parametrize(
+    "config_text, names",
+    [
+        (config1, ["web1", "web2", "web3", "db1", "other"]),
+        (config2, ["web-01", "web-02", "other"]),
+    ],
+    ids=["config1", "config2"],
+)
+def test_effective_params_ssh_g(tmp_path, config_text, names):
+    config_file = tmp_path / "config"
+    # Original file, and the same config written by SSHTmux
+    for text in [config_text, None]:
+        config = SSH_Config( config_text.splitlines())
+        config.parse()
+        if text is None:
+            text = "".join(config.generate_ssh_config().ssh_config_lines)
+        config_file.write_text(text)
+
+        for name in names:
+            ssh_g = _ssh_g(config_file, name)
+            for keyword, value in config.effective_params(name).items():
+                expected = value if isinstance(value, list) else [value]
+                assert ssh_g[keyword] == expected, f"{name}: {keyword}"
@@ -0,0 +1,166 @@
+import getpass
+import shutil
+import subprocess
+
+import pytest
+
+from sshtmux.cmds.host.host_list import HOST_PARAMS, _render_table
+from sshtmux.sshm import SSH_Config, SSH_Host
+from sshtmux.sshm.ssh_resolver import SSH_Resolver
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+
+config1=f"""
+Host web1
+    HostName 10.0.0.1
+    IdentityFile ~/.ssh/a
+
+Host db1
+    User postgres
+
+Host 10.0.0.1
+    ServerAliveInterval 11
+
+Match host 10.0.0.* user {getpass.getuser()}
+    Port 2201
+
+Match originalhost db* !user root
+    Port 2202
+
+Match localuser {getpass.getuser()} originalhost web1
+    Compression yes
+
+Match final host 10.0.0.1
+    IdentityFile ~/.ssh/final
+    ConnectTimeout 7
+
+Match exec "exit 0" host db1
+    ConnectTimeout 9
+
+Host *
+    IdentityFile ~/.ssh/a
+    SendEnv LANG
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_match_criteria():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    assert config.effective_params("web1") == {
+        "hostname": "10.0.0.1",
+        "identityfile": ["~/.ssh/a", "~/.ssh/final"],
+        "port": "2201",
+        "compression": "yes",
+        "serveraliveinterval": "11",
+        "connecttimeout": "7",
+        "sendenv": ["LANG", "LANG"],
+    }
+    assert config.effective_params("db1")["port"] == "2202"
+    assert config.resolver.get("db1", "port", user="root") is None
+    assert config.resolver.get("db1", "user", user="root") == "root"
+
+
+def test_match_exec_opt_in():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+    assert "connecttimeout" not in config.effective_params("db1")
+
+    config.resolver = SSH_Resolver(config, allow_exec=True)
+    assert config.effective_params("db1")["connecttimeout"] == "9"
+
+
+def test_match_inherited():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    host, _ = config.get_host_by_name("web1")
+    patterns = [pattern for pattern, _ in host.inherited_params]
+    assert f"host 10.0.0.* user {getpass.getuser()}" in patterns
+    assert "final host 10.0.0.1" in patterns
+    assert "originalhost db* !user root" not in patterns
+
+
+def test_match_lazy(tmp_path):
+    calls = tmp_path / "calls"
+    config = SSH_Config( config1.splitlines() + [f'Match exec "echo %n >> {calls}"', "    Port 2203"])
+    config.resolver = SSH_Resolver(config, allow_exec=True)
+    config.parse()
+
+    # Parsing and listing hosts does not evaluate Match blocks
+    names = [host.name for _, host in config.iter_hosts() if host.type == "normal"]
+    assert names == ["10.0.0.1", "db1", "web1"]
+    assert not calls.exists()
+
+    host, _ = config.get_host_by_name("web1")
+    assert "exec \"echo %n >> " + str(calls) + "\"" in [name for name, _ in host.inherited_params]
+    assert calls.read_text() == "web1\n"
+
+
+def test_match_invalidate(tmp_path):
+    calls = tmp_path / "calls"
+    config = SSH_Config( config1.splitlines() + [f'Match exec "echo %n >> {calls}"', "    Port 2203"])
+    config.resolver = SSH_Resolver(config, allow_exec=True)
+    config.parse()
+
+    host, group = config.get_host_by_name("web1")
+    assert "final host 10.0.0.1" in [name for name, _ in host.inherited_params]
+
+    # Modified config is evaluated again (and "Match exec" commands run again)
+    final, final_group = config.get_host_by_name("final host 10.0.0.1")
+    config.remove_hosts([(final, final_group)])
+    patterns = [name for name, _ in host.inherited_params]
+    assert "final host 10.0.0.1" not in patterns
+    assert f"host 10.0.0.* user {getpass.getuser()}" in patterns
+    assert calls.read_text() == "web1\nweb1\n"
+
+    # Host added after parsing inherits Match blocks as well
+    new_host = SSH_Host(name="db2", group=group.name)
+    group.hosts.append(new_host)
+    config.invalidate_cache()
+    assert [name for name, _ in new_host.inherited_params] == [f'exec "echo %n >> {calls}"']
+    assert calls.read_text() == "web1\nweb1\ndb2\n"
+
+
+def test_match_table_lazy(tmp_path):
+    calls = tmp_path / "calls"
+    config = SSH_Config( config1.splitlines() + [f'Match exec "echo %n >> {calls}"', "    Port 2203"])
+    config.resolver = SSH_Resolver(config, allow_exec=True)
+    config.parse()
+
+    hosts = [host for _, host in config.iter_hosts()]
+    _render_table(hosts, HOST_PARAMS, matches=False)
+    assert not calls.exists()
+    _render_table(hosts, HOST_PARAMS)
+    assert calls.exists()
+
+
+@pytest.mark.skipif(shutil.which("ssh") is None, reason="OpenSSH client not installed")
+def test_match_ssh_g(tmp_path):
+    config_file = tmp_path / "config"
+    # Original file, and the same config written by SSHTmux
+    for text in [config1, None]:
+        config = SSH_Config( config1.splitlines())
+        config.parse()
+        if text is None:
+            text = "".join(config.generate_ssh_config().ssh_config_lines)
+        config_file.write_text(text)
+
+        for name, user in [("web1", None), ("db1", None), ("db1", "root"), ("web1", "bob")]:
+            command = ["ssh", "-G", "-F", str(config_file), name]
+            if user:
+                command += ["-l", user]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            ssh_g = {}
+            for line in output.splitlines():
+                keyword, _, value = line.partition(" ")
+                ssh_g.setdefault(keyword, []).append(value)
+
+            # "Match exec" is evaluated by ssh, but not by default resolver
+            for keyword, value in config.resolver.resolve(name, user).items():
+                expected = value if isinstance(value, list) else [value]
+                assert ssh_g[keyword] == expected, f"{name}: {keyword}"
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+import pytest
+from sshtmux.sshm import SSH_Config, export_config
+from sshtmux.sshm.ssh_export import parse_fields
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+
+config1="""
+#@config: host-style=simple
+Host defaulthost
+    hostname 2.2.3.3
+
+#-----------------------
+#@group: testgroup
+#@desc: this is description
+#-----------------------
+#@host: app server
+Host testgroup-app
+    hostname 4.3.2.1
+
+Host testgroup-*
+    user test4321
+
+#-----------------------
+#@group: emptygroup
+#-----------------------
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_export_ndjson():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    out = io.StringIO()
+    count = export_config(config, out, fmt="ndjson")
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert count == 3
+    assert records[1] == {
+        "name": "testgroup-app",
+        "group": "testgroup",
+        "type": "normal",
+        "info": ["app server"],
+        "params": {"hostname": "4.3.2.1"},
+        "inherited_params": [{"pattern": "testgroup-*", "params": {"user": "test4321"}}],
+        "effective_params": {"Hostname": "4.3.2.1", "User": "test4321"},
+    }
+    assert records[2]["group"] == "testgroup"
+    assert records[2]["type"] == "pattern"
+    # Keywords are spelled the same way for every host type
+    assert records[2]["effective_params"] == {"User": "test4321"}
+
+
+def test_export_json_document():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    out = io.StringIO()
+    export_config(config, out, fmt="json", fields=["name"])
+    document = json.loads(out.getvalue())
+
+    assert document["opts"] == {"host-style": "simple"}
+    assert [g["name"] for g in document["groups"]] == [
+        "default", "emptygroup", "testgroup", "global_pattern"
+    ]
+    assert document["groups"][1]["hosts"] == []
+    assert document["groups"][2]["hosts"] == [{"name": "testgroup-app"}, {"name": "testgroup-*"}]
+
+
+def test_export_json_filtered():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    out = io.StringIO()
+    export_config(config, out, fmt="json", fields=["name"], name_filter="app$")
+    document = json.loads(out.getvalue())
+
+    assert document["groups"] == [
+        {"name": "testgroup", "desc": "this is description", "info": [], "hosts": [{"name": "testgroup-app"}]}
+    ]
+
+
+def test_export_csv_projection():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    out = io.StringIO()
+    fields = parse_fields("name,param:HostName,param:user", "csv")
+    export_config(config, out, fmt="csv", fields=fields, group_filter="testgroup")
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+
+    assert rows == [
+        ["name", "param:HostName", "param:user"],
+        ["testgroup-app", "4.3.2.1", "test4321"],
+        ["testgroup-*", "", "test4321"],
+    ]
+
+
+def test_export_unknown_field():
+    with pytest.raises(ValueError):
+        parse_fields("name,unknown", "ndjson")
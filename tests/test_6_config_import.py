@@ -0,0 +1,137 @@
+import io
+
+import pytest
+
+from sshtmux.sshm import SSH_Config, SSH_Host, export_config
+from sshtmux.sshm.ssh_import import apply_import, load_records, plan_import
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+
+config1="""
+Host defaulthost
+    Hostname 2.2.3.3
+
+#-----------------------
+#@group: testgroup
+#-----------------------
+Host testgroup-app
+    Hostname 4.3.2.1
+    Port 2222
+
+Host testgroup-db
+    Hostname 4.3.2.2
+
+Host testgroup-*
+    User test4321
+"""
+
+import_csv="""name,group,info,Hostname,Port
+testgroup-app,testgroup,,4.3.2.1,2200
+testgroup-web,testgroup,web server,4.3.2.3,
+defaulthost,default,,2.2.3.3,
+"""
+
+import_ndjson="""
+{"name": "testgroup-app", "group": "othergroup", "params": {"Port": "2222"}}
+{"name": "bad-port", "params": {"Port": "99999"}}
+{"name": "bad-keyword", "params": {"NotAKeyword": "yes"}}
+"""
+
+import_csv_no_group="""name,Port
+testgroup-app,2200
+web-?,2201
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_import_plan():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    records, errors = load_records(config, io.StringIO(import_csv), "csv")
+    assert errors == []
+
+    plan = plan_import(config, records, delete_missing=True)
+    assert [r.name for r in plan.creates] == ["testgroup-web"]
+    assert [c.record.name for c in plan.updates] == ["testgroup-app"]
+    assert plan.updates[0].params == {"Port": ("2222", "2200")}
+    assert [h.name for h, _ in plan.deletes] == ["testgroup-db"]
+    assert plan.unchanged == 1
+
+
+def test_import_apply():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    records, _ = load_records(config, io.StringIO(import_csv), "csv")
+    apply_import(config, plan_import(config, records, delete_missing=True))
+
+    group = config.get_group_by_name("testgroup")
+    assert [h.name for h in group.hosts] == ["testgroup-app", "testgroup-web"]
+    assert [h.name for h in group.patterns] == ["testgroup-*"]
+    assert group.hosts[0].params == {"Hostname": "4.3.2.1", "Port": "2200"}
+    assert group.hosts[1] == SSH_Host(
+        name="testgroup-web", group="testgroup", info=["web server"], params={"Hostname": "4.3.2.3"}
+    )
+
+
+def test_import_move_to_new_group():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    records, errors = load_records(config, io.StringIO(import_ndjson), "ndjson")
+    assert [name for name, _ in errors] == ["bad-port", "bad-keyword"]
+
+    plan = plan_import(config, records)
+    assert plan.updates[0].move
+    assert plan.updates[0].params == {}
+
+    apply_import(config, plan)
+    host, group = config.get_host_by_name("testgroup-app")
+    assert group.name == "othergroup"
+    assert host.group == "othergroup"
+
+
+def test_import_without_group():
+    config = SSH_Config( config1.splitlines())
+    config.parse()
+
+    records, errors = load_records(config, io.StringIO(import_csv_no_group), "csv")
+    assert errors == []
+
+    plan = plan_import(config, records, delete_missing=True)
+    # Existing host stays in its group, only new host goes to default group
+    assert not plan.updates[0].move
+    assert plan.updates[0].params == {"Port": ("2222", "2200")}
+    # New host in default group makes it imported group too
+    assert [h.name for h, _ in plan.deletes] == ["defaulthost", "testgroup-db"]
+
+    apply_import(config, plan)
+    host, group = config.get_host_by_name("testgroup-app")
+    assert group.name == "testgroup"
+    host, group = config.get_host_by_name("web-?")
+    assert host.type == "pattern"
+    assert group.name == config.DEFAULT_GROUP_NAME
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "json", "csv"])
+def test_import_export_round_trip(fmt):
+    config = SSH_Config( (config1 + "\nMatch user root\n    Port 2200\n\nHost *\n    Port 22\n").splitlines())
+    config.parse()
+    exported = io.StringIO()
+    export_config(config, exported, fmt=fmt)
+
+    records, errors = load_records(config, io.StringIO(exported.getvalue()), fmt)
+    # Match blocks and global pattern are skipped
+    assert errors == []
+    assert "*" not in [r.name for r in records]
+    assert len(records) == 4
+
+    plan = plan_import(config, records)
+    assert plan.errors == [] and plan.creates == []
+    if fmt != "csv":
+        # CSV columns are resolved with inheritance, so they become host params
+        assert not plan.has_changes
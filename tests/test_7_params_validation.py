@@ -0,0 +1,66 @@
+from sshtmux.sshm.ssh_parameters import SSHParams, SSHParamsValidator
+
+#------------------------------------------------------------------------------
+# Test batch validation gives same results as validating full SSHParams model
+#------------------------------------------------------------------------------
+params1 = {"Hostname": "10.0.0.1", "Port": "22", "User": "admin"}
+params2 = {"Hostname": "10.0.0.2", "Port": "22", "User": "admin"}
+params3 = {"Hostname": "10.0.0.3", "Port": "0", "Ciphers": "bad-cipher"}
+
+
+def test_validate_same_as_model():
+    validator = SSHParamsValidator()
+
+    valid_params, errors = validator.validate(params1)
+    assert errors == []
+    assert valid_params == SSHParams(**params1).model_dump(exclude_none=True)
+
+
+def test_validate_many():
+    validator = SSHParamsValidator()
+
+    results = validator.validate_many([params1, params2, params3])
+    assert results[0] == (params1, [])
+    assert results[1] == (params2, [])
+
+    valid_params, errors = results[2]
+    assert valid_params == {}
+    assert len(errors) == 2
+    assert errors[0].startswith("Port - ")
+    assert errors[1].startswith("Ciphers - ")
+
+
+def test_validate_unknown_and_empty():
+    validator = SSHParamsValidator()
+
+    _, errors = validator.validate({"hostname": "10.0.0.1"})
+    assert errors == ["hostname - Extra inputs are not permitted"]
+
+    _, errors = validator.validate({"User": " "})
+    assert len(errors) == 1
+
+
+def test_validate_memoised():
+    validator = SSHParamsValidator(maxsize=4)
+
+    validator.validate_many([params1, params2])
+    # Port and User are shared between hosts, only hostnames are different
+    assert len(validator._cache) == 4
+
+    validator.validate(params3)
+    assert len(validator._cache) <= 4
+
+
+def test_validate_path_not_memoised(tmp_path):
+    validator = SSHParamsValidator()
+    key_file = tmp_path / "id_ed25519"
+
+    _, errors = validator.validate({"IdentityFile": str(key_file)})
+    assert errors
+
+    # File created later is found, path results are not cached
+    key_file.write_text("key")
+    assert validator.validate({"IdentityFile": str(key_file)}) == ({"IdentityFile": str(key_file)}, [])
+    key_file.unlink()
+    _, errors = validator.validate({"IdentityFile": str(key_file)})
+    assert errors
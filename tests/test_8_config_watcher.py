@@ -0,0 +1,108 @@
+import os
+import threading
+
+from sshtmux.services.config_watcher import ConfigWatcher, find_config_files
+
+#------------------------------------------------------------------------------
+# Test watcher finds included files and reports changes of any watched file
+#------------------------------------------------------------------------------
+def _write(path, content):
+    path.write_text(content)
+    # Make sure signature changes even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_find_config_files(tmp_path):
+    (tmp_path / "conf.d").mkdir()
+    (tmp_path / "conf.d" / "a.conf").write_text("Host a\n")
+    (tmp_path / "conf.d" / "b.conf").write_text(f"Include {tmp_path}/extra\n")
+    (tmp_path / "extra").write_text("Host extra\n")
+    config = tmp_path / "config"
+    config.write_text(f"Include {tmp_path}/conf.d/*.conf\nHost test\n")
+
+    assert find_config_files(str(config)) == [
+        str(config),
+        str(tmp_path / "conf.d" / "a.conf"),
+        str(tmp_path / "conf.d" / "b.conf"),
+        str(tmp_path / "extra"),
+    ]
+
+
+def test_check_changes(tmp_path):
+    included = tmp_path / "included"
+    included.write_text("Host a\n")
+    config = tmp_path / "config"
+    config.write_text(f"Include {included}\nHost test\n")
+
+    watcher = ConfigWatcher(str(config), lambda _: None, use_inotify=False)
+    assert watcher.check() == []
+
+    _write(included, "Host b\n")
+    assert watcher.check() == [str(included)]
+    assert watcher.check() == []
+
+    # New include is picked up after main config file changes
+    new_included = tmp_path / "new"
+    new_included.write_text("Host c\n")
+    _write(config, f"Include {included} {new_included}\nHost test\n")
+    assert watcher.check() == [str(config)]
+    assert str(new_included) in watcher.files
+
+
+def test_watcher_thread(tmp_path):
+    config = tmp_path / "config"
+    config.write_text("Host test\n")
+    changed = threading.Event()
+
+    watcher = ConfigWatcher(str(config), lambda _: changed.set(), poll_interval=0.05)
+    watcher.start()
+    try:
+        # Replace file atomically, same way as SSH_Config.write_out does
+        tmp_file = tmp_path / ".tmp"
+        tmp_file.write_text("Host test\n    hostname 1.2.3.4\n")
+        os.replace(tmp_file, config)
+        assert changed.wait(5)
+    finally:
+        watcher.stop()
+        watcher.join(5)
+
+
+def test_check_changes_without_includes(tmp_path):
+    included = tmp_path / "included"
+    included.write_text("Host a\n")
+    config = tmp_path / "config"
+    config.write_text(f"Include {included}\nHost test\n")
+
+    watcher = ConfigWatcher(
+        str(config), lambda _: None, use_inotify=False, follow_includes=False
+    )
+    assert watcher.files == [str(config)]
+
+    _write(included, "Host b\n")
+    assert watcher.check() == []
+
+
+def test_watcher_survives_exit(tmp_path):
+    config = tmp_path / "config"
+    config.write_text("Host test\n")
+    calls = []
+
+    def callback(changed):
+        calls.append(changed)
+        # Same as SSH_Config.parse does on invalid config
+        exit(1)
+
+    watcher = ConfigWatcher(str(config), callback, poll_interval=0.05)
+    watcher.start()
+    try:
+        _write(config, "hostname 1.2.3.4\n")
+        for _ in range(100):
+            if calls:
+                break
+            threading.Event().wait(0.05)
+        assert calls == [[str(config)]]
+        assert watcher.is_alive()
+    finally:
+        watcher.stop()
+        watcher.join(5)
@@ -0,0 +1,113 @@
+import io
+import json
+
+import pytest
+
+from sshtmux.exceptions import SSHException
+from sshtmux.sshm import SSH_Config, SSH_Topology
+from sshtmux.sshm.ssh_topology import JumpHop, export_topology, parse_proxyjump
+
+#-----------------------------------
+# FILE CONTENT SAMPLES FOR PARSING
+#-----------------------------------
+config1="""
+Host bastion
+    hostname 1.1.1.1
+
+Host inner
+    hostname 10.0.0.1
+    proxyjump admin@bastion:2222
+
+Host app
+    hostname 10.0.1.1
+    proxyjump inner,edge
+
+Host edge
+    hostname 10.0.2.1
+    proxyjump app
+
+Host loop1
+    proxyjump loop2
+
+Host loop2
+    proxyjump loop1
+
+Host behind-loop
+    proxyjump loop1
+
+Host db-*
+    proxyjump inner
+
+Host db-1
+    hostname 10.0.3.1
+"""
+
+#-----------------------------------
+# Tests
+#-----------------------------------
+def test_parse_proxyjump():
+    assert parse_proxyjump(None) == []
+    assert parse_proxyjump("none") == []
+    assert parse_proxyjump("a,user@b:2222,ssh://c") == [
+        JumpHop("a"), JumpHop("b", "user", "2222"), JumpHop("c")
+    ]
+    assert parse_proxyjump("[::1]:22") == [JumpHop("::1", None, "22")]
+    assert str(JumpHop("b", "user", "2222")) == "user@b:2222"
+
+
+def test_topology_paths():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    topology = SSH_Topology(config).build()
+
+    assert [str(h) for h in topology.path("bastion")] == ["bastion"]
+    assert [str(h) for h in topology.path("inner")] == ["admin@bastion:2222", "inner"]
+    # Next hops are reached through previous ones, their own ProxyJump is not used
+    assert [str(h) for h in topology.path("app")] == [
+        "admin@bastion:2222", "inner", "edge", "app"
+    ]
+    # ProxyJump inherited from pattern
+    assert [str(h) for h in topology.path("db-1")] == [
+        "admin@bastion:2222", "inner", "db-1"
+    ]
+
+
+def test_topology_cycles():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    topology = SSH_Topology(config).build()
+
+    assert len(topology.cycles) == 1
+    assert sorted(topology.cycles[0]) == ["loop1", "loop2"]
+    with pytest.raises(SSHException):
+        topology.path("loop1")
+    with pytest.raises(SSHException):
+        topology.path("behind-loop")
+
+
+def test_topology_on_demand():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+    topology = SSH_Topology(config)
+
+    assert [h.name for h in topology.path("db-1")] == ["bastion", "inner", "db-1"]
+    assert set(topology.jumps) == {"db-1", "inner", "bastion"}
+
+
+def test_topology_export():
+    config = SSH_Config(config1.splitlines())
+    config.parse()
+
+    output = io.StringIO()
+    export_topology(config, output, fmt="json", name_filter="^db-")
+    document = json.loads(output.getvalue())
+    assert [node["name"] for node in document["nodes"]] == ["db-1", "bastion", "inner"]
+    assert {"from": "inner", "to": "db-1"} in document["edges"]
+    assert document["cycles"] == []
+
+    output = io.StringIO()
+    export_topology(config, output, fmt="dot")
+    dot = output.getvalue()
+    assert dot.startswith("digraph sshm_topology {")
+    assert '"bastion" -> "inner";' in dot
+    assert '"loop1" -> "loop2" [color=red];' in dot